@@ -0,0 +1,90 @@
+import base64
+import binascii
+import io
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Tuple
+from PIL import Image, UnidentifiedImageError
+from config.settings import Config
+from infrastructure.recognition.detection import Location, scale_locations
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'BMP')
+
+
+class ImageRejected(ValueError):
+    """İstekteki görüntü kabul edilmedi; `status_code` HTTP yanıt kodudur."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class DecodedImage:
+    pixels: np.ndarray  # (H, W, 3) uint8 RGB
+    scale: float  # çözülen / özgün boyut
+    original_size: Tuple[int, int]  # (genişlik, yükseklik)
+
+    def to_original(self, locations: List[Location]) -> List[Location]:
+        """Çözülen görüntüdeki (top, right, bottom, left) kutularını özgün boyuta taşır."""
+        if self.scale == 1:
+            return list(locations)
+        width, height = self.original_size
+        return scale_locations(locations, self.scale, (height, width))
+
+
+def decode_image(data: bytes, max_bytes: int = None, max_pixels: int = None,
+                 max_side: int = None) -> DecodedImage:
+    """Görüntü baytlarını diske yazmadan, tek seferde RGB diziye çözer.
+
+    Boyut ve piksel sınırları çözmeden önce (başlıktan) denetlenir. Uzun
+    kenarı `max_side`'dan büyük JPEG'ler draft modunda DCT ölçeklemesiyle
+    doğrudan küçük çözülür; kalan fark tek bir yeniden boyutlandırmayla
+    kapatılır.
+    """
+    max_bytes = Config.API_MAX_IMAGE_BYTES if max_bytes is None else max_bytes
+    max_pixels = Config.API_MAX_IMAGE_PIXELS if max_pixels is None else max_pixels
+    max_side = Config.API_IMAGE_MAX_SIDE if max_side is None else max_side
+
+    if len(data) > max_bytes:
+        raise ImageRejected(f"Görüntü çok büyük: {len(data)} bayt (sınır {max_bytes})", 413)
+    try:
+        image = Image.open(io.BytesIO(data))
+    except (UnidentifiedImageError, OSError):
+        raise ImageRejected("Görüntü biçimi tanınmadı")
+    if image.format not in ALLOWED_FORMATS:
+        raise ImageRejected(f"Desteklenmeyen görüntü biçimi: {image.format}")
+
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageRejected(f"Görüntü çözünürlüğü çok yüksek: {width}x{height}", 413)
+
+    target = (width, height)
+    if max_side and max(width, height) > max_side:
+        ratio = max_side / max(width, height)
+        target = (max(int(width * ratio), 1), max(int(height * ratio), 1))
+        # Yalnızca JPEG'de etkilidir; hedeften küçük olmayan en yakın 1/2, 1/4, 1/8 ölçekte çözer
+        image.draft('RGB', target)
+
+    try:
+        image = image.convert('RGB')
+    except (OSError, ValueError) as e:
+        raise ImageRejected(f"Görüntü çözülemedi: {str(e)}")
+    if image.size != target:
+        image = image.resize(target, Image.BILINEAR)
+
+    return DecodedImage(np.asarray(image), target[0] / width, (width, height))
+
+
+def decode_base64_image(text: str, **limits) -> DecodedImage:
+    """Base64 metni çözüp `decode_image` ile RGB diziye dönüştürür."""
+    max_bytes = limits.get('max_bytes')
+    max_bytes = Config.API_MAX_IMAGE_BYTES if max_bytes is None else max_bytes
+    # Sınırı aşan yük base64 çözülmeden reddedilir
+    if len(text) * 3 // 4 > max_bytes + 2:
+        raise ImageRejected(f"Görüntü çok büyük (sınır {max_bytes} bayt)", 413)
+    try:
+        data = base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError):
+        raise ImageRejected("Geçersiz base64 görüntü")
+    return decode_image(data, **limits)
@@ -1,19 +1,38 @@
-from fastapi import FastAPI, HTTPException, Depends, Security, File, UploadFile
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Request, Security
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from services.face_recognition_service import FaceRecognitionService
-from database.models import Person, init_database
+from database.models import Person, create_session_factory
 from config.settings import Config
+from api.image_ingestion import ImageRejected, decode_base64_image
 import logging
-import base64
-import io
-from PIL import Image
 
-app = FastAPI(title="Yüz Tanıma API", version="1.0.0")
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Motor, oturum fabrikası ve servis işçi süreci başına bir kez kurulur
+    session_factory = create_session_factory()
+    db = session_factory()
+    try:
+        # İşçiler galeriyi kopyalamak yerine ortak eşlenmiş snapshot'a bağlanır
+        app.state.service = FaceRecognitionService(db, shared_gallery=True)
+    finally:
+        db.close()
+    app.state.session_factory = session_factory
+    logger.info("API servisleri başlatıldı")
+    yield
+    # Bekleyen tanıma logları motor kapanmadan yazılır
+    app.state.service.close()
+    session_factory.kw['bind'].dispose()
+
+
+app = FastAPI(title="Yüz Tanıma API", version="1.0.0", lifespan=lifespan)
+
 # API güvenlik başlığı
 api_key_header = APIKeyHeader(name="X-API-Key")
 
@@ -26,11 +45,13 @@ def get_api_key(api_key_header: str = Security(api_key_header)):
         )
     return api_key_header
 
-def get_service():
-    db = init_database()
+def get_service(request: Request):
+    # İstek başına yalnızca havuzdan kısa ömürlü bir oturum açılır; galeri yeniden yüklenmez.
+    # API anahtarı bu bağımlılıktan önce doğrulanır; geçersiz isteklere oturum açılmaz
+    db = request.app.state.session_factory()
     try:
-        service = FaceRecognitionService(db)
-        yield service
+        with request.app.state.service.session_scope(db) as service:
+            yield service
     finally:
         db.close()
 
@@ -51,95 +72,88 @@ class RecognitionResponse(BaseModel):
     results: List[dict]
     timestamp: datetime
 
+# Uç noktalar bloklayan iş (görüntü çözme, tespit, veritabanı) yaptığından düz `def`
+# olarak tanımlanır; FastAPI bunları iş parçacığı havuzunda çalıştırır ve olay döngüsü serbest kalır
 @app.post("/api/v1/recognize", response_model=RecognitionResponse)
-async def recognize_face(
+def recognize_face(
     request: RecognitionRequest,
-    service: FaceRecognitionService = Depends(get_service),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    service: FaceRecognitionService = Depends(get_service)
 ):
     try:
-        # Base64 görüntüyü decode et
-        image_data = base64.b64decode(request.image)
-        image = Image.open(io.BytesIO(image_data))
+        # Base64 görüntüyü bellekte tek seferde RGB diziye çöz
+        image = decode_base64_image(request.image)
         
         # Görüntüyü işle
         results = service.process_image(
-            image,
+            image.pixels,
             threshold=request.threshold
         )
         
+        # Kutular istemcinin gönderdiği özgün boyuta göre döner
+        locations = image.to_original([result['location'] for result in results])
+        for result, location in zip(results, locations):
+            result['location'] = list(location)
+        
         return {
             "status": "success",
             "results": results,
             "timestamp": datetime.now()
         }
+    except ImageRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Yüz tanıma hatası: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/persons")
-async def add_person(
+def add_person(
     person: PersonCreate,
-    service: FaceRecognitionService = Depends(get_service),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    service: FaceRecognitionService = Depends(get_service)
 ):
     try:
-        # Base64 görüntüyü decode et
-        image_data = base64.b64decode(person.image)
-        image = Image.open(io.BytesIO(image_data))
-        
-        # Geçici dosya oluştur
-        temp_path = f"temp_{datetime.now().timestamp()}.jpg"
-        image.save(temp_path)
+        # Base64 görüntüyü geçici dosya olmadan çöz
+        image = decode_base64_image(person.image)
         
         # Kişiyi ekle
-        service.add_person(temp_path, person.name)
-        
-        # Geçici dosyayı sil
-        import os
-        os.remove(temp_path)
+        service.add_person(image.pixels, person.name)
         
         return {"status": "success", "message": f"{person.name} başarıyla eklendi"}
+    except ImageRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Kişi ekleme hatası: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/v1/persons/{person_id}")
-async def update_person(
+def update_person(
     person_id: int,
     person: PersonUpdate,
-    service: FaceRecognitionService = Depends(get_service),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    service: FaceRecognitionService = Depends(get_service)
 ):
     try:
-        temp_path = None
+        image = None
         if person.image:
-            # Base64 görüntüyü decode et
-            image_data = base64.b64decode(person.image)
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Geçici dosya oluştur
-            temp_path = f"temp_{datetime.now().timestamp()}.jpg"
-            image.save(temp_path)
+            # Base64 görüntüyü geçici dosya olmadan çöz
+            image = decode_base64_image(person.image).pixels
         
         # Kişiyi güncelle
-        service.update_person(person_id, person.name, temp_path)
-        
-        # Geçici dosyayı sil
-        if temp_path:
-            import os
-            os.remove(temp_path)
+        service.update_person(person_id, person.name, image)
         
         return {"status": "success", "message": "Kişi başarıyla güncellendi"}
+    except ImageRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Kişi güncelleme hatası: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/v1/persons/{person_id}")
-async def delete_person(
+def delete_person(
     person_id: int,
-    service: FaceRecognitionService = Depends(get_service),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    service: FaceRecognitionService = Depends(get_service)
 ):
     try:
         service.delete_person(person_id)
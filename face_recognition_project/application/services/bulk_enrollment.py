@@ -0,0 +1,154 @@
+import csv
+import cv2
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from core.interfaces.persistence import IPersonRepository
+from infrastructure.recognition.detection import ScaledFaceDetector
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+@dataclass
+class EnrollmentItem:
+    name: str
+    path: str
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+def discover_images(root: str) -> List[EnrollmentItem]:
+    """`<root>/<kişi>/*.jpg` düzenindeki fotoğrafları kişi adıyla listeler."""
+    items = []
+    for name in sorted(os.listdir(root)):
+        person_dir = os.path.join(root, name)
+        if not os.path.isdir(person_dir):
+            continue
+        for file_name in sorted(os.listdir(person_dir)):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                items.append(EnrollmentItem(name, os.path.join(person_dir, file_name)))
+    return items
+
+
+def read_manifest(path: str) -> List[EnrollmentItem]:
+    """`path,name` sütunlu (isteğe bağlı department, access_level, email, phone) CSV manifestini okur.
+
+    Göreli yollar manifest dosyasının dizinine göre çözülür.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            details = {key: row[key] for key in ('department', 'email', 'phone') if row.get(key)}
+            if row.get('access_level'):
+                details['access_level'] = int(row['access_level'])
+            items.append(EnrollmentItem(row['name'].strip(), os.path.join(base_dir, row['path']), details))
+    return items
+
+
+def _encode_image(path: str, model: str = 'hog', max_side: int = 800) -> Tuple[Optional[bytes], int, Optional[str]]:
+    """Fotoğraftaki en büyük yüzü kodlar; (kodlama, bulunan yüz sayısı, atlama nedeni) döndürür."""
+    try:
+        image = cv2.imread(path)
+        if image is None:
+            return None, 0, 'okunamadı'
+        # Büyük fotoğraflarda tespit küçültülmüş kopyada yapılır, kodlama tam çözünürlükte
+        detector = ScaledFaceDetector(min(1.0, max_side / max(image.shape[:2])), model)
+        locations = detector.detect(image)
+        if not locations:
+            return None, 0, 'yüz bulunamadı'
+        largest = max(locations, key=lambda box: (box[2] - box[0]) * (box[1] - box[3]))
+        return detector.encode(image, [largest])[0].tobytes(), len(locations), None
+    except Exception as e:
+        return None, 0, str(e)
+
+
+class BulkEnrollment:
+    """Fotoğrafları süreç havuzunda çözüp kodlar, kişileri parça başına tek işlemle veritabanına yazar.
+
+    Aynı kişinin ilk geçerli fotoğrafı birincil kodlama, diğerleri ek şablon
+    olur. Veritabanında zaten bulunan isimler atlanır; yarıda kalan bir
+    içe aktarma aynı komutla tekrar çalıştırılabilir. Galeri burada
+    güncellenmez; çağıran taraf iş bitince bir kez yeniden kurar.
+    """
+
+    def __init__(self, person_repository: IPersonRepository, workers: Optional[int] = None,
+                 chunk_size: int = 100, model: str = 'hog', max_side: int = 800):
+        self.person_repository = person_repository
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(chunk_size, 1)
+        self.model = model
+        self.max_side = max_side
+
+    def run(self, items: List[EnrollmentItem],
+            on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Kayıtları işler ve özet raporu döndürür."""
+        try:
+            start = time.perf_counter()
+            # İsim sütunu tekil; pasif kişilerin isimleri de yeniden eklenemez
+            known = set(self.person_repository.get_names())
+            existing = {item.name for item in items if item.name in known}
+            items = sorted((item for item in items if item.name not in known), key=lambda item: item.name)
+            report = {
+                'images': len(items),
+                'faces_found': 0,
+                'skipped': 0,
+                'skipped_reasons': {},
+                'persons': 0,
+                'templates': 0,
+                'multi_face_images': 0,
+                'existing_persons': len(existing)
+            }
+
+            batch: List[Tuple[str, List[bytes], Dict[str, Any]]] = []
+            processed = 0
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                results = pool.map(_encode_image, [item.path for item in items],
+                                   [self.model] * len(items), [self.max_side] * len(items),
+                                   chunksize=max(len(items) // (self.workers * 4), 1))
+                # Sonuçlar sırayla gelir; bir kişinin tüm fotoğrafları bitince kayda hazırdır
+                for name, group in groupby(zip(items, results), key=lambda pair: pair[0].name):
+                    encodings, details = [], {}
+                    for item, (encoding, faces, reason) in group:
+                        processed += 1
+                        if encoding is None:
+                            report['skipped'] += 1
+                            report['skipped_reasons'][reason] = report['skipped_reasons'].get(reason, 0) + 1
+                            logger.debug(f"{item.path} atlandı: {reason}")
+                            continue
+                        report['faces_found'] += 1
+                        if faces > 1:
+                            # Birden çok yüz varsa en büyüğü alındı; kontrol için raporlanır
+                            report['multi_face_images'] += 1
+                        encodings.append(encoding)
+                        details = details or dict(item.details)
+                    if encodings:
+                        batch.append((name, encodings, details))
+                    if len(batch) >= self.chunk_size:
+                        self._flush(batch, report)
+                    if on_progress is not None:
+                        on_progress(processed, len(items))
+                self._flush(batch, report)
+
+            elapsed = time.perf_counter() - start
+            report['elapsed_s'] = elapsed
+            report['images_per_s'] = len(items) / elapsed if elapsed > 0 else 0.0
+            return report
+        except Exception as e:
+            raise RuntimeError(f"Toplu kayıt sırasında hata: {str(e)}")
+
+    def _flush(self, batch: List[Tuple[str, List[bytes], Dict[str, Any]]], report: Dict[str, Any]):
+        if not batch:
+            return
+        self.person_repository.add_batch(batch)
+        report['persons'] += len(batch)
+        report['templates'] += sum(len(encodings) - 1 for _, encodings, _ in batch)
+        logger.info(f"{len(batch)} kişi kaydedildi (toplam {report['persons']})")
+        batch.clear()
@@ -1,29 +1,188 @@
 import cv2
 import numpy as np
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Union
 from core.interfaces.recognition import IFaceRecognitionService
 from core.interfaces.persistence import IPersonRepository, IRecognitionLogRepository
+from infrastructure.recognition.gallery import FaceGallery
+from infrastructure.recognition.matcher import BatchMatcher
+from infrastructure.recognition.ann_index import IVFIndex
+from infrastructure.recognition.quantization import QuantizedGallery
+from infrastructure.recognition.sharded_matcher import ShardedGalleryIndex
+from infrastructure.recognition.partitions import GalleryPartitions, RecognitionFilter
+from infrastructure.persistence.gallery_snapshot import GallerySnapshotStore
+from infrastructure.persistence.log_writer import RecognitionLogWriter
 
 class RecognitionService:
     def __init__(
         self,
         face_recognition: IFaceRecognitionService,
         person_repository: IPersonRepository,
-        log_repository: IRecognitionLogRepository
+        log_repository: IRecognitionLogRepository,
+        tolerance: float = 0.6,
+        snapshot_store: Optional[GallerySnapshotStore] = None,
+        log_writer: Optional[RecognitionLogWriter] = None
     ):
         self.face_recognition = face_recognition
         self.person_repository = person_repository
         self.log_repository = log_repository
-        self.known_faces = self._load_known_faces()
+        self.tolerance = tolerance
+        self.matcher = BatchMatcher(tolerance)
+        self.snapshot_store = snapshot_store
+        self.log_writer = log_writer  # Verilirse loglar tanıma döngüsünü beklemeden toplu yazılır
+        self.gallery = self._load_known_faces()
+        self.index: Optional[Union[IVFIndex, QuantizedGallery, ShardedGalleryIndex]] = None
+        self._index_generation = self.gallery.generation
+        self.access_attributes = self.person_repository.get_access_attributes()
+        self._partitions: Optional[GalleryPartitions] = None
     
-    def _load_known_faces(self) -> Dict[int, Tuple[str, np.ndarray]]:
-        """Veritabanından bilinen yüzleri yükler."""
-        persons = self.person_repository.get_all_active()
-        return {
-            p['id']: (p['name'], np.frombuffer(p['face_encoding']))
-            for p in persons
-        }
+    def _load_known_faces(self) -> FaceGallery:
+        """Bilinen yüzleri güncel snapshot'tan eşler; yoksa veritabanından yükleyip snapshot yazar."""
+        fingerprint = None
+        if self.snapshot_store is not None:
+            fingerprint = self.person_repository.get_fingerprint()
+            gallery = self.snapshot_store.load(fingerprint)
+            if gallery is not None:
+                return gallery
+        
+        persons = self.person_repository.get_active_encodings()
+        templates = self.person_repository.get_active_templates()
+        # Birincil kodlama ve ek şablonlar aynı kişi ID'siyle yan yana saklanır
+        gallery = FaceGallery.from_records(
+            [(p['id'], p['name'], p['face_encoding']) for p in persons] +
+            [(t['person_id'], t['name'], t['face_encoding']) for t in templates]
+        )
+        if self.snapshot_store is not None:
+            self.snapshot_store.write(gallery, fingerprint)
+        return gallery
+    
+    def reload_gallery(self) -> int:
+        """Galeriyi veritabanından arka planda yeniden kurar ve tek atamayla yayınlar.
+        
+        Eşleştirme yapan iş parçacıkları bu sırada eski sürümü kullanmaya devam eder.
+        """
+        try:
+            gallery = self._load_known_faces()
+            self.access_attributes = self.person_repository.get_access_attributes()
+            self._partitions = None
+            self._set_index(None)
+            self.gallery = gallery
+            return len(gallery)
+        except Exception as e:
+            raise RuntimeError(f"Galeri yeniden yüklenirken hata: {str(e)}")
+    
+    def refresh_snapshot(self) -> Optional[int]:
+        """Bellekteki galeriyi güncel tablo özetiyle yeni bir snapshot sürümü olarak yazar."""
+        if self.snapshot_store is None:
+            return None
+        try:
+            return self.snapshot_store.write(self.gallery, self.person_repository.get_fingerprint())
+        except Exception as e:
+            raise RuntimeError(f"Galeri snapshot'ı yazılırken hata: {str(e)}")
+    
+    def _eligible_rows(self, view, eligible: RecognitionFilter):
+        """Filtreye uyan galeri satırları; bölümler galeri sürümü değiştiğinde yeniden hesaplanır."""
+        partitions = self._partitions
+        if partitions is None or partitions.version != view.version:
+            partitions = GalleryPartitions(view, self.access_attributes)
+            self._partitions = partitions
+        return partitions.rows(eligible)
+    
+    def _set_index(self, index):
+        """Etkin arama yapısını değiştirir; süreç havuzu tutan eski yapıyı kapatır."""
+        previous, self.index = self.index, index
+        # İndeks satır konumlarına bağlıdır; sıkıştırma (yeni nesil) onu geçersiz kılar
+        self._index_generation = self.gallery.generation
+        if previous is not None and previous is not index and hasattr(previous, 'close'):
+            previous.close()
+
+    def _extend_index(self):
+        """Galeriye eklenen satırları etkin indekse ekler; mümkün değilse indeksi bırakır.
+
+        Ekleme galerinin sonuna yapıldığı ve silme mezar taşı bıraktığı için
+        mevcut satır konumları değişmez; yeni satırlar IVF'de en yakın
+        listeye, sıkıştırılmış galeride sona, parçalı galeride son parçaya
+        eklenir. Sıkıştırma satırları yeniden numaralandırdıysa ya da
+        parçalı galerinin boş kapasitesi bittiyse indeks yeniden kurulana
+        kadar tam tarama yapılır.
+        """
+        index = self.index
+        if index is None:
+            return
+        view = self.gallery.snapshot()
+        if view.generation != self._index_generation or not index.extend(view):
+            self._set_index(None)
+    
+    def shard_gallery(self, workers: Optional[int] = None) -> ShardedGalleryIndex:
+        """Galeriyi paylaşılan bellekte N işçi sürece bölerek eşleştirmeyi çok çekirdekte yapar."""
+        try:
+            view = self.gallery.snapshot()
+            self._set_index(ShardedGalleryIndex(workers=workers).build(view.matrix, view.sq_norms))
+            return self.index
+        except Exception as e:
+            raise RuntimeError(f"Galeri parçalanırken hata: {str(e)}")
+    
+    def build_index(self, nlist: int = 1024, nprobe: int = 16, path: Optional[str] = None) -> IVFIndex:
+        """Galeri için yaklaşık en yakın komşu (IVF) indeksi oluşturur ve isteğe bağlı kaydeder."""
+        try:
+            view = self.gallery.snapshot()
+            self._set_index(IVFIndex(nlist=nlist, nprobe=nprobe).build(view.matrix, version=view.version))
+            if path:
+                self.index.save(path)
+            return self.index
+        except Exception as e:
+            raise RuntimeError(f"İndeks oluşturulurken hata: {str(e)}")
+    
+    def load_index(self, path: str) -> IVFIndex:
+        """Diske kaydedilmiş IVF indeksini yükler."""
+        try:
+            index = IVFIndex.load(path)
+            if len(index) != self.gallery.row_count:
+                raise ValueError("İndeks mevcut galeriyle uyumsuz")
+            self._set_index(index)
+            return index
+        except Exception as e:
+            raise RuntimeError(f"İndeks yüklenirken hata: {str(e)}")
+    
+    def quantize_gallery(self, mode: str = 'int8', shortlist: int = 32,
+                         path: Optional[str] = None) -> QuantizedGallery:
+        """Eşleştirmeyi sıkıştırılmış (float16/int8) kodlar ve tam hassasiyetli yeniden sıralama ile yapar.
+
+        Yeniden sıralama diskten eşlenmiş kodlamalardan okunur: galeri zaten
+        eşlenmişse o kullanılır, değilse snapshot deposuna ya da `path`
+        dosyasına yazılıp eşlenir. Bellekteki float32 galeri bırakılır.
+        """
+        try:
+            gallery = self._mapped_gallery(path)
+            index = QuantizedGallery.from_gallery(gallery, mode=mode, shortlist=shortlist)
+            self._partitions = None
+            self.gallery = gallery
+            self._set_index(index)
+            return index
+        except Exception as e:
+            raise RuntimeError(f"Galeri sıkıştırılırken hata: {str(e)}")
+
+    def _mapped_gallery(self, path: Optional[str] = None) -> FaceGallery:
+        """Kodlamaları diskten eşlenmiş (np.memmap) bir galeri döndürür."""
+        view = self.gallery.snapshot()
+        if isinstance(view.matrix, np.memmap):
+            return self.gallery
+        if self.snapshot_store is not None:
+            self.snapshot_store.write(self.gallery, self.person_repository.get_fingerprint())
+            gallery = self.snapshot_store.load()
+            if gallery is None:
+                raise RuntimeError("Galeri snapshot'ı eşlenemedi")
+            return gallery
+        if path is None:
+            raise ValueError("Tam hassasiyetli kodlamalar için snapshot deposu ya da dosya yolu gerekli")
+        # np.save uzantı eklemesin diye dosya nesnesine yazılır
+        with open(path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(view.matrix))
+        gallery = FaceGallery.from_arrays(np.load(path, mmap_mode='r'), view.sq_norms.copy(),
+                                          view.ids.copy(), view.names)
+        # Sıkıştırma eşlenmiş tabanı belleğe kopyalardı; yeni dosya için yeniden sıkıştırılır
+        gallery.auto_compact = False
+        return gallery
     
     def add_person(self, image_path: str, name: str, details: Dict[str, Any]) -> int:
         """Yeni bir kişi ekler."""
@@ -46,61 +205,89 @@ class RecognitionService:
             if face_encoding is None:
                 raise ValueError("Yüz kodlanamadı")
             
-            # Kişiyi veritabanına ekle
-            details['photo_path'] = image_path
+            # Kişiyi veritabanına ekle (fotoğraf yolu için sütun yok; saklanmaz)
             person_id = self.person_repository.add(name, face_encoding.tobytes(), details)
+            self.access_attributes[person_id] = (details.get('department'), details.get('access_level', 1))
             
             # Bilinen yüzleri güncelle
-            self.known_faces[person_id] = (name, face_encoding)
+            self.gallery.add(person_id, name, face_encoding)
+            self._extend_index()
             
             return person_id
             
         except Exception as e:
             raise RuntimeError(f"Kişi eklenirken hata: {str(e)}")
     
-    def recognize_face(self, image: np.ndarray) -> List[Dict[str, Any]]:
-        """Görüntüdeki yüzleri tanır."""
+    def add_template(self, person_id: int, image_path: str) -> int:
+        """Kayıtlı kişiye farklı bir fotoğraftan ek yüz şablonu ekler."""
+        try:
+            person = self.person_repository.get_by_id(person_id)
+            if not person or not person['is_active']:
+                raise ValueError(f"ID {person_id} olan aktif kişi bulunamadı")
+            
+            image = cv2.imread(image_path)
+            if image is None:
+                raise ValueError("Görüntü yüklenemedi")
+            image = self.face_recognition.preprocess_image(image)
+            face_locations = self.face_recognition.detect_faces(image)
+            if not face_locations:
+                raise ValueError("Görüntüde yüz bulunamadı")
+            face_encoding = self.face_recognition.encode_face(image, face_locations[0])
+            if face_encoding is None:
+                raise ValueError("Yüz kodlanamadı")
+            
+            template_id = self.person_repository.add_template(person_id, face_encoding.tobytes())
+            self.gallery.add_template(person_id, face_encoding, person['name'])
+            self._extend_index()
+            return template_id
+        except Exception as e:
+            raise RuntimeError(f"Şablon eklenirken hata: {str(e)}")
+    
+    def recognize_face(self, image: np.ndarray, eligible: Optional[RecognitionFilter] = None) -> List[Dict[str, Any]]:
+        """Görüntüdeki yüzleri tanır; `eligible` verilirse yalnızca uygun kişiler taranır."""
         try:
             # Görüntüyü hazırla
             image = self.face_recognition.preprocess_image(image)
             
-            # Yüzleri tespit et
+            # Yüzleri tespit et ve kodla
             face_locations = self.face_recognition.detect_faces(image)
-            results = []
-            
+            located, encodings = [], []
             for face_location in face_locations:
-                # Yüzü kodla
                 face_encoding = self.face_recognition.encode_face(image, face_location)
-                if face_encoding is None:
-                    continue
-                
-                # Bilinen yüzlerle karşılaştır
-                known_encodings = [enc for _, enc in self.known_faces.values()]
-                matches = self.face_recognition.compare_faces(face_encoding, known_encodings)
-                
-                if True in matches:
-                    # Eşleşen yüzü bul
-                    match_index = matches.index(True)
-                    person_id = list(self.known_faces.keys())[match_index]
-                    name = self.known_faces[person_id][0]
-                    
+                if face_encoding is not None:
+                    located.append(face_location)
+                    encodings.append(face_encoding)
+            
+            # Tüm yüzleri galerinin kilitsiz alınan tek bir sürümüyle eşleştir
+            view = self.gallery.snapshot()
+            rows = None
+            if eligible is not None and not eligible.is_empty:
+                rows = self._eligible_rows(view, eligible)
+            matches = self.matcher.match(view, encodings, index=self.index, rows=rows)
+            results = []
+            
+            for face_location, match in zip(located, matches):
+                if match.is_match:
                     # Güven skorunu hesapla
-                    confidence = 1 - self.face_recognition.get_face_distance(
-                        face_encoding,
-                        known_encodings[match_index]
-                    )
+                    confidence = 1 - match.distance
                     
                     # Logu kaydet
-                    self.log_repository.add_log(
-                        person_id=person_id,
-                        confidence_score=float(confidence),
-                        timestamp=datetime.now()
-                    )
+                    if self.log_writer is not None:
+                        self.log_writer.submit(match.person_id, float(confidence))
+                    else:
+                        self.log_repository.add_log(
+                            person_id=match.person_id,
+                            confidence_score=float(confidence),
+                            timestamp=datetime.now()
+                        )
                     
                     results.append({
-                        'person_id': person_id,
-                        'name': name,
+                        'person_id': match.person_id,
+                        'name': match.name,
                         'confidence': confidence,
+                        'distance': match.distance,
+                        'margin': match.margin,
+                        'score': match.score,
                         'location': face_location
                     })
                 else:
@@ -108,6 +295,9 @@ class RecognitionService:
                         'person_id': None,
                         'name': 'Bilinmeyen',
                         'confidence': 0.0,
+                        'distance': match.distance,
+                        'margin': match.margin,
+                        'score': match.score,
                         'location': face_location
                     })
             
@@ -120,14 +310,22 @@ class RecognitionService:
         """Kişi bilgilerini günceller."""
         try:
             success = self.person_repository.update(person_id, details)
+            if success and ('department' in details or 'access_level' in details):
+                department, access_level = self.access_attributes.get(person_id, (None, 1))
+                self.access_attributes[person_id] = (
+                    details.get('department', department),
+                    details.get('access_level', access_level)
+                )
+                # Galeri sürümü değişmediği için bölümleri elle geçersiz kıl
+                self._partitions = None
             if success and 'face_encoding' in details:
                 # Bilinen yüzleri güncelle
                 person = self.person_repository.get_by_id(person_id)
-                if person:
-                    self.known_faces[person_id] = (
-                        person['name'],
-                        np.frombuffer(person['face_encoding'])
-                    )
+                if person and person_id in self.gallery:
+                    self.gallery.replace(person_id, person['face_encoding'], person['name'])
+                elif person and person['is_active']:
+                    self.gallery.add(person_id, person['name'], person['face_encoding'])
+                self._extend_index()
             return success
         except Exception as e:
             raise RuntimeError(f"Kişi güncellenirken hata: {str(e)}")
@@ -136,8 +334,11 @@ class RecognitionService:
         """Kişiyi pasif duruma getirir."""
         try:
             success = self.person_repository.deactivate(person_id)
-            if success and person_id in self.known_faces:
-                del self.known_faces[person_id]
+            if success:
+                self.access_attributes.pop(person_id, None)
+                self.gallery.remove(person_id)
+                # Mezar taşı satır konumlarını korur; yalnızca sıkıştırma indeksi geçersiz kılar
+                self._extend_index()
             return success
         except Exception as e:
             raise RuntimeError(f"Kişi deaktive edilirken hata: {str(e)}")
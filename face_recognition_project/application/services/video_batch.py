@@ -0,0 +1,212 @@
+import cv2
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from infrastructure.recognition.detection import ScaledFaceDetector
+from infrastructure.recognition.gallery import FaceGallery
+from infrastructure.recognition.matcher import BatchMatcher
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VideoSegment:
+    index: int
+    start_frame: int
+    end_frame: int
+
+
+def plan_segments(frame_count: int, fps: float, segment_seconds: float) -> List[VideoSegment]:
+    """Videoyu yaklaşık `segment_seconds` uzunluğunda, örtüşmeyen kare aralıklarına böler."""
+    length = max(int(round(fps * segment_seconds)), 1)
+    return [VideoSegment(index, start, min(start + length, frame_count))
+            for index, start in enumerate(range(0, frame_count, length))]
+
+
+class VideoCheckpoint:
+    """Tamamlanan segmentleri ve JSONL çıktısının o andaki boyutunu atomik olarak kaydeder.
+
+    Devam ederken çıktı son kaydedilen boyuta kesilir; böylece yarım kalan
+    segmentin satırları tekrarlanmaz.
+    """
+
+    def __init__(self, path: str, settings: Dict[str, Any]):
+        self.path = path
+        self.settings = settings
+        self.completed: List[int] = []
+        self.offset = 0
+
+    def load(self) -> bool:
+        """Aynı ayarlarla yazılmış bir kontrol noktası varsa yükler."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('settings') != self.settings:
+            raise ValueError("Kontrol noktası farklı bir video veya ayarlarla oluşturulmuş")
+        self.completed = state['completed']
+        self.offset = state['offset']
+        return True
+
+    def save(self, segment: int, offset: int):
+        self.completed.append(segment)
+        self.offset = offset
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'settings': self.settings, 'completed': self.completed, 'offset': offset}, f)
+        os.replace(tmp_path, self.path)
+
+
+def gallery_fingerprint(gallery_arrays) -> str:
+    """Canlı galeri dizilerinin içerik özeti; kodlama, ID ya da isim değişince değişir."""
+    matrix, _, ids, names = gallery_arrays
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(matrix).tobytes())
+    digest.update(np.ascontiguousarray(ids).tobytes())
+    digest.update(json.dumps(names, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+# İşçi süreç durumu (_init_worker ile bir kez kurulur)
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(gallery_arrays, tolerance: float, detection_scale: float, model: str):
+    matrix, sq_norms, ids, names = gallery_arrays
+    _worker['gallery'] = FaceGallery.from_arrays(matrix, sq_norms, ids, names)
+    _worker['matcher'] = BatchMatcher(tolerance)
+    _worker['detector'] = ScaledFaceDetector(detection_scale, model)
+
+
+def _recognize_segment(path: str, segment: VideoSegment, fps: float, sample_every: int) -> Tuple[int, List[Dict[str, Any]], int]:
+    """Bir segmenti çözüp her `sample_every` karede bir tanır; (segment, sonuçlar, analiz edilen kare) döndürür."""
+    capture = cv2.VideoCapture(path)
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, segment.start_frame)
+        detector, matcher = _worker['detector'], _worker['matcher']
+        view = _worker['gallery'].snapshot()
+        results, analyzed = [], 0
+        for frame_index in range(segment.start_frame, segment.end_frame):
+            if (frame_index - segment.start_frame) % sample_every:
+                # Atlanan kareler yalnızca çözülür, renk dönüşümü yapılmaz
+                if not capture.grab():
+                    break
+                continue
+            ret, frame = capture.read()
+            if not ret:
+                break
+            analyzed += 1
+            locations = detector.detect(frame)
+            if not locations:
+                continue
+            matches = matcher.match(view, detector.encode(frame, locations))
+            for (top, right, bottom, left), match in zip(locations, matches):
+                results.append({
+                    'timestamp': round(frame_index / fps, 3),
+                    'frame': frame_index,
+                    'box': [top, right, bottom, left],
+                    'person_id': match.person_id,
+                    'name': match.name if match.is_match else None,
+                    'distance': round(float(match.distance), 4)
+                })
+        return segment.index, results, analyzed
+    finally:
+        capture.release()
+
+
+class VideoBatchRecognizer:
+    """Kayıtlı bir videoyu segmentlere bölüp işçi süreçlerde paralel tanır ve sonuçları JSONL olarak yazar.
+
+    Galeri `RecognitionService`'in güncel görünümünden alınır ve her işçiye
+    bir kez gönderilir. Her segment bittiğinde satırları çıktıya eklenir ve
+    kontrol noktası güncellenir; yarıda kesilen bir iş aynı komutla devam
+    eder. Segmentler tamamlanma sırasıyla yazılır; her satırda zaman damgası
+    bulunur.
+    """
+
+    def __init__(self, recognition_service, workers: Optional[int] = None, segment_seconds: float = 60.0,
+                 sample_every: int = 5, detection_scale: float = 0.25, model: str = 'hog'):
+        self.recognition_service = recognition_service
+        self.workers = workers or os.cpu_count() or 1
+        self.segment_seconds = segment_seconds
+        self.sample_every = max(sample_every, 1)
+        self.detection_scale = detection_scale
+        self.model = model
+
+    def run(self, video_path: str, output_path: str, checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+        """Videoyu işler ve verim raporunu döndürür."""
+        try:
+            capture = cv2.VideoCapture(video_path)
+            if not capture.isOpened():
+                raise ValueError(f"Video açılamadı: {video_path}")
+            fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+            frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            capture.release()
+
+            segments = plan_segments(frame_count, fps, self.segment_seconds)
+            gallery_arrays = self.recognition_service.gallery.snapshot().live_arrays()
+            # Sonuçları etkileyen her ayar değişirse eski kontrol noktası reddedilir
+            checkpoint = VideoCheckpoint(checkpoint_path or f"{output_path}.checkpoint.json", {
+                'video': os.path.abspath(video_path),
+                'frame_count': frame_count,
+                'segment_seconds': self.segment_seconds,
+                'sample_every': self.sample_every,
+                'tolerance': self.recognition_service.tolerance,
+                'detection_scale': self.detection_scale,
+                'model': self.model,
+                'gallery': gallery_fingerprint(gallery_arrays)
+            })
+            resumed = checkpoint.load()
+            if resumed and not os.path.exists(output_path):
+                raise ValueError(f"Kontrol noktasına ait çıktı dosyası bulunamadı: {output_path}")
+            completed = set(checkpoint.completed)
+            pending = [segment for segment in segments if segment.index not in completed]
+            if resumed:
+                logger.info(f"Kontrol noktasından devam: {len(checkpoint.completed)}/{len(segments)} segment tamam")
+
+            start = time.perf_counter()
+            analyzed = faces = 0
+            with open(output_path, 'r+b' if resumed else 'wb') as output, ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(gallery_arrays, self.recognition_service.tolerance, self.detection_scale, self.model)
+            ) as pool:
+                # Son kontrol noktasından sonra yazılmış yarım satırları at
+                output.seek(checkpoint.offset)
+                output.truncate()
+                futures = [pool.submit(_recognize_segment, video_path, segment, fps, self.sample_every)
+                           for segment in pending]
+                for future in as_completed(futures):
+                    index, results, frames = future.result()
+                    output.write(''.join(json.dumps(result, ensure_ascii=False) + '\n' for result in results).encode('utf-8'))
+                    output.flush()
+                    os.fsync(output.fileno())
+                    checkpoint.save(index, output.tell())
+                    analyzed += frames
+                    faces += len(results)
+                    logger.info(f"Segment {index + 1}/{len(segments)} tamamlandı ({len(checkpoint.completed)} bitti)")
+
+            elapsed = time.perf_counter() - start
+            processed_frames = sum(segment.end_frame - segment.start_frame for segment in pending)
+            video_seconds = processed_frames / fps
+            return {
+                'segments': len(pending),
+                'skipped_segments': len(segments) - len(pending),
+                'frames': processed_frames,
+                'analyzed_frames': analyzed,
+                'faces': faces,
+                'elapsed_s': elapsed,
+                'video_s': video_seconds,
+                'frames_per_s': processed_frames / elapsed if elapsed > 0 else 0.0,
+                'realtime_factor': video_seconds / elapsed if elapsed > 0 else 0.0
+            }
+        except Exception as e:
+            raise RuntimeError(f"Video toplu tanıma sırasında hata: {str(e)}")
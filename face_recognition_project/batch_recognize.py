@@ -0,0 +1,68 @@
+import argparse
+import logging
+import os
+
+# İşçi süreçler çekirdek başına tek BLAS iş parçacığı kullansın (spawn ortamı devralır)
+for _var in ('OPENBLAS_NUM_THREADS', 'OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_var, '1')
+
+from application.services.recognition_service import RecognitionService
+from application.services.video_batch import VideoBatchRecognizer
+from config.settings import Config
+from database.models import init_database
+from infrastructure.persistence.gallery_snapshot import GallerySnapshotStore
+from infrastructure.persistence.repositories import PersonRepository, RecognitionLogRepository
+from infrastructure.recognition.face_recognition_service import FaceRecognitionService
+
+# Logging ayarları
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıtlı videoda arayüzsüz, çok süreçli toplu yüz tanıma")
+    parser.add_argument('video', help="İşlenecek video dosyası")
+    parser.add_argument('--output', help="JSONL çıktı dosyası (varsayılan: <video>.faces.jsonl)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--segment-seconds', type=float, default=60.0, help="İşçi başına segment uzunluğu")
+    parser.add_argument('--sample-every', type=int, default=5, help="Her N karede bir tanıma yap")
+    parser.add_argument('--scale', type=float, default=Config.DETECTION_SCALE, help="Tespit ölçeği")
+    parser.add_argument('--tolerance', type=float, default=Config.FACE_RECOGNITION_TOLERANCE)
+    args = parser.parse_args()
+
+    session = init_database()
+    try:
+        service = RecognitionService(
+            FaceRecognitionService(),
+            PersonRepository(session),
+            RecognitionLogRepository(session),
+            tolerance=args.tolerance,
+            snapshot_store=GallerySnapshotStore(Config.GALLERY_SNAPSHOT_DIR)
+        )
+    finally:
+        session.close()
+    logger.info(f"Galeri yüklendi: {service.gallery.identity_count} kişi")
+
+    recognizer = VideoBatchRecognizer(
+        service,
+        workers=args.workers,
+        segment_seconds=args.segment_seconds,
+        sample_every=args.sample_every,
+        detection_scale=args.scale,
+        model=Config.FACE_DETECTION_MODEL
+    )
+    report = recognizer.run(args.video, args.output or f"{args.video}.faces.jsonl")
+
+    print(f"Segment        : {report['segments']} işlendi, {report['skipped_segments']} kontrol noktasından atlandı")
+    print(f"Kare           : {report['frames']} çözüldü, {report['analyzed_frames']} analiz edildi")
+    print(f"Yüz            : {report['faces']}")
+    print(f"Süre           : {report['elapsed_s']:.1f} sn ({report['video_s']:.1f} sn video)")
+    print(f"Verim          : {report['frames_per_s']:.1f} kare/sn, gerçek zamanın {report['realtime_factor']:.1f} katı")
+
+
+if __name__ == '__main__':
+    main()
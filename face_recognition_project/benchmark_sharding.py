@@ -0,0 +1,63 @@
+import argparse
+import logging
+import os
+import time
+
+# İşçi süreçler çekirdek başına tek BLAS iş parçacığı kullansın (spawn ortamı devralır)
+for _var in ('OPENBLAS_NUM_THREADS', 'OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_var, '1')
+
+import numpy as np
+from infrastructure.recognition.sharded_matcher import ShardedGalleryIndex
+
+# Logging ayarları
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def run_benchmark(size, worker_counts, queries, batch, rounds, seed=0):
+    """Her işçi sayısı için parçalı aramanın saniyedeki sorgu sayısını ölçer."""
+    rng = np.random.default_rng(seed)
+    logger.info(f"{size} şablonluk sentetik galeri oluşturuluyor")
+    matrix = rng.standard_normal((size, 128), dtype=np.float32)
+    probe = rng.standard_normal((queries, 128), dtype=np.float32)
+
+    report = []
+    for workers in worker_counts:
+        with ShardedGalleryIndex(workers=workers).build(matrix) as index:
+            index.search(probe[:batch], k=2)  # İşçileri ısıt
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for offset in range(0, queries, batch):
+                    index.search(probe[offset:offset + batch], k=2)
+            elapsed = time.perf_counter() - start
+        throughput = rounds * queries / elapsed
+        report.append((workers, throughput))
+        logger.info(f"{workers} işçi: {throughput:.1f} sorgu/sn")
+
+    baseline = report[0][1]
+    print(f"{'işçi':>6} {'sorgu/sn':>12} {'hızlanma':>10}")
+    for workers, throughput in report:
+        print(f"{workers:>6} {throughput:>12.1f} {throughput / baseline:>9.2f}x")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parçalı galeri aramasının çekirdek sayısıyla ölçeklenmesi")
+    parser.add_argument('--size', type=int, default=2000000, help="Galerideki şablon sayısı")
+    parser.add_argument('--workers', default='1,2,4,8,16,32', help="Virgülle ayrılmış işçi sayıları")
+    parser.add_argument('--queries', type=int, default=256, help="Tur başına sorgu sayısı")
+    parser.add_argument('--batch', type=int, default=16, help="Tek aramadaki yüz sayısı (kare başına)")
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    worker_counts = [int(w) for w in args.workers.split(',') if int(w) <= (os.cpu_count() or 1)]
+    run_benchmark(args.size, worker_counts or [1], args.queries, args.batch, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
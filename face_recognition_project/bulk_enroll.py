@@ -0,0 +1,72 @@
+import argparse
+import logging
+import os
+
+# İşçi süreçler çekirdek başına tek BLAS iş parçacığı kullansın (spawn ortamı devralır)
+for _var in ('OPENBLAS_NUM_THREADS', 'OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_var, '1')
+
+from application.services.bulk_enrollment import BulkEnrollment, discover_images, read_manifest
+from application.services.recognition_service import RecognitionService
+from config.settings import Config
+from database.models import init_database
+from infrastructure.persistence.gallery_snapshot import GallerySnapshotStore
+from infrastructure.persistence.repositories import PersonRepository, RecognitionLogRepository
+from infrastructure.recognition.face_recognition_service import FaceRecognitionService
+
+# Logging ayarları
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dizin ağacından veya CSV manifestinden paralel toplu kişi kaydı")
+    parser.add_argument('source', nargs='?', default=Config.KNOWN_FACES_DIR,
+                        help="known_faces/<kişi>/*.jpg düzeninde dizin ya da path,name sütunlu CSV")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=100, help="Tek işlemde yazılacak kişi sayısı")
+    parser.add_argument('--max-side', type=int, default=800, help="Tespit için en uzun kenar (piksel)")
+    args = parser.parse_args()
+
+    items = read_manifest(args.source) if args.source.lower().endswith('.csv') else discover_images(args.source)
+    logger.info(f"{len(items)} fotoğraf bulundu")
+
+    def progress(done, total):
+        if done % 100 == 0 or done == total:
+            logger.info(f"{done}/{total} fotoğraf işlendi")
+
+    session = init_database()
+    try:
+        person_repository = PersonRepository(session)
+        report = BulkEnrollment(
+            person_repository,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            model=Config.FACE_DETECTION_MODEL,
+            max_side=args.max_side
+        ).run(items, on_progress=progress)
+
+        # Galeri tüm kayıtlardan sonra bir kez kurulur ve snapshot olarak yazılır
+        service = RecognitionService(
+            FaceRecognitionService(),
+            person_repository,
+            RecognitionLogRepository(session),
+            snapshot_store=GallerySnapshotStore(Config.GALLERY_SNAPSHOT_DIR)
+        )
+    finally:
+        session.close()
+
+    print(f"Fotoğraf       : {report['images']} işlendi ({report['existing_persons']} kayıtlı kişi atlandı)")
+    print(f"Yüz            : {report['faces_found']} bulundu, {report['skipped']} atlandı {report['skipped_reasons']}")
+    print(f"Çoklu yüz      : {report['multi_face_images']} fotoğrafta en büyük yüz alındı")
+    print(f"Kayıt          : {report['persons']} kişi, {report['templates']} ek şablon")
+    print(f"Galeri         : {service.gallery.identity_count} kişi")
+    print(f"Verim          : {report['images_per_s']:.1f} fotoğraf/sn ({report['elapsed_s']:.1f} sn)")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,16 @@ import logging
 import yaml
 import os
 import secrets
-from typing import Optional
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
 class Config:
     # API Güvenlik
     API_KEY: str = os.getenv('FACE_RECOGNITION_API_KEY', secrets.token_urlsafe(32))
+    API_MAX_IMAGE_BYTES: int = int(os.getenv('API_MAX_IMAGE_BYTES', str(10 * 1024 * 1024)))
+    API_MAX_IMAGE_PIXELS: int = int(os.getenv('API_MAX_IMAGE_PIXELS', str(40_000_000)))  # Çözmeden önce başlıktan
+    API_IMAGE_MAX_SIDE: int = int(os.getenv('API_IMAGE_MAX_SIDE', '1600'))  # Çözerken küçültülür (0 = kapalı)
     
     # Veritabanı
     DATABASE_URL: str = os.getenv('FACE_RECOGNITION_DB_URL', 'sqlite:///face_recognition.db')
@@ -16,15 +19,32 @@ class Config:
     # Model Ayarları
     FACE_DETECTION_MODEL: str = os.getenv('FACE_DETECTION_MODEL', 'hog')  # 'hog' veya 'cnn'
     FACE_RECOGNITION_TOLERANCE: float = float(os.getenv('FACE_RECOGNITION_TOLERANCE', '0.6'))
+    DETECTION_SCALE: float = float(os.getenv('DETECTION_SCALE', '0.25'))  # Tespit küçültülmüş karede yapılır
     
     # Kamera Ayarları
     CAMERA_INDEX: int = int(os.getenv('CAMERA_INDEX', '0'))
-    FRAME_INTERVAL: float = float(os.getenv('FRAME_INTERVAL', '0.5'))  # saniye
+    # Virgülle ayrılmış cihaz indeksleri, video dosyaları veya URL'ler
+    CAMERA_SOURCES: List[str] = [
+        source.strip() for source in os.getenv('CAMERA_SOURCES', str(CAMERA_INDEX)).split(',') if source.strip()
+    ]
+    FRAME_INTERVAL: float = float(os.getenv('FRAME_INTERVAL', '0.5'))  # saniye (başlangıç değeri, uyarlanır)
+    TARGET_CPU_UTILIZATION: float = float(os.getenv('TARGET_CPU_UTILIZATION', '0.6'))  # Akış başına işleme süresi / duvar saati
+    MAX_PIPELINE_LATENCY: float = float(os.getenv('MAX_PIPELINE_LATENCY', '0.5'))  # saniye
+    LOG_BATCH_SIZE: int = int(os.getenv('LOG_BATCH_SIZE', '200'))  # Tek insert'teki en fazla tanıma logu
+    LOG_FLUSH_INTERVAL: float = float(os.getenv('LOG_FLUSH_INTERVAL', '0.5'))  # saniye
+    LOG_QUEUE_SIZE: int = int(os.getenv('LOG_QUEUE_SIZE', '10000'))  # Doluysa yeni loglar atılır
+    PRESENCE_GAP: float = float(os.getenv('PRESENCE_GAP', '10'))  # saniye; daha uzun aradan sonra yeni oturum
+    PRESENCE_MAX_DURATION: float = float(os.getenv('PRESENCE_MAX_DURATION', '900'))  # saniye; uzun oturumlar bölünür
+    CAMERA_CONFIG_FILE: str = os.getenv(
+        'CAMERA_CONFIG_FILE',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.yaml')
+    )  # Kamera başına ilgi alanları ('cameras' bölümü)
     
     # Dosya Yolu Ayarları
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     MODELS_DIR: str = os.path.join(BASE_DIR, 'models')
     KNOWN_FACES_DIR: str = os.path.join(BASE_DIR, 'known_faces')
+    GALLERY_SNAPSHOT_DIR: str = os.getenv('GALLERY_SNAPSHOT_DIR', os.path.join(BASE_DIR, 'gallery_snapshot'))
     
     # Log Ayarları
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
@@ -158,6 +178,19 @@ class Config:
         os.makedirs(cls.MODELS_DIR, exist_ok=True)
         os.makedirs(cls.KNOWN_FACES_DIR, exist_ok=True)
     
+    @classmethod
+    def get_camera_rois(cls) -> Dict[str, List[List[List[float]]]]:
+        """Kaynak -> ilgi alanı çokgenleri eşlemesini yapılandırma dosyasının 'cameras' bölümünden okur"""
+        try:
+            if not os.path.exists(cls.CAMERA_CONFIG_FILE):
+                return {}
+            with open(cls.CAMERA_CONFIG_FILE, 'r', encoding='utf-8') as f:
+                cameras = (yaml.safe_load(f) or {}).get('cameras') or {}
+            return {str(source): camera['roi'] for source, camera in cameras.items() if camera and camera.get('roi')}
+        except Exception as e:
+            logger.error(f"Kamera ilgi alanları okunurken hata: {str(e)}")
+            return {}
+    
     @classmethod
     def get_model_path(cls, model_name: str) -> Optional[str]:
         """Model dosyasının tam yolunu döndür"""
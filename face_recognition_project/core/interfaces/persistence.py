@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 
 class IPersonRepository(ABC):
@@ -38,6 +38,76 @@ class IPersonRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def get_active_encodings(self) -> List[Dict[str, Any]]:
+        """Aktif kişilerin yalnızca ID, isim ve birincil kodlamalarını getirir.
+        
+        Returns:
+            id, name ve face_encoding içeren kayıtlar listesi
+        """
+        pass
+    
+    @abstractmethod
+    def get_names(self) -> List[str]:
+        """Aktif ya da pasif tüm kayıtlı kişi isimlerini getirir.
+        
+        Returns:
+            İsim listesi (isim sütunu tekil olduğu için pasif kişiler de dahildir)
+        """
+        pass
+    
+    @abstractmethod
+    def get_access_attributes(self) -> Dict[int, Tuple[Optional[str], int]]:
+        """Aktif kişilerin departman ve erişim seviyelerini getirir.
+        
+        Returns:
+            Kişi ID'si -> (departman, erişim seviyesi) eşlemesi
+        """
+        pass
+    
+    @abstractmethod
+    def get_fingerprint(self) -> Dict[str, Any]:
+        """Kişi tablosunun değişip değişmediğini anlamaya yarayan özeti getirir.
+        
+        Returns:
+            Aktif kişi sayısı, en büyük ID, son güncelleme zamanı ve şablon özeti
+        """
+        pass
+    
+    @abstractmethod
+    def add_template(self, person_id: int, face_encoding: bytes) -> int:
+        """Kişiye ek bir yüz şablonu ekler.
+        
+        Args:
+            person_id: Kişi ID'si
+            face_encoding: Yüz kodlaması
+            
+        Returns:
+            Eklenen şablonun ID'si
+        """
+        pass
+    
+    @abstractmethod
+    def add_batch(self, people: List[Tuple[str, List[bytes], Dict[str, Any]]]) -> List[int]:
+        """Birden çok kişiyi ve ek şablonlarını tek bir işlemde ekler.
+        
+        Args:
+            people: (isim, kodlamalar, detaylar) listesi; ilk kodlama birincil, diğerleri şablon
+            
+        Returns:
+            Eklenen kişilerin ID'leri
+        """
+        pass
+    
+    @abstractmethod
+    def get_active_templates(self) -> List[Dict[str, Any]]:
+        """Aktif kişilerin ek yüz şablonlarını getirir.
+        
+        Returns:
+            person_id, name ve face_encoding içeren şablon listesi
+        """
+        pass
+    
     @abstractmethod
     def update(self, person_id: int, details: Dict[str, Any]) -> bool:
         """Kişi bilgilerini günceller.
@@ -78,6 +148,43 @@ class IRecognitionLogRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def add_logs(self, logs: List[Tuple[Optional[int], float, datetime]]) -> int:
+        """Birden çok tanıma kaydını tek bir çok satırlı insert ile ekler.
+        
+        Args:
+            logs: (kişi ID'si, güven skoru, zaman) listesi
+            
+        Returns:
+            Eklenen kayıt sayısı
+        """
+        pass
+    
+    @abstractmethod
+    def add_presence_sessions(self, sessions: List[Tuple[int, str, datetime, datetime, Optional[float], int]]) -> int:
+        """Kapanan varlık oturumlarını tek bir çok satırlı insert ile ekler.
+        
+        Args:
+            sessions: (kişi ID'si, kamera, ilk görülme, son görülme, en iyi mesafe, kare sayısı) listesi
+            
+        Returns:
+            Eklenen oturum sayısı
+        """
+        pass
+    
+    @abstractmethod
+    def get_presence_sessions(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """Belirli tarih aralığında başlayan varlık oturumlarını getirir.
+        
+        Args:
+            start_date: Başlangıç tarihi
+            end_date: Bitiş tarihi
+            
+        Returns:
+            Oturum listesi
+        """
+        pass
+    
     @abstractmethod
     def get_logs(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """Belirli tarih aralığındaki kayıtları getirir.
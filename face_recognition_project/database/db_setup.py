@@ -1,4 +1,4 @@
-from models import Base
+from models import Base, migrate_schema
 from sqlalchemy import create_engine
 import os
 
@@ -12,6 +12,7 @@ engine = create_engine(DATABASE_URL)
 
 def init_db():
     Base.metadata.create_all(engine)
+    migrate_schema(engine)
 
 if __name__ == "__main__":
     init_db()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, LargeBinary, ForeignKey, create_engine
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, LargeBinary, ForeignKey, create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from sqlalchemy.pool import QueuePool
@@ -6,6 +6,8 @@ import os
 
 Base = declarative_base()
 
+DEFAULT_ACCESS_LEVEL = 1
+
 
 class Person(Base):
     __tablename__ = 'persons'
@@ -14,15 +16,33 @@ class Person(Base):
     name = Column(String, unique=True, nullable=False)
     face_encoding = Column(LargeBinary, nullable=False)
     is_active = Column(Boolean, default=True)
+    department = Column(String, nullable=True, index=True)
+    access_level = Column(Integer, default=DEFAULT_ACCESS_LEVEL, index=True)
     created_at = Column(DateTime, nullable=False)
     updated_at = Column(DateTime, nullable=True)
     
     recognition_logs = relationship("FaceRecognitionLog", back_populates="person")
+    templates = relationship("FaceTemplate", back_populates="person", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Person(name='{self.name}', created_at='{self.created_at}')>"
 
 
+class FaceTemplate(Base):
+    """Kişinin birincil kodlamasına ek yüz şablonları (farklı açı, ışık, gözlük vb.)."""
+    __tablename__ = 'face_templates'
+
+    id = Column(Integer, primary_key=True)
+    person_id = Column(Integer, ForeignKey('persons.id'), nullable=False, index=True)
+    face_encoding = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    person = relationship("Person", back_populates="templates")
+
+    def __repr__(self):
+        return f"<FaceTemplate(person_id={self.person_id}, created_at='{self.created_at}')>"
+
+
 class FaceRecognitionLog(Base):
     __tablename__ = 'recognition_logs'
 
@@ -37,6 +57,24 @@ class FaceRecognitionLog(Base):
         return f"<FaceRecognitionLog(person_id={self.person_id}, confidence_score={self.confidence_score})>"
 
 
+class PresenceSession(Base):
+    """Bir kişinin bir kameradaki kesintisiz görünüşü (kare başına log yerine tek satır)."""
+    __tablename__ = 'presence_sessions'
+
+    id = Column(Integer, primary_key=True)
+    person_id = Column(Integer, ForeignKey('persons.id'), nullable=False, index=True)
+    camera = Column(String, nullable=False)
+    first_seen = Column(DateTime, nullable=False, index=True)
+    last_seen = Column(DateTime, nullable=False)
+    best_distance = Column(Float)
+    frame_count = Column(Integer, nullable=False, default=1)
+
+    person = relationship("Person")
+
+    def __repr__(self):
+        return f"<PresenceSession(person_id={self.person_id}, camera='{self.camera}', first_seen='{self.first_seen}')>"
+
+
 def get_database_engine(db_path):
     return create_engine(
         f"sqlite:///{db_path}",
@@ -47,10 +85,29 @@ def get_database_engine(db_path):
         pool_recycle=1800
     )
 
-def init_database():
+def migrate_schema(engine):
+    """create_all'un eklemediği yeni sütunları mevcut tablolara ekler; tekrar çalıştırmak güvenlidir."""
+    columns = {column['name'] for column in inspect(engine).get_columns('persons')}
+    with engine.begin() as connection:
+        if 'department' not in columns:
+            connection.execute(text("ALTER TABLE persons ADD COLUMN department VARCHAR"))
+        if 'access_level' not in columns:
+            connection.execute(text(
+                f"ALTER TABLE persons ADD COLUMN access_level INTEGER DEFAULT {DEFAULT_ACCESS_LEVEL}"
+            ))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_persons_department ON persons (department)"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_persons_access_level ON persons (access_level)"))
+
+def create_session_factory(db_path: str = None) -> sessionmaker:
+    """Motoru ve tabloları bir kez kurar; havuzdan kısa ömürlü oturum açan fabrikayı döndürür.
+
+    Uzun ömürlü süreçler (ör. API) bunu başlangıçta bir kez çağırır;
+    istek başına yalnızca `factory()` ile oturum açılır.
+    """
     try:
-        current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        db_path = os.path.join(current_dir, 'face_recognition.db')
+        if db_path is None:
+            current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            db_path = os.path.join(current_dir, 'face_recognition.db')
         
         # Veritabanı dizininin varlığını kontrol et
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -58,20 +115,27 @@ def init_database():
         # Veritabanı bağlantısını test et
         engine = get_database_engine(db_path)
         try:
-            engine.connect()
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
         except Exception as e:
             raise RuntimeError(f"Veritabanı bağlantısı başarısız: {str(e)}")
         
-        # Tabloları oluştur
+        # Tabloları oluştur, eski şemaları güncelle
         Base.metadata.create_all(engine)
+        migrate_schema(engine)
         
+        return sessionmaker(bind=engine)
+    except Exception as e:
+        raise RuntimeError(f"Veritabanı başlatılırken hata: {str(e)}")
+
+def init_database():
+    try:
         # Session oluştur
-        Session = sessionmaker(bind=engine)
-        session = Session()
+        session = create_session_factory()()
         
         # Session'ı test et
         try:
-            session.execute("SELECT 1")
+            session.execute(text("SELECT 1"))
             session.commit()
         except Exception as e:
             session.close()
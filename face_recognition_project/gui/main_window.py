@@ -3,6 +3,9 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from .dashboard import Dashboard
 from services.face_recognition_service import FaceRecognitionService
+from application.services.bulk_enrollment import BulkEnrollment, discover_images
+from presentation.display_buffer import DisplayBuffer
+from infrastructure.persistence.repositories import PersonRepository
 from sqlalchemy.orm import Session
 from sqlalchemy import create_engine
 import cv2
@@ -11,9 +14,34 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+class BulkImportWorker(QThread):
+    """Toplu kaydı Qt ana iş parçacığı dışında, kendi veritabanı oturumuyla çalıştırır."""
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, engine, directory, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.directory = directory
+
+    def run(self):
+        # SQLite oturumları iş parçacıkları arasında paylaşılmaz
+        session = Session(self.engine)
+        try:
+            report = BulkEnrollment(PersonRepository(session)).run(
+                discover_images(self.directory), on_progress=self.progress.emit
+            )
+            self.completed.emit(report)
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            session.close()
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.import_worker = None
         self.init_ui()
         self.setup_services()
         self.setup_connections()
@@ -68,6 +96,7 @@ class MainWindow(QMainWindow):
     def setup_connections(self):
         # Menü aksiyonlarını bağla
         self.import_action.triggered.connect(self.import_images)
+        self.bulk_import_action.triggered.connect(self.import_directory)
         self.export_action.triggered.connect(self.export_reports)
         self.exit_action.triggered.connect(self.close)
         self.about_action.triggered.connect(self.show_about)
@@ -82,10 +111,12 @@ class MainWindow(QMainWindow):
         # Dosya menüsü
         file_menu = menubar.addMenu('Dosya')
         self.import_action = QAction('Fotoğraf İçe Aktar', self)
+        self.bulk_import_action = QAction('Klasörden Toplu Kayıt', self)
         self.export_action = QAction('Rapor Dışa Aktar', self)
         self.exit_action = QAction('Çıkış', self)
 
         file_menu.addAction(self.import_action)
+        file_menu.addAction(self.bulk_import_action)
         file_menu.addAction(self.export_action)
         file_menu.addSeparator()
         file_menu.addAction(self.exit_action)
@@ -129,6 +160,12 @@ class MainWindow(QMainWindow):
             # Yüz tanıma servisi
             self.face_service = FaceRecognitionService(self.db_session)
 
+            # Gösterim tamponu etiket boyutunda bir kez ayrılır ve her karede yeniden kullanılır
+            self.display = DisplayBuffer()
+            self._display_image = None
+            self._display_generation = None
+            self._shown = None
+
             # Kamera timer'ı
             self.timer = QTimer()
             self.timer.timeout.connect(self.update_frame)
@@ -142,6 +179,8 @@ class MainWindow(QMainWindow):
         try:
             if checked:
                 if self.face_service.start_camera():
+                    # Tanıma arka planda çalışır; timer yalnızca en yeni kareyi gösterir
+                    self.face_service.start_pipeline()
                     self.camera_action.setText('Kamerayı Durdur')
                     self.timer.start(30)  # 30ms = ~33 fps
                     self.dashboard.camera_label.setText("Kamera aktif...")
@@ -150,6 +189,7 @@ class MainWindow(QMainWindow):
                 self.face_service.stop_camera()
                 self.camera_action.setText('Kamerayı Başlat')
                 self.timer.stop()
+                self._shown = None
                 self.dashboard.camera_label.setText("Kamera durduruldu")
                 logger.info("Kamera durduruldu")
         except Exception as e:
@@ -158,27 +198,41 @@ class MainWindow(QMainWindow):
 
     def update_frame(self):
         try:
-            frame = self.face_service.get_frame()
-            if frame is not None:
-                # OpenCV BGR -> RGB dönüşümü
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            packet = self.face_service.get_display_packet()
+            if packet is None:
+                return
+            frame_id, frame, overlays = packet
+            label = self.dashboard.camera_label
+            shown = (frame_id, overlays, label.width(), label.height())
+            # Yeni kare ya da değişen kutu yoksa yeniden çizim yapılmaz
+            if shown == self._shown:
+                return
+            self._shown = shown
+
+            # Küçültme ve BGR -> RGB dönüşümü tek seferde, yeniden kullanılan tampona
+            rgb_frame = self.display.render(frame, label.width(), label.height(), overlays)
+            if self._display_generation != self.display.generation:
+                # QImage tamponu kopyalamadan sarar; yalnızca tampon yeniden ayrıldığında kurulur
                 h, w, ch = rgb_frame.shape
-                bytes_per_line = ch * w
-
-                # QImage oluştur
-                image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
+                self._display_image = QImage(rgb_frame.data, w, h, ch * w, QImage.Format_RGB888)
+                self._display_generation = self.display.generation
 
-                # Dashboard'daki kamera label'ını güncelle
-                self.dashboard.camera_label.setPixmap(
-                    QPixmap.fromImage(image).scaled(
-                        self.dashboard.camera_label.size(),
-                        Qt.KeepAspectRatio,
-                        Qt.SmoothTransformation
-                    )
-                )
+            # Dashboard'daki kamera label'ını güncelle
+            label.setPixmap(QPixmap.fromImage(self._display_image))
         except Exception as e:
             logger.error(f"Kare güncellenirken hata: {str(e)}")
 
+    def closeEvent(self, event):
+        try:
+            if self.import_worker is not None:
+                # Yarım kalan parça yazılmadan oturum kapatılmasın
+                self.import_worker.wait()
+            # Bekleyen tanıma logları pencere kapanmadan yazılır
+            self.face_service.close()
+        except Exception as e:
+            logger.error(f"Servis kapatılırken hata: {str(e)}")
+        super().closeEvent(event)
+
     def import_images(self):
         try:
             file_dialog = QFileDialog()
@@ -217,6 +271,51 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"Fotoğraf içe aktarılırken hata: {str(e)}")
 
+    def import_directory(self):
+        try:
+            if self.import_worker is not None:
+                return
+            directory = QFileDialog.getExistingDirectory(self, "Kişi Klasörü Seç (<kişi>/*.jpg)")
+            if not directory:
+                return
+
+            # Kodlama süreç havuzunda, bekleme arka plan iş parçacığında yapılır; arayüz donmaz
+            self.bulk_import_action.setEnabled(False)
+            self.import_worker = BulkImportWorker(self.db_session.get_bind(), directory, self)
+            self.import_worker.progress.connect(
+                lambda done, total: self.statusBar().showMessage(f"Toplu kayıt: {done}/{total} fotoğraf işlendi")
+            )
+            self.import_worker.completed.connect(self.on_import_completed)
+            self.import_worker.failed.connect(self.on_import_failed)
+            self.import_worker.finished.connect(self.on_import_finished)
+            self.import_worker.start()
+        except Exception as e:
+            self.on_import_failed(str(e))
+            self.on_import_finished()
+
+    def on_import_completed(self, report):
+        try:
+            # Galeri her kişi için değil, içe aktarma sonunda bir kez yeniden kurulur
+            self.face_service.load_known_faces()
+            message = (f"{report['persons']} kişi ve {report['templates']} ek şablon eklendi.\n"
+                       f"{report['faces_found']} yüz bulundu, {report['skipped']} fotoğraf atlandı, "
+                       f"{report['existing_persons']} kayıtlı kişi atlandı.\n"
+                       f"{report['images_per_s']:.1f} fotoğraf/sn")
+            QMessageBox.information(self, "Toplu Kayıt", message)
+            logger.info(f"Toplu kayıt tamamlandı: {report}")
+        except Exception as e:
+            self.on_import_failed(str(e))
+
+    def on_import_failed(self, error):
+        error_msg = f"Toplu kayıt sırasında hata: {error}"
+        logger.error(error_msg)
+        QMessageBox.critical(self, "Hata", error_msg)
+
+    def on_import_finished(self):
+        self.statusBar().clearMessage()
+        self.bulk_import_action.setEnabled(True)
+        self.import_worker = None
+
     def export_reports(self):
         try:
             file_dialog = QFileDialog()
@@ -0,0 +1,365 @@
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from infrastructure.recognition.gallery import FaceGallery, GalleryView, decode_encoding
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = 'gallery.lock'
+
+
+def make_delta(op: str, person_id: int, name: Optional[str] = None, encoding=None) -> Dict[str, Any]:
+    """Tek bir galeri değişikliğini JSON'a yazılabilir sözlük olarak tanımlar."""
+    return {
+        'op': op,
+        'person_id': int(person_id),
+        'name': name,
+        'encoding': None if encoding is None else decode_encoding(encoding).tolist()
+    }
+
+
+def apply_delta(gallery: FaceGallery, delta: Dict[str, Any]):
+    """`make_delta` ile tanımlanan değişikliği galeriye uygular ve sonucunu döndürür."""
+    op = delta['op']
+    person_id = delta['person_id']
+    encoding = delta.get('encoding')
+    if encoding is not None:
+        encoding = np.asarray(encoding, dtype=np.float32)
+    if op == 'add':
+        return gallery.add(person_id, delta['name'], encoding)
+    if op == 'add_template':
+        return gallery.add_template(person_id, encoding, delta.get('name'))
+    if op == 'replace':
+        return gallery.replace(person_id, encoding, delta.get('name'))
+    if op == 'remove':
+        return gallery.remove(person_id)
+    raise ValueError(f"Bilinmeyen galeri değişikliği: {op}")
+
+
+class GallerySnapshotStore:
+    """Galeriyi sürümlü .npy dosyaları ve JSON yan dosyası olarak diske yazar.
+
+    Her sürüm `gallery.v{N}.*` dosyalarından oluşur; `manifest.json` atomik
+    olarak güncel sürümü gösterir. Yükleme sırasında matrisler salt okunur
+    np.memmap olarak açılır, böylece açılış maliyeti ORM sorgusu yerine
+    işletim sisteminin sayfa önbelleğine kalır.
+
+    Tek kişilik değişiklikler tüm galeriyi yeniden yazmak yerine küçük
+    `gallery.v{N}.delta.json` sürümleri olarak eklenir; manifest taban
+    sürümü ve sıradaki delta'ları listeler. Delta sayısı
+    `max(min_deltas, delta_ratio * kayıt sayısı)` değerini (en fazla
+    `max_deltas`) aşınca galeri yeni bir taban sürüm olarak sıkıştırılır.
+    """
+
+    def __init__(self, directory: str, keep_versions: int = 2, min_deltas: int = 16,
+                 delta_ratio: float = 0.05, max_deltas: int = 512):
+        self.directory = directory
+        self.keep_versions = max(keep_versions, 1)
+        self.min_deltas = min_deltas
+        self.delta_ratio = delta_ratio
+        self.max_deltas = max_deltas
+
+    def _path(self, version: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"gallery.v{version}.{suffix}")
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        """Güncel sürüm bilgisini döndürür; snapshot yoksa None."""
+        try:
+            with open(os.path.join(self.directory, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') != SNAPSHOT_FORMAT:
+                return None
+            return manifest
+        except (OSError, ValueError):
+            return None
+
+    @contextmanager
+    def lock(self, timeout: float = 60.0, stale_after: float = 600.0):
+        """Süreçler arası yazma kilidi; dosya O_EXCL ile oluşturulduğu için platformdan bağımsızdır."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, LOCK_NAME)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    # Çöken bir sürecin bıraktığı kilidi temizle
+                    if time.time() - os.path.getmtime(path) > stale_after:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Galeri snapshot kilidi alınamadı")
+                time.sleep(0.05)
+        try:
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        temp_path = os.path.join(self.directory, MANIFEST_NAME + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, os.path.join(self.directory, MANIFEST_NAME))
+
+    def load(self, fingerprint: Optional[Dict[str, Any]] = None) -> Optional[FaceGallery]:
+        """Güncel snapshot'ı eşler; parmak izi tutmuyorsa ya da dosya bozuksa None döner."""
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+        if fingerprint is not None and manifest.get('fingerprint') != fingerprint:
+            logger.info("Galeri snapshot'ı güncel değil, yeniden oluşturulacak")
+            return None
+        try:
+            version = manifest.get('base', manifest['version'])
+            matrix = np.load(self._path(version, 'encodings.npy'), mmap_mode='r')
+            sq_norms = np.load(self._path(version, 'norms.npy'), mmap_mode='r')
+            ids = np.load(self._path(version, 'ids.npy'), mmap_mode='r')
+            with open(self._path(version, 'names.json'), 'r', encoding='utf-8') as f:
+                names = json.load(f)
+            if not (matrix.shape[0] == sq_norms.shape[0] == ids.shape[0] == len(names)):
+                raise ValueError("Snapshot dosyaları tutarsız")
+            gallery = FaceGallery.from_arrays(matrix, sq_norms, ids, names)
+            # Sıkıştırma tabanı belleğe kopyalardı; bunun yerine delta zinciri
+            # eşiği aşınca yeni taban yazılır (bkz. should_compact)
+            gallery.auto_compact = False
+            # Delta'lar eşlenmiş tabanın yanındaki özel kuyruğa sırayla uygulanır
+            for delta in manifest.get('deltas', []):
+                apply_delta(gallery, self.read_delta(delta))
+            logger.info(f"Galeri snapshot'ı eşlendi: v{manifest['version']}, {len(gallery)} kayıt")
+            return gallery
+        except Exception as e:
+            logger.warning(f"Galeri snapshot'ı okunamadı: {str(e)}")
+            return None
+
+    def read_delta(self, version: int) -> Dict[str, Any]:
+        with open(self._path(version, 'delta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def append_delta(self, delta: Dict[str, Any], count: int,
+                     fingerprint: Optional[Dict[str, Any]] = None) -> int:
+        """Tek bir değişikliği yeni delta sürümü olarak yazar; tabanı yeniden yazmaz.
+
+        Çağıran taraf `lock()` altında olmalı ve bir taban sürüm bulunmalıdır.
+        """
+        manifest = self.read_manifest()
+        if manifest is None:
+            raise RuntimeError("Delta yazmak için taban snapshot gerekli")
+        version = manifest['version'] + 1
+        temp_path = self._path(version, 'delta.json.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, ensure_ascii=False)
+        os.replace(temp_path, self._path(version, 'delta.json'))
+        self._write_manifest(dict(
+            manifest,
+            version=version,
+            base=manifest.get('base', manifest['version']),
+            deltas=manifest.get('deltas', []) + [version],
+            count=count,
+            fingerprint=fingerprint
+        ))
+        return version
+
+    def should_compact(self, manifest: Optional[Dict[str, Any]] = None) -> bool:
+        """Delta zinciri sıkıştırma eşiğini aştıysa True."""
+        manifest = manifest or self.read_manifest()
+        if manifest is None:
+            return False
+        limit = min(self.max_deltas, max(self.min_deltas, self.delta_ratio * manifest.get('count', 0)))
+        return len(manifest.get('deltas', [])) >= limit
+
+    def write(self, gallery: FaceGallery, fingerprint: Optional[Dict[str, Any]] = None) -> int:
+        """Galeriyi yeni bir sürüm olarak yazar ve manifest'i atomik olarak günceller."""
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = self.read_manifest()
+        version = (manifest['version'] + 1) if manifest else 1
+
+        # Mezar taşlı satırlar snapshot'a yazılmaz
+        matrix, sq_norms, ids, names = gallery.live_arrays()
+        np.save(self._path(version, 'encodings.npy'), np.ascontiguousarray(matrix))
+        np.save(self._path(version, 'norms.npy'), np.ascontiguousarray(sq_norms))
+        np.save(self._path(version, 'ids.npy'), np.ascontiguousarray(ids))
+        with open(self._path(version, 'names.json'), 'w', encoding='utf-8') as f:
+            json.dump(names, f, ensure_ascii=False)
+
+        self._write_manifest({
+            'format': SNAPSHOT_FORMAT,
+            'version': version,
+            'base': version,
+            'deltas': [],
+            'count': len(gallery),
+            'dim': gallery.dim,
+            'fingerprint': fingerprint
+        })
+        self._remove_old_versions(version)
+        logger.info(f"Galeri snapshot'ı yazıldı: v{version}, {len(gallery)} kayıt")
+        return version
+
+    def _remove_old_versions(self, current: int):
+        """Eski sürümleri siler; eşlenmiş dosyalar açık kaldıkça işletim sistemi içeriği korur."""
+        for name in os.listdir(self.directory):
+            parts = name.split('.')
+            if len(parts) < 3 or parts[0] != 'gallery' or not parts[1].startswith('v'):
+                continue
+            try:
+                version = int(parts[1][1:])
+            except ValueError:
+                continue
+            if version <= current - self.keep_versions:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class SharedGallery:
+    """Aynı makinedeki süreçlerin (ör. uvicorn işçileri) ortak kullandığı eşlenmiş galeri.
+
+    Galeri yalnızca snapshot dosyalarından salt okunur np.memmap olarak açılır;
+    tüm süreçler aynı sayfa önbelleğini paylaştığı için bellek kullanımı
+    işçi sayısından bağımsızdır. Yeni sürümler manifest üzerinden en fazla
+    `poll_interval` saniyede bir kontrol edilir. Değişiklikler kilit altında
+    küçük delta sürümleri olarak yazılır; diğer süreçler taban aynı kaldıkça
+    yalnızca yeni delta'ları kendi galerilerine uygular. Tam yeniden yazma
+    yalnızca delta zinciri sıkıştırılırken yapılır.
+    """
+
+    def __init__(
+        self,
+        store: GallerySnapshotStore,
+        fingerprint: Optional[Callable[[], Dict[str, Any]]] = None,
+        poll_interval: float = 1.0
+    ):
+        self.store = store
+        self.fingerprint = fingerprint
+        self.poll_interval = poll_interval
+        self._gallery = FaceGallery()
+        self._version: Optional[int] = None
+        self._base: Optional[int] = None
+        self._checked = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def attach(self, build: Callable[[], FaceGallery]) -> 'SharedGallery':
+        """Güncel snapshot'ı eşler; yoksa ya da eskiyse tek bir süreç `build` ile yeniden yazar."""
+        fingerprint = self.fingerprint() if self.fingerprint else None
+        if self.store.load(fingerprint) is None:
+            with self.store.lock():
+                # Kilidi bekleyen süreçler bu arada yazılmış sürümü kullanır
+                if self.store.load(fingerprint) is None:
+                    self.store.write(build(), fingerprint)
+        self.refresh(force=True)
+        return self
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def refresh(self, force: bool = False) -> bool:
+        """Manifest yeni bir sürüm gösteriyorsa onu eşler; değişiklik olduysa True döner."""
+        now = time.monotonic()
+        if not force and now - self._checked < self.poll_interval:
+            return False
+        with self._refresh_lock:
+            self._checked = now
+            manifest = self.store.read_manifest()
+            if manifest is None or manifest['version'] == self._version:
+                return False
+            if self._apply_new_deltas(manifest):
+                return True
+            gallery = self.store.load()
+            if gallery is None:
+                self._version = None
+                return False
+            self._gallery, self._version = gallery, manifest['version']
+            self._base = manifest.get('base', manifest['version'])
+            logger.info(f"Paylaşılan galeri v{self._version} sürümüne geçti")
+            return True
+
+    def _apply_new_deltas(self, manifest: Dict[str, Any]) -> bool:
+        """Taban değişmediyse yalnızca henüz uygulanmamış delta'ları uygular."""
+        deltas: List[int] = manifest.get('deltas', [])
+        if (self._version is None or manifest.get('base') != self._base or
+                (self._version != self._base and self._version not in deltas)):
+            return False
+        try:
+            for version in deltas:
+                if version > self._version:
+                    apply_delta(self._gallery, self.store.read_delta(version))
+                    self._version = version
+        except Exception as e:
+            # Yarım uygulanmış galeri tam yükleme ile değiştirilir
+            logger.warning(f"Galeri delta'sı uygulanamadı, tam yükleme yapılacak: {str(e)}")
+            self._version = None
+            return False
+        return True
+
+    def snapshot(self) -> GalleryView:
+        """Gerekirse yeni sürümü eşleyip güncel görünümü döndürür."""
+        self.refresh()
+        return self._gallery.snapshot()
+
+    def __len__(self) -> int:
+        return len(self._gallery)
+
+    def __contains__(self, person_id: int) -> bool:
+        self.refresh()
+        return person_id in self._gallery
+
+    def __getattr__(self, name):
+        # Okuma amaçlı diğer özellikler (row_count, name_of, ...) eşlenmiş galeriye yönlendirilir
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._gallery, name)
+
+    def _mutate(self, delta: Dict[str, Any]):
+        """Değişikliği en güncel sürüme uygular ve delta sürümü olarak yayınlar.
+
+        Delta zinciri eşiği aştığında galeri yeni bir taban sürüm olarak yazılır.
+        """
+        fingerprint = self.fingerprint() if self.fingerprint else None
+        with self.store.lock():
+            if self.store.read_manifest() is None:
+                self.store.write(FaceGallery(), fingerprint)
+            self.refresh(force=True)
+            with self._refresh_lock:
+                manifest = self.store.read_manifest()
+                if manifest is None or manifest['version'] != self._version:
+                    raise RuntimeError("Paylaşılan galeri güncel sürüme getirilemedi")
+                result = apply_delta(self._gallery, delta)
+                if delta['op'] == 'remove' and not result:
+                    return result
+                if self.store.should_compact(manifest):
+                    version = self.store.write(self._gallery, fingerprint)
+                    # Diğer süreçlerle aynı satır düzenine geçmek için yeni taban eşlenir
+                    self._gallery = self.store.load() or self._gallery
+                    self._version = self._base = version
+                else:
+                    self._version = self.store.append_delta(delta, len(self._gallery), fingerprint)
+        return result
+
+    def add(self, person_id: int, name: str, encoding) -> int:
+        return self._mutate(make_delta('add', person_id, name, encoding))
+
+    def add_template(self, person_id: int, encoding, name: Optional[str] = None) -> int:
+        return self._mutate(make_delta('add_template', person_id, name, encoding))
+
+    def replace(self, person_id: int, encoding=None, name: Optional[str] = None):
+        return self._mutate(make_delta('replace', person_id, name, encoding))
+
+    def remove(self, person_id: int) -> bool:
+        return self._mutate(make_delta('remove', person_id))
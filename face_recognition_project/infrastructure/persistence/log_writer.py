@@ -0,0 +1,131 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LogRow = Tuple[Optional[int], float, datetime]
+
+_STOP = object()
+
+
+class BatchWriter:
+    """Satırları sınırlı bir kuyrukta biriktirip arka planda toplu yazar.
+
+    `put` hiç beklemez; kuyruk doluysa satır atılır ve `dropped` sayacı
+    artar, böylece üretici döngü veritabanı fsync'ini beklemez. Biriken
+    satırlar `batch_size`'a ulaşınca ya da ilk bekleyen satırdan sonra
+    `flush_interval` saniye geçince `write_batch` ile tek çağrıda yazılır.
+    `close` kuyrukta kalanları yazıp iş parçacığını durdurur. Satırların
+    biçimi `write_batch`'e bağlıdır (ör. varlık oturumları).
+    """
+
+    thread_name = 'batch-writer'
+
+    def __init__(self, write_batch: Callable[[List[Tuple]], Any], batch_size: int = 200,
+                 flush_interval: float = 0.5, max_queue: int = 10000):
+        self.write_batch = write_batch
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self) -> 'BatchWriter':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+            # Süreç kapanırken kuyrukta kalan loglar kaybolmasın
+            atexit.register(self.close)
+        return self
+
+    def put(self, row: Tuple) -> bool:
+        """Satırı `write_batch`'e iletilmek üzere kuyruğa ekler; kuyruk doluysa ya da yazıcı kapalıysa atar ve False döner."""
+        if not self._closed:
+            try:
+                self._queue.put_nowait(row)
+                return True
+            except queue.Full:
+                pass
+        with self._lock:
+            self.dropped += 1
+        return False
+
+    def close(self, timeout: float = 5.0):
+        """Kalan satırları yazar ve arka plan iş parçacığını durdurur."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            return
+        # Kapatılan yazıcıyı atexit kaydı süreç sonuna kadar bellekte tutmasın
+        atexit.unregister(self.close)
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning(f"{self.thread_name} kuyruğu kapanışta boşaltılamadı")
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'pending': self._queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'batches': self.batches
+            }
+
+    def _run(self):
+        batch: List[Tuple] = []
+        deadline = 0.0
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0) if batch else None)
+            except queue.Empty:
+                item = None
+            if item is not None and item is not _STOP:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+            self._flush(batch)
+            batch = []
+            if item is _STOP:
+                return
+
+    def _flush(self, batch: List[Tuple]):
+        if not batch:
+            return
+        try:
+            self.write_batch(batch)
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+        except Exception as e:
+            # Yazılamayan satırlar sayılır; üretici döngü etkilenmez
+            with self._lock:
+                self.failed += len(batch)
+            logger.error(f"{self.thread_name}: {len(batch)} satır yazılamadı: {str(e)}")
+
+
+class RecognitionLogWriter(BatchWriter):
+    """Tanıma loglarını (person_id, confidence_score, timestamp) toplu yazan BatchWriter."""
+
+    thread_name = 'recognition-log-writer'
+
+    def submit(self, person_id: Optional[int], confidence_score: float,
+               timestamp: Optional[datetime] = None) -> bool:
+        """Log olayını kuyruğa ekler; kuyruk doluysa ya da yazıcı kapalıysa atar ve False döner."""
+        return self.put((person_id, float(confidence_score), timestamp or datetime.now()))
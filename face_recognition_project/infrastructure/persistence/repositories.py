@@ -1,10 +1,32 @@
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from core.interfaces.persistence import IPersonRepository, IRecognitionLogRepository
 from core.entities.person import Person, RecognitionLog
-from database.models import Person as PersonModel
+from database.models import DEFAULT_ACCESS_LEVEL, Person as PersonModel
 from database.models import FaceRecognitionLog as LogModel
+from database.models import FaceTemplate as TemplateModel
+from database.models import PresenceSession as PresenceModel
+
+def person_table_fingerprint(session: Session) -> Dict[str, Any]:
+    """Kişi tablosunun tek sorguluk özetini döndürür (galeri snapshot doğrulaması için)."""
+    active_count, max_id, last_update = session.query(
+        func.count(PersonModel.id).filter(PersonModel.is_active == True),
+        func.max(PersonModel.id),
+        func.max(PersonModel.updated_at)
+    ).one()
+    template_count, max_template_id = session.query(
+        func.count(TemplateModel.id),
+        func.max(TemplateModel.id)
+    ).one()
+    return {
+        'active_count': int(active_count or 0),
+        'max_id': int(max_id) if max_id is not None else None,
+        'last_update': last_update.isoformat() if last_update is not None else None,
+        'template_count': int(template_count or 0),
+        'max_template_id': int(max_template_id) if max_template_id is not None else None
+    }
 
 class PersonRepository(IPersonRepository):
     def __init__(self, session: Session):
@@ -12,17 +34,14 @@ class PersonRepository(IPersonRepository):
     
     def add(self, name: str, face_encoding: bytes, details: Dict[str, Any]) -> int:
         try:
+            # Yalnızca persons tablosunda bulunan sütunlar yazılır (add_batch ile aynı)
             person = PersonModel(
                 name=name,
                 face_encoding=face_encoding,
                 is_active=True,
                 created_at=datetime.now(),
-                details=details,
-                email=details.get('email'),
-                phone=details.get('phone'),
                 department=details.get('department'),
-                access_level=details.get('access_level', 1),
-                photo_path=details.get('photo_path')
+                access_level=details.get('access_level', DEFAULT_ACCESS_LEVEL)
             )
             self.session.add(person)
             self.session.commit()
@@ -41,13 +60,9 @@ class PersonRepository(IPersonRepository):
                     'face_encoding': person.face_encoding,
                     'is_active': person.is_active,
                     'created_at': person.created_at,
-                    'details': person.details,
-                    'email': person.email,
-                    'phone': person.phone,
+                    'updated_at': person.updated_at,
                     'department': person.department,
-                    'access_level': person.access_level,
-                    'last_seen': person.last_seen,
-                    'photo_path': person.photo_path
+                    'access_level': person.access_level
                 }
             return None
         except Exception as e:
@@ -62,17 +77,106 @@ class PersonRepository(IPersonRepository):
                 'face_encoding': p.face_encoding,
                 'is_active': p.is_active,
                 'created_at': p.created_at,
-                'details': p.details,
-                'email': p.email,
-                'phone': p.phone,
+                'updated_at': p.updated_at,
                 'department': p.department,
-                'access_level': p.access_level,
-                'last_seen': p.last_seen,
-                'photo_path': p.photo_path
+                'access_level': p.access_level
             } for p in persons]
         except Exception as e:
             raise RuntimeError(f"Aktif kişiler alınırken hata: {str(e)}")
     
+    def get_active_encodings(self) -> List[Dict[str, Any]]:
+        try:
+            rows = self.session.query(
+                PersonModel.id, PersonModel.name, PersonModel.face_encoding
+            ).filter_by(is_active=True).all()
+            return [{
+                'id': person_id,
+                'name': name,
+                'face_encoding': face_encoding
+            } for person_id, name, face_encoding in rows]
+        except Exception as e:
+            raise RuntimeError(f"Aktif kodlamalar alınırken hata: {str(e)}")
+    
+    def get_names(self) -> List[str]:
+        try:
+            return [name for name, in self.session.query(PersonModel.name).all()]
+        except Exception as e:
+            raise RuntimeError(f"Kişi isimleri alınırken hata: {str(e)}")
+    
+    def get_access_attributes(self) -> Dict[int, Tuple[Optional[str], int]]:
+        try:
+            rows = self.session.query(
+                PersonModel.id, PersonModel.department, PersonModel.access_level
+            ).filter_by(is_active=True).all()
+            # Migrasyondan önce eklenen kişilerde seviye NULL olabilir
+            return {
+                pid: (department, DEFAULT_ACCESS_LEVEL if access_level is None else access_level)
+                for pid, department, access_level in rows
+            }
+        except Exception as e:
+            raise RuntimeError(f"Erişim bilgileri alınırken hata: {str(e)}")
+    
+    def get_fingerprint(self) -> Dict[str, Any]:
+        try:
+            return person_table_fingerprint(self.session)
+        except Exception as e:
+            raise RuntimeError(f"Kişi tablosu özeti alınırken hata: {str(e)}")
+    
+    def add_template(self, person_id: int, face_encoding: bytes) -> int:
+        try:
+            template = TemplateModel(
+                person_id=person_id,
+                face_encoding=face_encoding,
+                created_at=datetime.now()
+            )
+            self.session.add(template)
+            self.session.commit()
+            return template.id
+        except Exception as e:
+            self.session.rollback()
+            raise RuntimeError(f"Şablon eklenirken hata: {str(e)}")
+    
+    def add_batch(self, people: List[Tuple[str, List[bytes], Dict[str, Any]]]) -> List[int]:
+        try:
+            now = datetime.now()
+            # Yalnızca persons tablosunda bulunan sütunlar yazılır
+            persons = [PersonModel(
+                name=name,
+                face_encoding=encodings[0],
+                is_active=True,
+                created_at=now,
+                department=details.get('department'),
+                access_level=details.get('access_level', DEFAULT_ACCESS_LEVEL)
+            ) for name, encodings, details in people]
+            self.session.add_all(persons)
+            # ID'ler şablonlar için gerekli; commit tüm parça için bir kez
+            self.session.flush()
+            self.session.add_all([
+                TemplateModel(person_id=person.id, face_encoding=encoding, created_at=now)
+                for person, (_, encodings, _) in zip(persons, people)
+                for encoding in encodings[1:]
+            ])
+            self.session.commit()
+            return [person.id for person in persons]
+        except Exception as e:
+            self.session.rollback()
+            raise RuntimeError(f"Kişiler toplu eklenirken hata: {str(e)}")
+    
+    def get_active_templates(self) -> List[Dict[str, Any]]:
+        try:
+            rows = self.session.query(
+                TemplateModel.person_id, PersonModel.name, TemplateModel.face_encoding
+            ).join(PersonModel, TemplateModel.person_id == PersonModel.id).filter(
+                PersonModel.is_active == True
+            ).all()
+            return [{
+                'person_id': person_id,
+                'name': name,
+                'face_encoding': face_encoding
+            } for person_id, name, face_encoding in rows]
+        except Exception as e:
+            raise RuntimeError(f"Şablonlar alınırken hata: {str(e)}")
+    
     def update(self, person_id: int, details: Dict[str, Any]) -> bool:
         try:
             person = self.session.query(PersonModel).filter_by(id=person_id).first()
@@ -80,6 +184,9 @@ class PersonRepository(IPersonRepository):
                 for key, value in details.items():
                     if hasattr(person, key):
                         setattr(person, key, value)
+                if 'face_encoding' in details:
+                    # Yeni fotoğraf kişiyi yeniden kaydeder; eski ek şablonlar geçersiz
+                    self.session.query(TemplateModel).filter_by(person_id=person_id).delete()
                 person.updated_at = datetime.now()
                 self.session.commit()
                 return True
@@ -119,6 +226,56 @@ class RecognitionLogRepository(IRecognitionLogRepository):
             self.session.rollback()
             raise RuntimeError(f"Log eklenirken hata: {str(e)}")
     
+    def add_logs(self, logs: List[Tuple[Optional[int], float, datetime]]) -> int:
+        try:
+            if not logs:
+                return 0
+            self.session.execute(insert(LogModel), [{
+                'person_id': person_id,
+                'confidence_score': confidence_score,
+                'timestamp': timestamp
+            } for person_id, confidence_score, timestamp in logs])
+            self.session.commit()
+            return len(logs)
+        except Exception as e:
+            self.session.rollback()
+            raise RuntimeError(f"Loglar eklenirken hata: {str(e)}")
+    
+    def add_presence_sessions(self, sessions: List[Tuple[int, str, datetime, datetime, Optional[float], int]]) -> int:
+        try:
+            if not sessions:
+                return 0
+            self.session.execute(insert(PresenceModel), [{
+                'person_id': person_id,
+                'camera': camera,
+                'first_seen': first_seen,
+                'last_seen': last_seen,
+                'best_distance': best_distance,
+                'frame_count': frame_count
+            } for person_id, camera, first_seen, last_seen, best_distance, frame_count in sessions])
+            self.session.commit()
+            return len(sessions)
+        except Exception as e:
+            self.session.rollback()
+            raise RuntimeError(f"Varlık oturumları eklenirken hata: {str(e)}")
+    
+    def get_presence_sessions(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        try:
+            sessions = self.session.query(PresenceModel).filter(
+                PresenceModel.first_seen.between(start_date, end_date)
+            ).all()
+            return [{
+                'id': session.id,
+                'person_id': session.person_id,
+                'camera': session.camera,
+                'first_seen': session.first_seen,
+                'last_seen': session.last_seen,
+                'best_distance': session.best_distance,
+                'frame_count': session.frame_count
+            } for session in sessions]
+        except Exception as e:
+            raise RuntimeError(f"Varlık oturumları alınırken hata: {str(e)}")
+    
     def get_logs(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         try:
             logs = self.session.query(LogModel).filter(
@@ -131,4 +288,19 @@ class RecognitionLogRepository(IRecognitionLogRepository):
                 'timestamp': log.timestamp
             } for log in logs]
         except Exception as e:
-            raise RuntimeError(f"Loglar alınırken hata: {str(e)}") 
\ No newline at end of file
+            raise RuntimeError(f"Loglar alınırken hata: {str(e)}")
+
+def log_batch_writer(session_factory: Callable[[], Session], method: str = 'add_logs') -> Callable[[List[Tuple]], int]:
+    """Her çağrıda havuzdan kısa ömürlü bir oturum açıp satırları tek insert ile yazan fonksiyon.
+
+    BatchWriter / RecognitionLogWriter gibi arka plan yazıcıları, tanıma iş parçacığının
+    oturumunu paylaşmadan bunu kullanır. `method` RecognitionLogRepository'nin
+    toplu ekleme metodudur ('add_logs' ya da 'add_presence_sessions').
+    """
+    def write(rows: List[Tuple]) -> int:
+        session = session_factory()
+        try:
+            return getattr(RecognitionLogRepository(session), method)(rows)
+        finally:
+            session.close()
+    return write
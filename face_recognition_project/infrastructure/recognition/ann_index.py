@@ -0,0 +1,252 @@
+import hashlib
+import logging
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from infrastructure.recognition.gallery import ENCODING_DIM, as_encoding_matrix
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_ROWS = 65536
+
+
+def _nearest_centroids(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Her satır için en yakın merkezin indeksini parça parça hesaplar."""
+    centroid_sq = np.einsum('ij,ij->i', centroids, centroids)
+    assignments = np.empty(data.shape[0], dtype=np.int64)
+    for start in range(0, data.shape[0], _CHUNK_ROWS):
+        chunk = data[start:start + _CHUNK_ROWS]
+        # ||x||² satır başına sabit olduğu için argmin'i etkilemez
+        scores = chunk @ centroids.T
+        scores *= -2.0
+        scores += centroid_sq[None, :]
+        assignments[start:start + _CHUNK_ROWS] = np.argmin(scores, axis=1)
+    return assignments
+
+
+def _nearest_probes(queries: np.ndarray, centroids: np.ndarray, nprobe: int) -> np.ndarray:
+    """Her sorgu için taranacak en yakın nprobe listeyi seçer."""
+    scores = queries @ centroids.T
+    scores *= -2.0
+    scores += np.einsum('ij,ij->i', centroids, centroids)[None, :]
+    if nprobe >= centroids.shape[0]:
+        return np.argsort(scores, axis=1)
+    return np.argpartition(scores, nprobe - 1, axis=1)[:, :nprobe]
+
+
+def matrix_fingerprint(matrix: np.ndarray) -> str:
+    """Kodlama matrisinin içerik özeti; aynı boyutta güncelleme ya da silme+ekleme de özeti değiştirir."""
+    return hashlib.blake2b(np.ascontiguousarray(matrix).tobytes(), digest_size=16).hexdigest()
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Lloyd algoritmasıyla k adet merkez öğrenir."""
+    rng = np.random.default_rng(seed)
+    data = as_encoding_matrix(data, data.shape[1])
+    k = min(k, data.shape[0])
+    centroids = data[rng.choice(data.shape[0], k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroids(data, centroids)
+        counts = np.bincount(assignments, minlength=k)
+        sums = np.stack([
+            np.bincount(assignments, weights=data[:, d], minlength=k)
+            for d in range(data.shape[1])
+        ], axis=1)
+        filled = counts > 0
+        centroids[filled] = (sums[filled] / counts[filled, None]).astype(np.float32)
+        # Boş kalan merkezleri rastgele noktalarla yeniden başlat
+        empty = np.flatnonzero(~filled)
+        if empty.size:
+            centroids[empty] = data[rng.choice(data.shape[0], empty.size, replace=False)]
+    return centroids
+
+
+class IVFIndex:
+    """K-means merkezleri üzerinde ters dosya (IVF) yaklaşık en yakın komşu indeksi.
+
+    Galeri satırları en yakın merkezin listesine atanır ve liste sırasıyla
+    bitişik bir matriste saklanır. Sorguda yalnızca en yakın `nprobe` liste
+    taranır; aday mesafeleri tam hassasiyetle hesaplanır (exact re-rank).
+    `nlist` ve `nprobe` doğruluk/gecikme dengesini belirler.
+    """
+
+    def __init__(self, nlist: int = 1024, nprobe: int = 16, dim: int = ENCODING_DIM,
+                 kmeans_iterations: int = 20, train_sample: int = 100000, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.dim = dim
+        self.kmeans_iterations = kmeans_iterations
+        self.train_sample = train_sample
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.sq_norms = np.empty(0, dtype=np.float32)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.fingerprint: Optional[str] = None
+        self.version: Any = None  # Kaynak galeri sürümü; sorguda ucuz tazelik kontrolü için
+
+    def __len__(self) -> int:
+        return self.positions.shape[0]
+
+    @property
+    def is_built(self) -> bool:
+        return self.centroids is not None
+
+    def build(self, matrix: np.ndarray, version: Any = None) -> 'IVFIndex':
+        """Merkezleri eğitir ve galeri matrisinin tüm satırlarını listelere dağıtır.
+
+        `version` kaynak galerinin sürüm sayacıdır; sorgularda içerik özeti
+        yerine bununla karşılaştırılır.
+        """
+        matrix = as_encoding_matrix(matrix, self.dim)
+        if matrix.shape[0] == 0:
+            raise ValueError("Boş galeri üzerinde indeks oluşturulamaz")
+        rng = np.random.default_rng(self.seed)
+        sample = matrix
+        if matrix.shape[0] > self.train_sample:
+            sample = matrix[np.sort(rng.choice(matrix.shape[0], self.train_sample, replace=False))]
+        self.centroids = kmeans(sample, self.nlist, self.kmeans_iterations, self.seed)
+        self.nlist = self.centroids.shape[0]
+
+        assignments = _nearest_centroids(matrix, self.centroids)
+        order = np.argsort(assignments, kind='stable')
+        self.positions = order.astype(np.int64)
+        self.vectors = np.ascontiguousarray(matrix[order])
+        self.sq_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        counts = np.bincount(assignments, minlength=self.nlist)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.fingerprint = matrix_fingerprint(matrix)
+        self.version = version
+        logger.info(f"IVF indeksi oluşturuldu: {len(self)} kayıt, {self.nlist} liste")
+        return self
+
+    def extend(self, gallery) -> bool:
+        """Galeriye indeks kurulduktan sonra eklenen satırları en yakın listelerin sonuna ekler.
+
+        Merkezler yeniden eğitilmez; yeni satırlar `len(self)` konumundan
+        itibaren galeri görünümünden okunur ve indeks sürümü görünümün
+        sürümüne taşınır. Çok sayıda ekleme sonrası listeler dengesizleşirse
+        indeks yeniden kurulmalıdır.
+        """
+        if not self.is_built:
+            return False
+        positions = np.arange(len(self), gallery.row_count, dtype=np.int64)
+        if positions.size:
+            rows = as_encoding_matrix(gallery.rows(positions), self.dim)
+            assignments = _nearest_centroids(rows, self.centroids)
+            # Her satır kendi listesinin sonuna girer; aynı listeye girenler sırasını korur
+            order = np.argsort(assignments, kind='stable')
+            rows, positions, assignments = rows[order], positions[order], assignments[order]
+            at = self.offsets[assignments + 1]
+            self.vectors = np.insert(self.vectors, at, rows, axis=0)
+            self.sq_norms = np.insert(self.sq_norms, at, np.einsum('ij,ij->i', rows, rows))
+            self.positions = np.insert(self.positions, at, positions)
+            counts = np.bincount(assignments, minlength=self.nlist)
+            self.offsets = self.offsets + np.concatenate(([0], np.cumsum(counts)))
+            # İçerik özeti kurulumdaki matrisi tanımlar; artık geçerli değil
+            self.fingerprint = None
+        self.version = gallery.version
+        return True
+
+    def search(self, encodings, k: int = 1, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """En yakın k galeri satırını döndürür.
+
+        Returns:
+            (M, k) mesafe matrisi ve (M, k) galeri satır indeksleri; yeterli
+            aday yoksa mesafe inf, indeks -1 olur.
+        """
+        if not self.is_built:
+            raise RuntimeError("IVF indeksi henüz oluşturulmadı")
+        queries = as_encoding_matrix(encodings, self.dim)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        count = queries.shape[0]
+        out_distances = np.full((count, k), np.inf, dtype=np.float32)
+        out_positions = np.full((count, k), -1, dtype=np.int64)
+
+        probes = _nearest_probes(queries, self.centroids, nprobe)
+        for row in range(count):
+            candidates = np.concatenate([
+                np.arange(self.offsets[c], self.offsets[c + 1]) for c in probes[row]
+            ])
+            if candidates.size == 0:
+                continue
+            query = queries[row]
+            squared = self.vectors[candidates] @ query
+            squared *= -2.0
+            squared += self.sq_norms[candidates]
+            squared += np.dot(query, query)
+            np.maximum(squared, 0.0, out=squared)
+            take = min(k, candidates.size)
+            top = np.argpartition(squared, take - 1)[:take]
+            top = top[np.argsort(squared[top])]
+            out_distances[row, :take] = np.sqrt(squared[top])
+            out_positions[row, :take] = self.positions[candidates[top]]
+        return out_distances, out_positions
+
+    def save(self, path: str):
+        """İndeksi .npz dosyası olarak diske yazar."""
+        if not self.is_built:
+            raise RuntimeError("IVF indeksi henüz oluşturulmadı")
+        np.savez(
+            path,
+            centroids=self.centroids,
+            vectors=self.vectors,
+            positions=self.positions,
+            offsets=self.offsets,
+            params=np.array([self.nlist, self.nprobe, self.dim], dtype=np.int64),
+            fingerprint=np.array(self.fingerprint or '')
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'IVFIndex':
+        """save() ile yazılmış indeksi yükler."""
+        with np.load(path, allow_pickle=False) as data:
+            nlist, nprobe, dim = (int(v) for v in data['params'])
+            index = cls(nlist=nlist, nprobe=nprobe, dim=dim)
+            index.centroids = data['centroids']
+            index.vectors = np.ascontiguousarray(data['vectors'])
+            index.positions = data['positions']
+            index.offsets = data['offsets']
+            if 'fingerprint' in data.files:
+                index.fingerprint = str(data['fingerprint']) or None
+        index.sq_norms = np.einsum('ij,ij->i', index.vectors, index.vectors)
+        return index
+
+
+def evaluate_recall(
+    index: IVFIndex,
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    nprobe_values: Sequence[int] = (1, 2, 4, 8, 16, 32, 64)
+) -> List[Dict[str, Any]]:
+    """Farklı nprobe değerleri için tam taramaya karşı recall@1 ve gecikme raporu üretir."""
+    matrix = as_encoding_matrix(matrix, index.dim)
+    queries = as_encoding_matrix(queries, index.dim)
+
+    start = time.perf_counter()
+    exact = np.empty(queries.shape[0], dtype=np.int64)
+    matrix_sq = np.einsum('ij,ij->i', matrix, matrix)
+    for row in range(queries.shape[0]):
+        exact[row] = np.argmin(matrix_sq - 2.0 * (matrix @ queries[row]))
+    exact_ms = (time.perf_counter() - start) * 1000 / max(queries.shape[0], 1)
+
+    report = []
+    for nprobe in nprobe_values:
+        if nprobe > index.nlist:
+            break
+        start = time.perf_counter()
+        _, positions = index.search(queries, k=1, nprobe=nprobe)
+        latency_ms = (time.perf_counter() - start) * 1000 / max(queries.shape[0], 1)
+        recall = float(np.mean(positions[:, 0] == exact))
+        report.append({
+            'nprobe': nprobe,
+            'recall_at_1': recall,
+            'latency_ms': latency_ms,
+            'exact_latency_ms': exact_ms
+        })
+        logger.info(
+            f"nprobe={nprobe}: recall@1={recall:.4f}, "
+            f"{latency_ms:.3f} ms/sorgu (tam tarama {exact_ms:.3f} ms)"
+        )
+    return report
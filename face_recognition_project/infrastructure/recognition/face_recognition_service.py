@@ -1,7 +1,8 @@
 import face_recognition
 import numpy as np
-from typing import List, Optional, Tuple
+from typing import Any, Callable, List, Optional, Tuple
 from core.interfaces.recognition import IFaceRecognitionService
+from infrastructure.recognition.ann_index import IVFIndex
 
 class FaceRecognitionService(IFaceRecognitionService):
     def detect_faces(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
@@ -43,4 +44,42 @@ class FaceRecognitionService(IFaceRecognitionService):
                 return image[:, :, :3]
             return image
         except Exception as e:
-            raise RuntimeError(f"Görüntü ön işleme sırasında hata: {str(e)}") 
\ No newline at end of file
+            raise RuntimeError(f"Görüntü ön işleme sırasında hata: {str(e)}") 
+
+class IndexedFaceRecognitionService(FaceRecognitionService):
+    """compare_faces çağrısını tam tarama yerine IVF indeksiyle yanıtlar.
+
+    `version` kodlama listesinin kaynağının (ör. galeri görünümü) sürüm
+    sayacını döndürür; indeks `build(..., version=...)` ile aynı sürüme
+    bağlanmadıysa ya da liste boyu tutmuyorsa tam taramaya dönülür.
+    """
+
+    def __init__(self, index: IVFIndex, version: Callable[[], Any], k: int = 16):
+        self.index = index
+        self.version = version
+        self.k = max(k, 1)
+
+    def compare_faces(self, face_encoding: np.ndarray, known_face_encodings: List[np.ndarray], tolerance: float = 0.6) -> List[bool]:
+        """Taranan listelerdeki tolerans içindeki her aday işaretlenir.
+
+        Önce küçük bir k ile aranır; en uzak sonuç da tolerans içindeyse k
+        ikiye katlanarak daha fazla aday istenir.
+        """
+        count = len(known_face_encodings)
+        if (not self.index.is_built or count == 0 or len(self.index) != count or
+                self.index.version is None or self.index.version != self.version()):
+            return super().compare_faces(face_encoding, known_face_encodings, tolerance)
+        try:
+            k = min(self.k, count)
+            while True:
+                distances, positions = self.index.search(face_encoding, k=k)
+                # Sonuçlar mesafeye göre sıralı; sondaki aday tolerans dışındaysa başka aday yok
+                if k >= count or positions[0, -1] < 0 or distances[0, -1] > tolerance:
+                    break
+                k = min(k * 2, count)
+            within = (positions[0] >= 0) & (distances[0] <= tolerance)
+            matches = np.zeros(count, dtype=bool)
+            matches[positions[0, within]] = True
+            return matches.tolist()
+        except Exception as e:
+            raise RuntimeError(f"Yüz karşılaştırma sırasında hata: {str(e)}")
@@ -0,0 +1,550 @@
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+ENCODING_DIM = 128
+
+EncodingLike = Union[np.ndarray, bytes]
+
+AGGREGATIONS = ('min', 'centroid')
+
+
+def as_encoding_matrix(encodings, dim: int = ENCODING_DIM) -> np.ndarray:
+    """Tek bir kodlamayı ya da kodlama listesini (M, dim) float32 matrise çevirir."""
+    matrix = np.asarray(encodings, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.shape[-1] != dim:
+        raise ValueError(f"Kodlama boyutu {dim} olmalı, {matrix.shape[-1]} verildi")
+    return np.ascontiguousarray(matrix)
+
+
+def decode_encoding(encoding: EncodingLike) -> np.ndarray:
+    """Veritabanındaki ham float64 byte dizisini ya da diziyi float32 vektöre çevirir."""
+    if isinstance(encoding, (bytes, bytearray, memoryview)):
+        encoding = np.frombuffer(encoding, dtype=np.float64)
+    return np.asarray(encoding, dtype=np.float32).reshape(-1)
+
+
+def _euclidean(queries: np.ndarray, matrix: np.ndarray, sq_norms: np.ndarray) -> np.ndarray:
+    """||q - g||² = ||q||² + ||g||² - 2 q·g açılımıyla (M, N) mesafe matrisi."""
+    query_sq = np.einsum('ij,ij->i', queries, queries)
+    squared = queries @ matrix.T
+    squared *= -2.0
+    squared += query_sq[:, None]
+    squared += sq_norms[None, :]
+    np.maximum(squared, 0.0, out=squared)
+    return np.sqrt(squared, out=squared)
+
+
+class GalleryView:
+    """Galerinin değişmez bir sürümü.
+
+    Okuyucular (kamera döngüleri, API işçileri) bir görünüm referansı alıp
+    kilitsiz kullanır; yazıcılar görünüm kapsamındaki satırlara hiçbir zaman
+    dokunmaz, değişiklikleri yeni bir sürüm olarak yayınlar.
+
+    Kodlamalar iki parçada olabilir: salt okunur taban (`base`, ör. eşlenmiş
+    snapshot) ve sonradan eklenen satırların özel kuyruğu (`tail`). Mesafe
+    hesabı parçalar üzerinde ayrı yapılır; `matrix` yalnızca istendiğinde
+    birleştirilir (indeks kurma gibi seyrek işlemler için).
+    """
+
+    __slots__ = ('dim', 'version', 'generation', 'base', 'tail', 'sq_norms', 'ids', '_names', '_live',
+                 '_groups', '_centroids', '_matrix')
+
+    def __init__(self, dim: int, version: int, generation: int, matrix: np.ndarray,
+                 sq_norms: np.ndarray, ids: np.ndarray, names: List[str], live: int,
+                 tail: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.version = version
+        self.generation = generation
+        self.base = matrix
+        self.tail = np.empty((0, dim), dtype=np.float32) if tail is None else tail
+        self._matrix = None
+        self.sq_norms = sq_norms
+        self.ids = ids
+        self._names = names
+        self._live = live
+        self._groups = None
+        self._centroids = None
+
+    def __len__(self) -> int:
+        """Görünümdeki canlı şablon (satır) sayısı."""
+        return self._live
+
+    @property
+    def row_count(self) -> int:
+        return self.base.shape[0] + self.tail.shape[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Tüm satırların (N, dim) matrisi; kuyruk varsa bir kez birleştirilip önbelleğe alınır."""
+        if self.tail.shape[0] == 0:
+            return self.base
+        if self.base.shape[0] == 0:
+            return self.tail
+        if self._matrix is None:
+            self._matrix = np.concatenate((self.base, self.tail))
+        return self._matrix
+
+    def rows(self, positions: np.ndarray) -> np.ndarray:
+        """Verilen satırların kodlamalarını parçaları birleştirmeden toplar."""
+        positions = np.asarray(positions, dtype=np.int64)
+        split = self.base.shape[0]
+        if self.tail.shape[0] == 0:
+            return self.base[positions]
+        if split == 0:
+            return self.tail[positions]
+        out = np.empty((positions.shape[0], self.dim), dtype=np.float32)
+        in_base = positions < split
+        out[in_base] = self.base[positions[in_base]]
+        out[~in_base] = self.tail[positions[~in_base] - split]
+        return out
+
+    @property
+    def names(self) -> List[str]:
+        # Yazıcı listenin sonuna ekleme yapabilir; görünüm yalnızca kendi satırlarını görür
+        return self._names[:self.row_count]
+
+    def name_at(self, position: int) -> str:
+        return self._names[position]
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Satır başına canlılık maskesi."""
+        return np.isfinite(self.sq_norms)
+
+    def live_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        """Yalnızca canlı satırlardan oluşan (matris, normlar, ID'ler, isimler) döndürür."""
+        if self._live == self.row_count:
+            return self.matrix, self.sq_norms, self.ids, self.names
+        keep = np.flatnonzero(self.alive)
+        return (self.rows(keep), self.sq_norms[keep], self.ids[keep],
+                [self._names[i] for i in keep])
+
+    def subset(self, rows: np.ndarray) -> 'GalleryView':
+        """Yalnızca verilen canlı satırlardan oluşan bağımsız bir görünüm (maliyet alt kümeyle orantılı)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        return GalleryView(
+            dim=self.dim,
+            version=self.version,
+            generation=self.generation,
+            matrix=self.rows(rows),
+            sq_norms=self.sq_norms[rows],
+            ids=self.ids[rows],
+            names=[self._names[i] for i in rows.tolist()],
+            live=rows.shape[0]
+        )
+
+    def identity_groups(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Canlı satırları kişiye göre gruplar.
+
+        Returns:
+            (order, starts, identity_ids): `order` kişi ID'sine göre sıralı
+            satır indeksleri, `starts` her kişinin `order` içindeki ilk
+            konumu, `identity_ids` her grubun kişi ID'si.
+        """
+        if self._groups is None:
+            live = np.flatnonzero(self.alive)
+            order = live[np.argsort(self.ids[live], kind='stable')]
+            sorted_ids = self.ids[order]
+            starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]) if order.size else order
+            # Görünüm değişmez olduğu için önbellek güvenle paylaşılır
+            self._groups = (order, starts, sorted_ids[starts])
+        return self._groups
+
+    @property
+    def identity_count(self) -> int:
+        return self.identity_groups()[2].shape[0]
+
+    @property
+    def has_multiple_templates(self) -> bool:
+        """Herhangi bir kişinin birden fazla canlı şablonu var mı."""
+        return self.identity_count != self._live
+
+    def identity_centroids(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Her kişinin şablon ortalamasını (P, dim) ve kare normlarını döndürür."""
+        if self._centroids is None:
+            order, starts, _ = self.identity_groups()
+            if order.size == 0:
+                centroids = np.empty((0, self.dim), dtype=np.float32)
+            else:
+                counts = np.diff(np.r_[starts, order.size])
+                sums = np.add.reduceat(self.rows(order), starts, axis=0)
+                centroids = np.ascontiguousarray(sums / counts[:, None], dtype=np.float32)
+            self._centroids = (centroids, np.einsum('ij,ij->i', centroids, centroids))
+        return self._centroids
+
+    def identity_distances(self, encodings, aggregate: str = 'min') -> Tuple[np.ndarray, np.ndarray]:
+        """Sorgular ile kişiler arasındaki (M, P) mesafe matrisini hesaplar.
+
+        `min` her kişinin en yakın şablonunu segment indirgemesiyle
+        (np.minimum.reduceat) seçer; `centroid` kişi ortalamasına olan
+        mesafeyi tek BLAS çağrısıyla hesaplar.
+
+        Returns:
+            (mesafeler, her grubun order içindeki ilk konumu)
+        """
+        if aggregate not in AGGREGATIONS:
+            raise ValueError(f"Desteklenmeyen birleştirme: {aggregate}")
+        order, starts, _ = self.identity_groups()
+        queries = as_encoding_matrix(encodings, self.dim)
+        if order.size == 0:
+            return np.empty((queries.shape[0], 0), dtype=np.float32), starts
+        if aggregate == 'centroid':
+            centroids, centroid_sq = self.identity_centroids()
+            return _euclidean(queries, centroids, centroid_sq), starts
+        distances = self.distances(queries)
+        if not (self._live == self.row_count and np.array_equal(order, np.arange(order.size))):
+            # Satırlar kişi bazında bitişik değilse (ekleme/silme sonrası) önce sırala
+            distances = distances[:, order]
+        return np.minimum.reduceat(distances, starts, axis=1), starts
+
+    def distances(self, encodings) -> np.ndarray:
+        """Sorgu kodlamaları ile galeri arasındaki (M, N) Öklid mesafe matrisini hesaplar.
+
+        ||q - g||² = ||q||² + ||g||² - 2 q·g açılımı sayesinde tek bir
+        BLAS çağrısı (matris çarpımı) yeterlidir.
+        """
+        queries = as_encoding_matrix(encodings, self.dim)
+        if self.row_count == 0:
+            return np.empty((queries.shape[0], 0), dtype=np.float32)
+        split = self.base.shape[0]
+        if self.tail.shape[0] == 0:
+            return _euclidean(queries, self.base, self.sq_norms)
+        if split == 0:
+            return _euclidean(queries, self.tail, self.sq_norms)
+        # Taban ve kuyruk ayrı çarpılır; eşlenmiş taban kopyalanmaz
+        distances = np.empty((queries.shape[0], self.row_count), dtype=np.float32)
+        distances[:, :split] = _euclidean(queries, self.base, self.sq_norms[:split])
+        distances[:, split:] = _euclidean(queries, self.tail, self.sq_norms[split:])
+        return distances
+
+
+class FaceGallery:
+    """Aktif yüz kodlamalarını tek bir bitişik float32 matriste tutar.
+
+    Satırlar önceden ayrılmış (capacity, dim) C-contiguous bir tamponda
+    saklanır; kişi ID'leri ve kare normları aynı sırayla paralel dizilerde
+    tutulur. Böylece bir karedeki tüm yüzler tek bir matris çarpımıyla
+    karşılaştırılabilir.
+
+    Ekleme tamponun sonuna yapılır (amortize O(1)), silinen satırların kare
+    normu sonsuz yapılarak mezar taşı (tombstone) bırakılır; böylece satır
+    konumları ve onlara dayanan indeksler geçerli kalır. Ölü satır oranı
+    `compact_ratio` değerini aşınca tampon sıkıştırılır ve `generation`
+    artırılır.
+
+    Bir kişinin birden fazla şablonu (satırı) olabilir; ID dizisi satır
+    başına kişi ID'sini tutar ve eşleştirme kişi bazında birleştirilir.
+
+    Yazma işlemleri bir kilitle sıralanır ve her değişiklik RCU tarzında yeni
+    bir GalleryView olarak yayınlanır: yayınlanmış satırlar yerinde
+    değiştirilmez (güncelleme ve silme normları kopyalayarak yapılır), sadece
+    referans atomik olarak değiştirilir. Okuyucular snapshot() ile aldıkları
+    görünümü kilitsiz kullanır.
+
+    `from_arrays` ile sarılan salt okunur diziler (ör. eşlenmiş snapshot)
+    taban segment olarak kalır; yeni satırlar yalnızca küçük özel kuyruk
+    tamponuna yazılır ve taban matris hiçbir zaman belleğe kopyalanmaz.
+    `auto_compact` kapatılırsa sıkıştırma yalnızca açık `compact()` ile yapılır.
+    """
+
+    def __init__(self, dim: int = ENCODING_DIM, capacity: int = 1024,
+                 compact_ratio: float = 0.25, compact_min: int = 1024, auto_compact: bool = True):
+        capacity = max(int(capacity), 1)
+        self.dim = dim
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self.auto_compact = auto_compact
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._version = 0
+        # Taban: salt okunur satırlar [0, len(_base)); _matrix: sonraki satırların kuyruğu
+        self._base = np.empty((0, dim), dtype=np.float32)
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._sq_norms = np.zeros(capacity, dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._names: List[str] = []
+        self._positions: Dict[int, List[int]] = {}
+        self._size = 0
+        self._dead = 0
+        self._publish()
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Tuple[int, str, EncodingLike]],
+        dim: int = ENCODING_DIM
+    ) -> 'FaceGallery':
+        """(id, isim, kodlama) kayıtlarından galeri oluşturur; aynı ID birden çok şablon olabilir."""
+        records = sorted(records, key=lambda record: record[0])
+        gallery = cls(dim=dim, capacity=len(records))
+        for person_id, name, encoding in records:
+            gallery.add_template(person_id, encoding, name)
+        return gallery
+
+    @classmethod
+    def from_arrays(
+        cls,
+        matrix: np.ndarray,
+        sq_norms: np.ndarray,
+        ids: np.ndarray,
+        names: List[str]
+    ) -> 'FaceGallery':
+        """Hazır dizileri kopyalamadan sarar (ör. salt okunur np.memmap).
+
+        Matris taban segment olarak yerinde kalır; ilk yazmada yalnızca normlar
+        ve ID'ler (satır başına 12 bayt) belleğe kopyalanır.
+        """
+        gallery = cls(dim=matrix.shape[1], capacity=1)
+        gallery._base = matrix
+        gallery._matrix = np.zeros((0, matrix.shape[1]), dtype=np.float32)
+        gallery._sq_norms = sq_norms
+        gallery._ids = ids
+        gallery._names = list(names)
+        gallery._positions = _group_positions(ids)
+        gallery._size = len(names)
+        gallery._publish()
+        return gallery
+
+    def snapshot(self) -> GalleryView:
+        """Yayınlanmış en son değişmez görünümü döndürür (kilitsiz)."""
+        return self._view
+
+    def _publish(self):
+        """Mevcut durumu yeni bir görünüm olarak yayınlar; atama atomiktir."""
+        self._version += 1
+        base_rows = self._base.shape[0]
+        self._view = GalleryView(
+            dim=self.dim,
+            version=self._version,
+            generation=self.generation,
+            matrix=self._base[:base_rows],
+            tail=self._matrix[:self._size - base_rows],
+            sq_norms=self._sq_norms[:self._size],
+            ids=self._ids[:self._size],
+            names=self._names,
+            live=self._size - self._dead
+        )
+
+    def __len__(self) -> int:
+        """Galerideki canlı şablon (satır) sayısı."""
+        return self._size - self._dead
+
+    @property
+    def identity_count(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, person_id: int) -> bool:
+        return person_id in self._positions
+
+    @property
+    def capacity(self) -> int:
+        return self._base.shape[0] + self._matrix.shape[0]
+
+    @property
+    def row_count(self) -> int:
+        """Mezar taşları dahil kullanılan satır sayısı."""
+        return self._size
+
+    @property
+    def tombstones(self) -> int:
+        return self._dead
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Kullanılan satırların (N, dim) görünümü; ölü satırlar dahildir."""
+        return self._view.matrix
+
+    @property
+    def sq_norms(self) -> np.ndarray:
+        return self._view.sq_norms
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._view.ids
+
+    @property
+    def names(self) -> List[str]:
+        return self._view.names
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Satır başına canlılık maskesi."""
+        return self._view.alive
+
+    def name_at(self, position: int) -> str:
+        return self._names[position]
+
+    def positions_of(self, person_id: int) -> List[int]:
+        """Kişinin canlı şablon satırları."""
+        return list(self._positions.get(person_id, ()))
+
+    def position_of(self, person_id: int) -> Optional[int]:
+        positions = self._positions.get(person_id)
+        return positions[0] if positions else None
+
+    def name_of(self, person_id: int) -> Optional[str]:
+        position = self.position_of(person_id)
+        return self._names[position] if position is not None else None
+
+    def live_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        """Yalnızca canlı satırlardan oluşan (matris, normlar, ID'ler, isimler) döndürür."""
+        return self._view.live_arrays()
+
+    def distances(self, encodings) -> np.ndarray:
+        """Son yayınlanmış görünüm üzerinde (M, N) mesafe matrisini hesaplar."""
+        return self._view.distances(encodings)
+
+    def _grow(self, min_capacity: int):
+        """Kuyruğu iki katına çıkararak yeni dizilere taşır; eski görünümler eski dizileri tutar."""
+        base_rows = self._base.shape[0]
+        tail_rows = self._size - base_rows
+        tail_capacity = max(self._matrix.shape[0] * 2, min_capacity - base_rows, 1)
+        capacity = base_rows + tail_capacity
+        matrix = np.zeros((tail_capacity, self.dim), dtype=np.float32)
+        matrix[:tail_rows] = self._matrix[:tail_rows]
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._sq_norms, self._ids = matrix, sq_norms, ids
+
+    def _ensure_writable(self):
+        """Salt okunur normları ve ID'leri ilk değişiklikten önce belleğe kopyalar; taban matrise dokunmaz."""
+        if not self._sq_norms.flags.writeable:
+            self._sq_norms = np.array(self._sq_norms, dtype=np.float32)
+        if not self._ids.flags.writeable:
+            self._ids = np.array(self._ids, dtype=np.int64)
+
+    def _append_row(self, person_id: int, name: str, encoding: EncodingLike) -> int:
+        """Yeni satırı yayınlanmış görünümlerin kapsamı dışındaki boş kapasiteye yazar."""
+        vector = decode_encoding(encoding)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Kodlama boyutu {self.dim} olmalı, {vector.shape[0]} verildi")
+        self._ensure_writable()
+        if self._size == self.capacity:
+            self._grow(self._size + 1)
+        position = self._size
+        self._matrix[position - self._base.shape[0]] = vector
+        self._sq_norms[position] = np.dot(vector, vector)
+        self._ids[position] = person_id
+        self._names.append(name)
+        self._positions.setdefault(person_id, []).append(position)
+        self._size += 1
+        return position
+
+    def _tombstone(self, positions: List[int]):
+        """Satırları, normları kopyalayarak (copy-on-write) ölü işaretler."""
+        sq_norms = self._sq_norms.copy()
+        # Sonsuz norm, satırın tüm mesafelerini sonsuz yapar
+        sq_norms[positions] = np.inf
+        self._sq_norms = sq_norms
+        self._dead += len(positions)
+
+    def add(self, person_id: int, name: str, encoding: EncodingLike) -> int:
+        """Galeriye yeni bir kişi ekler ve satır indeksini döndürür."""
+        with self._lock:
+            if person_id in self._positions:
+                raise ValueError(f"ID {person_id} galeride zaten mevcut")
+            position = self._append_row(person_id, name, encoding)
+            self._publish()
+            return position
+
+    def add_template(self, person_id: int, encoding: EncodingLike, name: Optional[str] = None) -> int:
+        """Kişiye ek bir şablon ekler; kişi galeride yoksa `name` ile oluşturulur."""
+        with self._lock:
+            positions = self._positions.get(person_id)
+            if positions:
+                name = self._names[positions[0]] if name is None else name
+            elif name is None:
+                raise KeyError(person_id)
+            position = self._append_row(person_id, name, encoding)
+            self._publish()
+            return position
+
+    def replace(self, person_id: int, encoding: Optional[EncodingLike] = None, name: Optional[str] = None):
+        """Kişinin kodlamasını ve/veya adını günceller.
+
+        Yeni kodlama, eski satır mezar taşıyla işaretlenip sona eklenerek
+        yazılır; böylece yayınlanmış görünümlerdeki satırlar hiç değişmez.
+        """
+        with self._lock:
+            positions = self._positions.get(person_id)
+            if not positions:
+                raise KeyError(person_id)
+            name = self._names[positions[0]] if name is None else name
+            if encoding is not None:
+                # Tüm şablonlar tek yeni şablonla değiştirilir
+                self._ensure_writable()
+                self._tombstone(positions)
+                del self._positions[person_id]
+                self._append_row(person_id, name, encoding)
+                self._compact_if_needed()
+            elif name != self._names[positions[0]]:
+                names = list(self._names)
+                for position in positions:
+                    names[position] = name
+                self._names = names
+            self._publish()
+
+    def remove(self, person_id: int) -> bool:
+        """Kişinin tüm şablonlarını mezar taşıyla işaretler; gerekirse tamponu sıkıştırır."""
+        with self._lock:
+            positions = self._positions.pop(person_id, None)
+            if not positions:
+                return False
+            self._ensure_writable()
+            self._tombstone(positions)
+            self._compact_if_needed()
+            self._publish()
+            return True
+
+    def compact(self):
+        """Mezar taşlarını atarak canlı satırları yeni bir bitişik tampona taşır."""
+        with self._lock:
+            self._compact()
+            self._publish()
+
+    def _compact_if_needed(self):
+        if self.auto_compact and self._dead > max(self.compact_min, self.compact_ratio * self._size):
+            self._compact()
+
+    def _compact(self):
+        if self._dead == 0:
+            return
+        keep = np.flatnonzero(np.isfinite(self._sq_norms[:self._size]))
+        # Bir kişinin şablonları bitişik satırlara yerleşsin
+        keep = keep[np.argsort(self._ids[keep], kind='stable')]
+        count = keep.size
+        capacity = max(self.capacity // 2, count, 1)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        base_rows = self._base.shape[0]
+        in_base = keep < base_rows
+        matrix[:count][in_base] = self._base[keep[in_base]]
+        matrix[:count][~in_base] = self._matrix[keep[~in_base] - base_rows]
+        sq_norms[:count] = self._sq_norms[keep]
+        ids[:count] = self._ids[keep]
+        self._base = np.empty((0, self.dim), dtype=np.float32)
+        self._matrix, self._sq_norms, self._ids = matrix, sq_norms, ids
+        self._names = [self._names[i] for i in keep]
+        self._positions = _group_positions(ids[:count])
+        self._size = count
+        self._dead = 0
+        self.generation += 1
+
+
+def _group_positions(ids: np.ndarray) -> Dict[int, List[int]]:
+    """Kişi ID'si -> satır indeksleri eşlemesi oluşturur."""
+    positions: Dict[int, List[int]] = {}
+    for position, person_id in enumerate(ids.tolist()):
+        positions.setdefault(person_id, []).append(position)
+    return positions
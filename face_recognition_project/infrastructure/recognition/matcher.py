@@ -0,0 +1,135 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+from infrastructure.recognition.gallery import AGGREGATIONS, FaceGallery, GalleryView
+
+
+@dataclass
+class MatchResult:
+    position: Optional[int]
+    person_id: Optional[int]
+    name: Optional[str]
+    distance: float
+    margin: float
+    score: float
+
+    @property
+    def is_match(self) -> bool:
+        return self.person_id is not None
+
+
+class BatchMatcher:
+    """Bir karedeki tüm yüzleri galeriyle tek bir mesafe matrisi üzerinden eşleştirir.
+
+    Her yüz için en yakın kayıt (argmin), ikinci en yakın kayda olan fark
+    (margin) ve mesafeden türetilen kalibre edilmiş bir skor döndürülür.
+    Kişi başına birden fazla şablon varsa mesafeler kişi bazında
+    birleştirilir (`aggregate`: en yakın şablon 'min' ya da şablon ortalaması
+    'centroid') ve margin farklı bir kişiye göre hesaplanır.
+    """
+
+    def __init__(self, tolerance: float = 0.6, score_scale: float = 0.05, aggregate: str = 'min'):
+        if aggregate not in AGGREGATIONS:
+            raise ValueError(f"Desteklenmeyen birleştirme: {aggregate}")
+        self.tolerance = tolerance
+        self.score_scale = score_scale
+        self.aggregate = aggregate
+
+    def calibrate(self, distances: np.ndarray) -> np.ndarray:
+        """Mesafeyi toleransta 0.5 olan lojistik bir [0, 1] skoruna dönüştürür."""
+        z = (np.asarray(distances, dtype=np.float64) - self.tolerance) / self.score_scale
+        return 1.0 / (1.0 + np.exp(np.clip(z, -50.0, 50.0)))
+
+    def match(self, gallery: Union[FaceGallery, GalleryView], encodings, index=None,
+              rows: Optional[np.ndarray] = None) -> List[MatchResult]:
+        """(M yüz x N galeri) mesafe matrisini hesaplayıp her yüz için en iyi eşleşmeyi seçer.
+
+        `index` verilirse (ör. IVFIndex) tam tarama yerine indeksin en yakın
+        iki adayı kullanılır. `rows` verilirse (ör. GalleryPartitions.rows)
+        yalnızca bu satırlar taranır ve indeks kullanılmaz.
+        """
+        if len(encodings) == 0:
+            return []
+        # Mesafe, ID ve isimlerin aynı sürümden okunması için tek görünüm kullan
+        if isinstance(gallery, FaceGallery):
+            gallery = gallery.snapshot()
+        if rows is not None:
+            results = self.match(gallery.subset(rows), encodings)
+            for result in results:
+                if result.position is not None:
+                    # Alt küme konumunu galeri satırına çevir
+                    result.position = int(rows[result.position])
+            return results
+        if index is not None:
+            best_distances, best, margins = self._top2_from_index(gallery, index, encodings)
+        elif gallery.has_multiple_templates:
+            best_distances, best, margins = self._top2_identities(gallery, encodings, self.aggregate)
+        else:
+            # Tek şablonlu galeride kişi = satır; birleştirmeye gerek yok
+            best_distances, best, margins = self._top2_exact(gallery, encodings)
+        scores = self.calibrate(best_distances)
+
+        results = []
+        for position, distance, margin, score in zip(best, best_distances, margins, scores):
+            position = int(position)
+            if position >= 0 and distance <= self.tolerance:
+                results.append(MatchResult(
+                    position=position,
+                    person_id=int(gallery.ids[position]),
+                    name=gallery.name_at(position),
+                    distance=float(distance),
+                    margin=float(margin),
+                    score=float(score)
+                ))
+            else:
+                results.append(MatchResult(None, None, None, float(distance), float(margin), float(score)))
+        return results
+
+    @staticmethod
+    def _top2_exact(gallery: GalleryView, encodings) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return BatchMatcher._top2(gallery.distances(encodings))
+
+    @staticmethod
+    def _top2_identities(gallery: GalleryView, encodings,
+                         aggregate: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        distances, starts = gallery.identity_distances(encodings, aggregate)
+        best_distances, best_groups, margins = BatchMatcher._top2(distances)
+        # Grup indeksini kişinin ilk satırına çevir (ID ve isim oradan okunur)
+        order = gallery.identity_groups()[0]
+        return best_distances, order[starts[best_groups]], margins
+
+    @staticmethod
+    def _top2(distances: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        count, size = distances.shape
+        if size == 0:
+            return (np.full(count, np.inf), np.full(count, -1, dtype=np.int64),
+                    np.full(count, np.inf))
+        rows = np.arange(count)
+        if size == 1:
+            return distances[:, 0], np.zeros(count, dtype=np.int64), np.full(count, np.inf)
+        top2 = np.argpartition(distances, 1, axis=1)[:, :2]
+        top2_distances = distances[rows[:, None], top2]
+        order = np.argsort(top2_distances, axis=1)
+        best = top2[rows, order[:, 0]]
+        best_distances = top2_distances[rows, order[:, 0]]
+        margins = top2_distances[rows, order[:, 1]] - best_distances
+        return best_distances, best, margins
+
+    @staticmethod
+    def _top2_from_index(gallery: GalleryView, index, encodings,
+                         candidates: int = 4) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if gallery.has_multiple_templates:
+            # Aynı kişinin şablonları adayları doldurabilir; ikinci kişiyi bulmak için daha geniş ara
+            candidates *= 2
+        distances, positions = index.search(encodings, k=candidates)
+        # İndeks oluşturulduktan sonra silinen (mezar taşlı) satırları ele; yalnızca aday satırların normuna bakılır
+        valid = positions >= 0
+        valid[valid] = np.isfinite(gallery.sq_norms[positions[valid]])
+        distances = np.where(valid, distances, np.inf)
+        order = np.argsort(distances, axis=1)
+        distances = np.take_along_axis(distances, order, axis=1)
+        positions = np.take_along_axis(np.where(valid, positions, -1), order, axis=1)
+        # Margin, en yakın kişiden farklı bir kişinin en yakın şablonuna göre
+        ids = np.where(positions >= 0, gallery.ids[np.maximum(positions, 0)], -1)
+        others = np.where(ids != ids[:, :1], distances, np.inf)
+        return distances[:, 0], positions[:, 0], others.min(axis=1) - distances[:, 0]
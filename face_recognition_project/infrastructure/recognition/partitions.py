@@ -0,0 +1,94 @@
+import bisect
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from infrastructure.recognition.gallery import GalleryView
+
+# Kişi ID'si -> (departman, erişim seviyesi)
+AccessAttributes = Dict[int, Tuple[Optional[str], int]]
+
+
+@dataclass(frozen=True)
+class RecognitionFilter:
+    """Eşleştirmenin yapılacağı uygun kişi alt kümesi (ör. yalnızca seviye >= 3 personel)."""
+    departments: Optional[Tuple[str, ...]] = None
+    min_access_level: Optional[int] = None
+
+    @classmethod
+    def create(cls, departments: Optional[Iterable[str]] = None,
+               min_access_level: Optional[int] = None) -> 'RecognitionFilter':
+        return cls(tuple(sorted(set(departments))) if departments is not None else None, min_access_level)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.departments is None and self.min_access_level is None
+
+
+class GalleryPartitions:
+    """Bir galeri görünümü için önceden hesaplanmış departman ve erişim seviyesi bölümleri.
+
+    Canlı satırlar departman koduna göre sıralanıp tek bir permütasyonda
+    tutulur; her departman bu dizide bitişik bir aralıktır. Her erişim
+    seviyesi için "seviye >= L" satırları hem sıralı indeks dizisi hem de bit
+    maskesi olarak saklanır. Böylece filtreli aramanın maliyeti galerinin
+    tamamıyla değil uygun alt kümenin boyutuyla orantılıdır.
+    """
+
+    def __init__(self, view: GalleryView, attributes: AccessAttributes):
+        self.version = view.version
+        live = np.flatnonzero(view.alive)
+        self._live = live
+        unique_ids, inverse = np.unique(view.ids[live], return_inverse=True)
+        person_departments = [attributes.get(int(pid), (None, 0))[0] for pid in unique_ids]
+        person_levels = np.array([attributes.get(int(pid), (None, 0))[1] or 0 for pid in unique_ids],
+                                 dtype=np.int64)
+
+        # Departman aralıkları
+        names = sorted({d for d in person_departments if d is not None})
+        codes = {name: code for code, name in enumerate(names)}
+        person_codes = np.array([codes.get(d, -1) for d in person_departments], dtype=np.int64)
+        row_codes = person_codes[inverse] if live.size else np.empty(0, dtype=np.int64)
+        order = live[np.argsort(row_codes, kind='stable')]
+        starts = np.searchsorted(np.sort(row_codes), np.arange(len(names) + 1))
+        self._department_rows: Dict[str, np.ndarray] = {
+            name: order[starts[code]:starts[code + 1]] for name, code in codes.items()
+        }
+
+        # Erişim seviyesi bit maskeleri (seviye >= L)
+        row_levels = person_levels[inverse] if live.size else np.empty(0, dtype=np.int64)
+        self._levels = sorted(set(row_levels.tolist()))
+        self._level_rows: Dict[int, np.ndarray] = {}
+        self._level_masks: Dict[int, np.ndarray] = {}
+        for level in self._levels:
+            mask = np.zeros(view.row_count, dtype=bool)
+            mask[live[row_levels >= level]] = True
+            self._level_masks[level] = mask
+            self._level_rows[level] = np.flatnonzero(mask)
+
+    @property
+    def departments(self) -> Tuple[str, ...]:
+        return tuple(self._department_rows)
+
+    def _level_key(self, min_access_level: int) -> Optional[int]:
+        """İstenen seviyeyi karşılayan en küçük hesaplanmış seviye."""
+        index = bisect.bisect_left(self._levels, min_access_level)
+        return self._levels[index] if index < len(self._levels) else None
+
+    def rows(self, flt: RecognitionFilter) -> np.ndarray:
+        """Filtreye uyan canlı satırların artan sıralı indeksleri."""
+        level = None
+        if flt.min_access_level is not None:
+            level = self._level_key(flt.min_access_level)
+            if level is None:
+                return np.empty(0, dtype=np.int64)
+        if flt.departments is not None:
+            rows = np.sort(np.concatenate(
+                [self._department_rows[d] for d in flt.departments if d in self._department_rows]
+                or [np.empty(0, dtype=np.int64)]
+            ))
+            if level is not None:
+                rows = rows[self._level_masks[level][rows]]
+            return rows
+        if level is not None:
+            return self._level_rows[level]
+        return self._live
@@ -0,0 +1,234 @@
+import numpy as np
+from typing import List, Optional, Tuple, Union
+from infrastructure.recognition.gallery import ENCODING_DIM, FaceGallery, GalleryView, as_encoding_matrix
+
+QUANTIZATION_MODES = ('float16', 'int8')
+
+_CHUNK_ROWS = 65536
+
+
+class ScalarQuantizer:
+    """Her boyut için ayrı ölçekle float32 kodlamaları int8'e sıkıştırır."""
+
+    def __init__(self, dim: int = ENCODING_DIM):
+        self.dim = dim
+        self.scale = np.ones(dim, dtype=np.float32)
+        self.offset = np.zeros(dim, dtype=np.float32)
+
+    def fit(self, matrix: np.ndarray) -> 'ScalarQuantizer':
+        """Boyut başına min/max değerlerinden ölçek ve kaydırma hesaplar."""
+        matrix = as_encoding_matrix(matrix, self.dim)
+        low, high = matrix.min(axis=0), matrix.max(axis=0)
+        scale = (high - low) / 255.0
+        scale[scale == 0] = 1.0
+        self.scale = scale.astype(np.float32)
+        # Kodlar [-128, 127] aralığına ortalanır
+        self.offset = (low + 128.0 * scale).astype(np.float32)
+        return self
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        matrix = as_encoding_matrix(matrix, self.dim)
+        codes = np.rint((matrix - self.offset) / self.scale)
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale + self.offset
+
+
+class QuantizedGallery:
+    """Galeriyi float16 veya int8 kodlar halinde tutan sıkıştırılmış arama yapısı.
+
+    Sıkıştırılmış kodlarla yaklaşık mesafeler hesaplanıp `shortlist` kadar
+    aday seçilir; adaylar tam hassasiyetli kaynaktan (bellekteki matris ya
+    da diskten eşlenmiş bir dizi) okunarak kesin mesafeyle yeniden sıralanır.
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        sq_norms: np.ndarray,
+        ids: np.ndarray,
+        names: List[str],
+        full_precision,
+        mode: str,
+        quantizer: Optional[ScalarQuantizer] = None,
+        shortlist: int = 32,
+        alive: Optional[np.ndarray] = None
+    ):
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Desteklenmeyen sıkıştırma modu: {mode}")
+        if mode == 'int8' and quantizer is None:
+            raise ValueError("int8 modu için ScalarQuantizer gerekli")
+        self.codes = codes
+        self.sq_norms = sq_norms
+        self.ids = ids
+        self.names = names
+        self.full_precision = full_precision
+        self.mode = mode
+        self.quantizer = quantizer
+        self.shortlist = shortlist
+        self.alive = np.ones(codes.shape[0], dtype=bool) if alive is None else alive
+        if not self.alive.all():
+            # Mezar taşlı satırlar yaklaşık taramada hiçbir zaman öne geçmesin
+            self.sq_norms = np.where(self.alive, sq_norms, np.inf).astype(np.float32)
+        self.dim = codes.shape[1]
+        # Sıkıştırmadan sonra eklenen satırların tam hassasiyetli kopyası (küçük, bellekte)
+        self.appended = np.empty((0, self.dim), dtype=np.float32)
+
+    @classmethod
+    def from_gallery(
+        cls,
+        gallery: Union[FaceGallery, GalleryView],
+        mode: str = 'int8',
+        shortlist: int = 32,
+        full_precision=None
+    ) -> 'QuantizedGallery':
+        """FaceGallery içeriğini sıkıştırır; tam hassasiyet kaynağı verilmezse galeri matrisi kullanılır.
+
+        Galeri diskten eşlenmişse (snapshot) yeniden sıralama eşlenmiş dosyadan
+        okunur; bellekteki bir galeri için `full_precision` olarak diskteki
+        bir dizi verilmelidir, aksi halde float32 matris bellekte kalır.
+        Kodlama parça parça yapılır; tam matrisin geçici kopyası oluşmaz.
+        """
+        if isinstance(gallery, FaceGallery):
+            gallery = gallery.snapshot()
+        matrix = gallery.matrix if full_precision is None else full_precision
+        if matrix.shape[0] != gallery.row_count:
+            raise ValueError("Tam hassasiyet kaynağı galeriyle uyumsuz")
+        alive = gallery.alive
+        count = matrix.shape[0]
+        quantizer = None
+        if mode == 'int8':
+            quantizer = ScalarQuantizer(gallery.dim).fit(matrix)
+            codes = np.empty((count, gallery.dim), dtype=np.int8)
+        elif mode == 'float16':
+            codes = np.empty((count, gallery.dim), dtype=np.float16)
+        else:
+            raise ValueError(f"Desteklenmeyen sıkıştırma modu: {mode}")
+        sq_norms = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _CHUNK_ROWS):
+            stop = min(start + _CHUNK_ROWS, count)
+            chunk = as_encoding_matrix(matrix[start:stop], gallery.dim)
+            if quantizer is not None:
+                codes[start:stop] = quantizer.encode(chunk)
+                decoded = quantizer.decode(codes[start:stop])
+            else:
+                codes[start:stop] = chunk
+                decoded = codes[start:stop].astype(np.float32)
+            sq_norms[start:stop] = np.einsum('ij,ij->i', decoded, decoded)
+        # Mezar taşlı satırlar aday listesine hiç girmesin
+        sq_norms[~alive] = np.inf
+        return cls(
+            codes=codes,
+            sq_norms=sq_norms,
+            ids=gallery.ids.copy(),
+            names=list(gallery.names),
+            full_precision=matrix,
+            mode=mode,
+            quantizer=quantizer,
+            shortlist=shortlist,
+            alive=alive
+        )
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    def extend(self, gallery: GalleryView) -> bool:
+        """Sıkıştırmadan sonra galeriye eklenen satırları mevcut ölçekle kodlayıp sona ekler.
+
+        Satır sırası galeriyle aynı kalır; yeni satırların tam hassasiyetli
+        kodlamaları yeniden sıralama için `appended` içinde tutulur.
+        """
+        positions = np.arange(len(self), gallery.row_count, dtype=np.int64)
+        if positions.size == 0:
+            return True
+        rows = as_encoding_matrix(gallery.rows(positions), self.dim)
+        if self.quantizer is not None:
+            # Ölçek dışındaki değerler kırpılır; yeniden sıralama kesin mesafeyi verir
+            codes = self.quantizer.encode(rows)
+            decoded = self.quantizer.decode(codes)
+        else:
+            codes = rows.astype(np.float16)
+            decoded = codes.astype(np.float32)
+        alive = gallery.alive[positions]
+        sq_norms = np.einsum('ij,ij->i', decoded, decoded)
+        sq_norms[~alive] = np.inf
+        self.codes = np.concatenate((self.codes, codes))
+        self.sq_norms = np.concatenate((self.sq_norms, sq_norms))
+        self.ids = np.concatenate((self.ids, gallery.ids[positions]))
+        self.names = self.names + [gallery.name_at(int(position)) for position in positions]
+        self.alive = np.concatenate((self.alive, alive))
+        self.appended = np.concatenate((self.appended, rows))
+        return True
+
+    def _exact_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Sıralı satırların tam hassasiyetli kodlamaları (eşlenmiş kaynak + sonradan eklenenler)."""
+        split = self.full_precision.shape[0]
+        cut = np.searchsorted(rows, split)
+        exact = np.asarray(self.full_precision[rows[:cut]], dtype=np.float32)
+        if cut == rows.size:
+            return exact
+        return np.concatenate((exact, self.appended[rows[cut:] - split]))
+
+    def name_at(self, position: int) -> str:
+        return self.names[position]
+
+    @property
+    def nbytes(self) -> int:
+        """Bellekte tutulan kod, norm ve ID dizilerinin toplam boyutu."""
+        return self.codes.nbytes + self.sq_norms.nbytes + self.ids.nbytes
+
+    def _approximate_scores(self, queries: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """Bir satır aralığı için ||x̂||² - 2 q·x̂ değerlerini hesaplar (||q||² sıralamayı etkilemez)."""
+        chunk = self.codes[start:stop].astype(np.float32)
+        if self.mode == 'int8':
+            # q·x̂ = (q * scale)·c + q·offset
+            dots = chunk @ (queries * self.quantizer.scale).T
+            dots += queries @ self.quantizer.offset
+        else:
+            dots = chunk @ queries.T
+        dots *= -2.0
+        dots += self.sq_norms[start:stop, None]
+        return dots.T
+
+    def _shortlist(self, queries: np.ndarray, size: int) -> np.ndarray:
+        """Sıkıştırılmış kodlar üzerinde parça parça tarama yaparak her sorgu için aday satırları seçer."""
+        count = queries.shape[0]
+        best_scores = np.empty((count, 0), dtype=np.float32)
+        best_rows = np.empty((count, 0), dtype=np.int64)
+        for start in range(0, len(self), _CHUNK_ROWS):
+            stop = min(start + _CHUNK_ROWS, len(self))
+            scores = np.concatenate([best_scores, self._approximate_scores(queries, start, stop)], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, stop), (count, stop - start))], axis=1)
+            if scores.shape[1] > size:
+                top = np.argpartition(scores, size - 1, axis=1)[:, :size]
+                scores = np.take_along_axis(scores, top, axis=1)
+                rows = np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+        return best_rows
+
+    def search(self, encodings, k: int = 1, shortlist: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """IVFIndex.search ile aynı biçimde en yakın k satırı döndürür."""
+        queries = as_encoding_matrix(encodings, self.dim)
+        count = queries.shape[0]
+        out_distances = np.full((count, k), np.inf, dtype=np.float32)
+        out_positions = np.full((count, k), -1, dtype=np.int64)
+        if len(self) == 0:
+            return out_distances, out_positions
+
+        candidates = self._shortlist(queries, max(shortlist or self.shortlist, k))
+        for row in range(count):
+            # Canlı satır sayısı aday listesinden azsa listeye mezar taşlı satırlar da girer; elenir
+            rows = candidates[row]
+            rows = rows[self.alive[rows]]
+            if rows.size == 0:
+                continue
+            # Diskten eşlenmiş kaynaklarda sıralı okuma için adayları sırala
+            rows = np.sort(rows)
+            exact = self._exact_rows(rows)
+            distances = np.linalg.norm(exact - queries[row], axis=1)
+            take = min(k, rows.size)
+            top = np.argsort(distances)[:take]
+            out_distances[row, :take] = distances[top]
+            out_positions[row, :take] = rows[top]
+        return out_distances, out_positions
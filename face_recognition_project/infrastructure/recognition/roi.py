@@ -0,0 +1,93 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Location = Tuple[int, int, int, int]
+Polygon = Sequence[Sequence[float]]
+
+
+def _inside(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Işın atma yöntemiyle (N, 2) noktaların çokgen içinde olup olmadığı."""
+    x, y = points[:, 0:1], points[:, 1:2]
+    x0, y0 = polygon[:, 0], polygon[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    crosses = (y0 > y) != (y1 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return ((crosses & (x < x_cross)).sum(axis=1) % 2) == 1
+
+
+def intersect_regions(regions: List[Location], boxes: List[Location]) -> List[Location]:
+    """(top, right, bottom, left) bölgelerin kutularla boş olmayan kesişimleri."""
+    clipped = []
+    for top, right, bottom, left in regions:
+        for b_top, b_right, b_bottom, b_left in boxes:
+            box = (max(top, b_top), min(right, b_right), min(bottom, b_bottom), max(left, b_left))
+            if box[0] < box[2] and box[3] < box[1]:
+                clipped.append(box)
+    return clipped
+
+
+class RegionOfInterest:
+    """Bir kameranın ilgi alanı çokgenleri; tespit yalnızca çokgenlerin sınırlayıcı kutularında yapılır.
+
+    Köşeler (x, y) olarak verilir; tüm değerler 1'den küçük ya da eşitse
+    kare boyutuna göre oransal kabul edilir, aksi halde pikseldir. Kutu
+    içinde kalan ama çokgen dışında merkezlenen yüzler `filter` ile atılır;
+    böylece kare maskelemek için kopya gerekmez.
+    """
+
+    def __init__(self, polygons: List[Polygon]):
+        self.polygons = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in polygons]
+        if any(len(polygon) < 3 for polygon in self.polygons):
+            raise ValueError("İlgi alanı çokgeni en az 3 köşe içermeli")
+        self.normalized = all(polygon.max() <= 1.0 for polygon in self.polygons)
+        self._cache: Dict[Tuple[int, int], Tuple[List[np.ndarray], List[Location]]] = {}
+
+    @classmethod
+    def from_config(cls, rois: Dict[str, List[Polygon]], source) -> Optional['RegionOfInterest']:
+        """Config.get_camera_rois() eşlemesinden kaynağın ilgi alanı; tanımlı değilse None."""
+        polygons = rois.get(str(source))
+        return cls(polygons) if polygons else None
+
+    def _resolve(self, shape: Tuple[int, ...]) -> Tuple[List[np.ndarray], List[Location]]:
+        """Kare boyutuna göre piksel çokgenleri ve sınırlayıcı kutuları (boyut başına bir kez)."""
+        height, width = shape[:2]
+        cached = self._cache.get((height, width))
+        if cached is None:
+            scale = np.array([width, height], dtype=np.float64) if self.normalized else 1.0
+            polygons = [polygon * scale for polygon in self.polygons]
+            boxes = []
+            for polygon in polygons:
+                left, top = np.floor(polygon.min(axis=0)).astype(int)
+                right, bottom = np.ceil(polygon.max(axis=0)).astype(int)
+                box = (max(top, 0), min(right, width), min(bottom, height), max(left, 0))
+                if box[0] < box[2] and box[3] < box[1]:
+                    boxes.append(box)
+            cached = self._cache[(height, width)] = (polygons, boxes)
+        return cached
+
+    def boxes(self, shape: Tuple[int, ...]) -> List[Location]:
+        return list(self._resolve(shape)[1])
+
+    def coverage(self, shape: Tuple[int, ...]) -> float:
+        """Taranacak piksel oranı (kutular örtüşmüyorsa kesin, örtüşüyorsa üst sınır)."""
+        height, width = shape[:2]
+        area = sum((bottom - top) * (right - left) for top, right, bottom, left in self.boxes(shape))
+        return min(area / float(height * width), 1.0)
+
+    def restrict(self, regions: Optional[List[Location]], shape: Tuple[int, ...]) -> List[Location]:
+        """Bölgeleri ilgi alanı kutularıyla sınırlar; bölge verilmezse kutuların kendisi döner."""
+        boxes = self.boxes(shape)
+        return boxes if regions is None else intersect_regions(regions, boxes)
+
+    def filter(self, locations: List[Location], shape: Tuple[int, ...]) -> List[Location]:
+        """Merkezi hiçbir çokgenin içinde olmayan yüz kutularını atar."""
+        if not locations:
+            return []
+        polygons = self._resolve(shape)[0]
+        boxes = np.asarray(locations, dtype=np.float64)
+        centers = np.stack([(boxes[:, 1] + boxes[:, 3]) / 2, (boxes[:, 0] + boxes[:, 2]) / 2], axis=1)
+        keep = np.zeros(len(locations), dtype=bool)
+        for polygon in polygons:
+            keep |= _inside(centers, polygon)
+        return [location for location, inside in zip(locations, keep) if inside]
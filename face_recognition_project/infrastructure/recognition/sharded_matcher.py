@@ -0,0 +1,194 @@
+import logging
+import multiprocessing
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+from infrastructure.recognition.gallery import ENCODING_DIM, as_encoding_matrix
+
+logger = logging.getLogger(__name__)
+
+# İşçi sürecinde paylaşılan bellek bloklarına bağlanmış diziler
+_worker_state = {}
+
+
+def _attach_worker(matrix_name: str, norms_name: str, rows: int, dim: int):
+    """İşçi süreci başlatıcısı: galeri bloklarına kopyasız bağlanır."""
+    matrix_block = shared_memory.SharedMemory(name=matrix_name)
+    norms_block = shared_memory.SharedMemory(name=norms_name)
+    _worker_state['blocks'] = (matrix_block, norms_block)
+    _worker_state['matrix'] = np.ndarray((rows, dim), dtype=np.float32, buffer=matrix_block.buf)
+    _worker_state['sq_norms'] = np.ndarray((rows,), dtype=np.float32, buffer=norms_block.buf)
+
+
+def _search_shard(start: int, stop: int, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Bir parçanın (start:stop satırları) içindeki en yakın k satırı döndürür."""
+    matrix = _worker_state['matrix'][start:stop]
+    sq_norms = _worker_state['sq_norms'][start:stop]
+    # ||q||² sıralamayı etkilemez; birleştirmeden önce eklenir
+    squared = queries @ matrix.T
+    squared *= -2.0
+    squared += sq_norms[None, :]
+    take = min(k, stop - start)
+    top = np.argpartition(squared, take - 1, axis=1)[:, :take] if take < stop - start else \
+        np.broadcast_to(np.arange(take), (queries.shape[0], take))
+    scores = np.take_along_axis(squared, top, axis=1)
+    return scores, top + start
+
+
+class ShardedGalleryIndex:
+    """Galeriyi paylaşılan belleğe koyup satır aralıklarına bölen süreç havuzlu arama yapısı.
+
+    Galeri matrisi ve normlar tek bir `multiprocessing.shared_memory` bloğuna
+    kopyalanır; işçi süreçler bu bloğa kopyasız bağlanır. Sorgu her parçaya
+    dağıtılır (scatter), parçaların en yakın k sonucu birleştirilir (gather).
+    `IVFIndex.search` ile aynı biçimde sonuç döndürdüğü için
+    `BatchMatcher.match(..., index=...)` ile kullanılabilir.
+
+    İşçilerde BLAS tek iş parçacıklı çalışmalıdır (ör. OPENBLAS_NUM_THREADS=1);
+    aksi halde süreçler çekirdekler için yarışır.
+
+    Bloklar `reserve` oranında boş kapasiteyle ayrılır; sonradan eklenen
+    satırlar havuz yeniden kurulmadan son parçaya yazılır.
+    """
+
+    def __init__(self, workers: Optional[int] = None, shards: Optional[int] = None, dim: int = ENCODING_DIM,
+                 reserve: float = 0.25):
+        self.workers = workers or os.cpu_count() or 1
+        self.shards = shards or self.workers
+        self.dim = dim
+        self.reserve = reserve
+        self.bounds: List[Tuple[int, int]] = []
+        self._rows = 0
+        self._capacity = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._sq_norms: Optional[np.ndarray] = None
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def is_built(self) -> bool:
+        return self._pool is not None
+
+    def build(self, matrix: np.ndarray, sq_norms: Optional[np.ndarray] = None) -> 'ShardedGalleryIndex':
+        """Matrisi paylaşılan belleğe kopyalar ve işçi havuzunu başlatır.
+
+        `sq_norms` verilirse (ör. galeri görünümünden) mezar taşlı satırların
+        sonsuz normu korunur ve bu satırlar hiçbir sonuçta yer almaz.
+        """
+        self.close()
+        matrix = as_encoding_matrix(matrix, self.dim)
+        rows = matrix.shape[0]
+        if rows == 0:
+            raise ValueError("Boş galeri üzerinde indeks oluşturulamaz")
+        if sq_norms is None:
+            sq_norms = np.einsum('ij,ij->i', matrix, matrix)
+
+        capacity = rows + int(rows * self.reserve)
+        matrix_block = shared_memory.SharedMemory(create=True, size=capacity * self.dim * 4)
+        norms_block = shared_memory.SharedMemory(create=True, size=capacity * 4)
+        self._blocks = [matrix_block, norms_block]
+        self._matrix = np.ndarray((capacity, self.dim), dtype=np.float32, buffer=matrix_block.buf)
+        self._sq_norms = np.ndarray((capacity,), dtype=np.float32, buffer=norms_block.buf)
+        self._matrix[:rows] = matrix
+        self._sq_norms[:rows] = sq_norms
+        self._sq_norms[rows:] = np.inf
+        self._rows, self._capacity = rows, capacity
+
+        edges = np.linspace(0, rows, min(self.shards, rows) + 1).astype(np.int64)
+        self.bounds = [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+        # fork ile başlayan süreçler üst sürecin kilit durumunu devralabilir; spawn kullan
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_attach_worker,
+            initargs=(matrix_block.name, norms_block.name, capacity, self.dim)
+        )
+        logger.info(f"Parçalı galeri oluşturuldu: {rows} kayıt, {len(self.bounds)} parça, {self.workers} işçi")
+        return self
+
+    def extend(self, gallery) -> bool:
+        """Galeriye sonradan eklenen satırları paylaşılan bloğa yazıp son parçayı uzatır.
+
+        Boş kapasite yetmezse False döner; indeks yeniden kurulmalıdır.
+        """
+        if not self.is_built:
+            return False
+        rows = gallery.row_count
+        if rows <= self._rows:
+            return True
+        if rows > self._capacity:
+            return False
+        positions = np.arange(self._rows, rows, dtype=np.int64)
+        # Önce satırlar yazılır, sonra sınır uzatılır; eşzamanlı aramalar yarım satır görmez
+        self._matrix[self._rows:rows] = as_encoding_matrix(gallery.rows(positions), self.dim)
+        self._sq_norms[self._rows:rows] = gallery.sq_norms[positions]
+        start, _ = self.bounds[-1]
+        self.bounds[-1] = (start, rows)
+        self._rows = rows
+        return True
+
+    def search(self, encodings, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Tüm parçalarda en yakın k satırı bulup birleştirir.
+
+        Returns:
+            (M, k) mesafe matrisi ve (M, k) galeri satır indeksleri; yeterli
+            aday yoksa mesafe inf, indeks -1 olur.
+        """
+        if not self.is_built:
+            raise RuntimeError("Parçalı galeri henüz oluşturulmadı")
+        queries = as_encoding_matrix(encodings, self.dim)
+        count = queries.shape[0]
+        futures = [self._pool.submit(_search_shard, start, stop, queries, k) for start, stop in self.bounds]
+        parts = [future.result() for future in futures]
+        scores = np.concatenate([part[0] for part in parts], axis=1)
+        positions = np.concatenate([part[1] for part in parts], axis=1)
+
+        take = min(k, scores.shape[1])
+        top = np.argpartition(scores, take - 1, axis=1)[:, :take] if take < scores.shape[1] else \
+            np.broadcast_to(np.arange(take), (count, take))
+        scores = np.take_along_axis(scores, top, axis=1)
+        positions = np.take_along_axis(positions, top, axis=1)
+        order = np.argsort(scores, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        positions = np.take_along_axis(positions, order, axis=1)
+
+        scores += np.einsum('ij,ij->i', queries, queries)[:, None]
+        np.maximum(scores, 0.0, out=scores)
+        out_distances = np.full((count, k), np.inf, dtype=np.float32)
+        out_positions = np.full((count, k), -1, dtype=np.int64)
+        out_distances[:, :take] = np.sqrt(scores)
+        out_positions[:, :take] = np.where(np.isfinite(scores), positions, -1)
+        return out_distances, out_positions
+
+    def close(self):
+        """İşçi havuzunu kapatır ve paylaşılan bellek bloklarını serbest bırakır."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        # Bloklara bakan diziler bırakılmadan bloklar kapatılamaz
+        self._matrix = self._sq_norms = None
+        for block in self._blocks:
+            try:
+                block.close()
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+        self._rows = self._capacity = 0
+
+    def __enter__(self) -> 'ShardedGalleryIndex':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
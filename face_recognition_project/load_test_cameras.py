@@ -0,0 +1,72 @@
+import argparse
+import itertools
+import logging
+import time
+
+from config.settings import Config
+from infrastructure.recognition.detection import ScaledFaceDetector
+from infrastructure.recognition.gallery import FaceGallery
+from infrastructure.recognition.matcher import BatchMatcher
+from services.camera_manager import CameraManager, replay_opener
+from services.face_tracker import FaceTracker
+from services.motion_detector import MotionDetector
+
+# Logging ayarları
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def run_load_test(videos, streams, seconds, detect_workers, encode_workers, fps=None):
+    """Video dosyalarını sahte kamera olarak oynatıp akış başına işlenen kare hızını ölçer."""
+    detector = ScaledFaceDetector(Config.DETECTION_SCALE, Config.FACE_DETECTION_MODEL)
+    gallery = FaceGallery()
+    matcher = BatchMatcher(tolerance=Config.FACE_RECOGNITION_TOLERANCE)
+    manager = CameraManager(
+        detect=detector.detect_regions,
+        encode=detector.encode,
+        match=lambda encodings: matcher.match(gallery.snapshot(), encodings),
+        tracker_factory=FaceTracker,
+        gate_factory=lambda: MotionDetector().detect,
+        opener=replay_opener(fps),
+        detect_workers=detect_workers,
+        encode_workers=encode_workers
+    )
+    for i, video in zip(range(streams), itertools.cycle(videos)):
+        manager.add_stream(video, f"kamera-{i:02d}")
+
+    logger.info(f"{streams} akış, {detect_workers} tespit / {encode_workers} kodlama işçisiyle başlatılıyor")
+    manager.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        manager.stop()
+
+    stats = manager.stats()
+    print(f"{'akış':>10} {'kare/sn':>9} {'atılan':>8} {'boşta':>8} {'yeniden':>8}")
+    for stream_id, stream in stats['streams'].items():
+        print(f"{stream_id:>10} {stream['frames'] / seconds:>9.1f} {stream['dropped']:>8} "
+              f"{stream['idle']:>8} {stream['reconnects']:>8}")
+    for stage in CameraManager.STAGES:
+        print(f"{stage:>10}: {stats[stage]['count']} kare, ortalama {stats[stage]['mean_ms']:.1f} ms")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yerel videoları sahte kamera olarak oynatan çoklu akış yük testi")
+    parser.add_argument('videos', nargs='+', help="Sırayla akışlara dağıtılacak video dosyaları")
+    parser.add_argument('--streams', type=int, default=40, help="Sahte kamera sayısı")
+    parser.add_argument('--seconds', type=float, default=30.0)
+    parser.add_argument('--detect-workers', type=int, default=4)
+    parser.add_argument('--encode-workers', type=int, default=2)
+    parser.add_argument('--fps', type=float, default=None, help="Varsayılan: dosyanın kendi FPS'i")
+    args = parser.parse_args()
+
+    run_load_test(args.videos, args.streams, args.seconds, args.detect_workers, args.encode_workers, args.fps)
+
+
+if __name__ == '__main__':
+    main()
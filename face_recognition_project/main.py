@@ -3,7 +3,7 @@ import os
 from PyQt5.QtWidgets import QApplication
 from gui.main_window import MainWindow
 from config.settings import Config
-from database.models import Base
+from database.models import Base, migrate_schema
 from sqlalchemy import create_engine
 import dlib
 import logging
@@ -77,6 +77,7 @@ def main():
         
         engine = create_engine(f"sqlite:///{db_path}")
         Base.metadata.create_all(engine)
+        migrate_schema(engine)
         logger.info("Veritabanı bağlantısı başarılı")
 
         # GUI başlat
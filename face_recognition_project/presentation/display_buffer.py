@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+Location = Tuple[int, int, int, int]
+Overlay = Tuple[Location, str, Tuple[int, int, int]]
+
+
+class DisplayBuffer:
+    """Kareyi gösterim boyutuna tek adımda küçültüp RGB'ye çeviren, yeniden kullanılan tampon.
+
+    Tamponlar yalnızca kaynak ya da hedef boyut değiştiğinde ayrılır; her
+    karede yalnızca küçük kopya üzerinde renk dönüşümü yapılır. Kutular ve
+    isimler (`overlays`, kare koordinatlarında, RGB renkle) gösterim
+    tamponuna çizilir; analiz karesi hiç değiştirilmez. `generation` tampon
+    yeniden ayrıldığında artar; arayüzler onu saran QImage/PhotoImage
+    nesnesini yalnızca o zaman yeniden oluşturur.
+    """
+
+    def __init__(self):
+        self.buffer: Optional[np.ndarray] = None
+        self.scale = 1.0
+        self.generation = 0
+        self._scaled: Optional[np.ndarray] = None
+        self._key = None
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Gösterim tamponunun (genişlik, yükseklik) boyutu."""
+        return (0, 0) if self.buffer is None else (self.buffer.shape[1], self.buffer.shape[0])
+
+    def _allocate(self, shape: Tuple[int, ...], width: int, height: int):
+        key = (shape[0], shape[1], width, height)
+        if key == self._key:
+            return
+        frame_height, frame_width = shape[:2]
+        # En-boy oranı korunur; hedef alana sığan en büyük boyut
+        self.scale = min(width / frame_width, height / frame_height)
+        size = (max(int(frame_width * self.scale), 1), max(int(frame_height * self.scale), 1))
+        self._scaled = np.empty((size[1], size[0], 3), dtype=np.uint8) if size != (frame_width, frame_height) else None
+        self.buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self.generation += 1
+        self._key = key
+
+    def render(self, frame: np.ndarray, width: int, height: int,
+               overlays: Sequence[Overlay] = ()) -> np.ndarray:
+        """BGR kareyi (width, height) alanına sığdırıp RGB tampona yazar ve katmanları çizer."""
+        self._allocate(frame.shape, max(int(width), 1), max(int(height), 1))
+        source = frame
+        if self._scaled is not None:
+            interpolation = cv2.INTER_AREA if self.scale < 1 else cv2.INTER_LINEAR
+            cv2.resize(frame, self.size, dst=self._scaled, interpolation=interpolation)
+            source = self._scaled
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self.buffer)
+
+        for (top, right, bottom, left), label, color in overlays:
+            p1 = (int(left * self.scale), int(top * self.scale))
+            p2 = (int(right * self.scale), int(bottom * self.scale))
+            cv2.rectangle(self.buffer, p1, p2, color, 2)
+            cv2.putText(self.buffer, label, (p1[0], p1[1] - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        return self.buffer
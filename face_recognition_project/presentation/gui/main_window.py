@@ -2,10 +2,17 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from PIL import Image, ImageTk
 import cv2
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
+from sqlalchemy.orm import sessionmaker
 from application.services.recognition_service import RecognitionService
+from config.settings import Config
+from infrastructure.persistence.log_writer import RecognitionLogWriter
+from infrastructure.persistence.repositories import log_batch_writer
+from presentation.display_buffer import DisplayBuffer
 
 class MainWindow:
     def __init__(self, recognition_service: RecognitionService):
@@ -21,7 +28,34 @@ class MainWindow:
         self.camera_active = False
         self.cap: Optional[cv2.VideoCapture] = None
         
+        # Gösterim ve tanıma ayrı döngülerde; gösterim son tanıma sonucunu katman olarak çizer
+        self.display = DisplayBuffer()
+        self.display_size = (800, 600)
+        self.frame = None
+        self.overlays = []
+        self.photo: Optional[ImageTk.PhotoImage] = None
+        self._photo_generation = None
+        
+        # Tanıma ayrı iş parçacığında çalışır; sonuçlar kilitli tek yuvaya bırakılır ve
+        # Tk döngüsü (update_camera) tarafından alınır. Tk bileşenlerine yalnızca ana iş parçacığı dokunur.
+        self._recognition_thread: Optional[threading.Thread] = None
+        self._results_lock = threading.Lock()
+        self._pending_results = None
+        self._pending_error: Optional[str] = None
+        self._owned_log_writer: Optional[RecognitionLogWriter] = None
+        if self.recognition_service.log_writer is None:
+            # Tanıma iş parçacığı ana iş parçacığının SQLite oturumunu kullanmasın
+            engine = self.recognition_service.log_repository.session.get_bind()
+            self._owned_log_writer = RecognitionLogWriter(
+                log_batch_writer(sessionmaker(bind=engine)),
+                batch_size=Config.LOG_BATCH_SIZE,
+                flush_interval=Config.LOG_FLUSH_INTERVAL,
+                max_queue=Config.LOG_QUEUE_SIZE
+            ).start()
+            self.recognition_service.log_writer = self._owned_log_writer
+        
         self.setup_gui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         
     def setup_gui(self):
         """GUI bileşenlerini oluşturur."""
@@ -70,49 +104,41 @@ class MainWindow:
                 self.camera_active = True
                 self.status_var.set("Kamera aktif")
                 self.update_camera()
+                self.start_recognition()
             except Exception as e:
                 self.logger.error(f"Kamera başlatılırken hata: {str(e)}")
                 messagebox.showerror("Hata", str(e))
         else:
             self.camera_active = False
+            self.stop_recognition()
             if self.cap:
                 self.cap.release()
+            self.frame = None
+            self.overlays = []
             self.status_var.set("Kamera kapalı")
             
     def update_camera(self):
-        """Kamera görüntüsünü günceller ve yüz tanıma yapar."""
+        """Kamera görüntüsünü günceller; tanıma sonucunu beklemeden son katmanları çizer."""
         if self.camera_active:
             try:
                 ret, frame = self.cap.read()
                 if ret:
-                    # Yüz tanıma yap
-                    results = self.recognition_service.recognize_face(frame)
-                    
-                    # Sonuçları görüntüle
-                    self.display_results(results)
+                    # Kamera her karede yeni dizi döndürür; tanıma iş parçacığı referansı güvenle okur
+                    self.frame = frame
+                    self.apply_recognition_results()
                     
-                    # Yüzleri çerçevele
-                    for result in results:
-                        top, right, bottom, left = result['location']
-                        name = result['name']
-                        confidence = result['confidence']
-                        
-                        # Renk seçimi (tanınan/tanınmayan)
-                        color = (0, 255, 0) if result['person_id'] else (0, 0, 255)
-                        
-                        # Çerçeve ve isim
-                        cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
-                        cv2.putText(frame, f"{name} ({confidence:.2f})",
-                                  (left, top - 10), cv2.FONT_HERSHEY_SIMPLEX,
-                                  0.75, color, 2)
-                    
-                    # Görüntüyü göster
-                    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                    photo = ImageTk.PhotoImage(image=image)
-                    self.camera_label.configure(image=photo)
-                    self.camera_label.image = photo
+                    # Küçültme ve RGB dönüşümü yeniden kullanılan tampona; kamera karesi değişmez
+                    rgb_frame = self.display.render(frame, *self.display_size, overlays=self.overlays)
+                    image = Image.frombuffer('RGB', self.display.size, rgb_frame, 'raw', 'RGB', 0, 1)
+                    if self._photo_generation != self.display.generation:
+                        # PhotoImage yalnızca tampon boyutu değiştiğinde oluşturulur
+                        self.photo = ImageTk.PhotoImage(image=image)
+                        self.camera_label.configure(image=self.photo)
+                        self._photo_generation = self.display.generation
+                    else:
+                        self.photo.paste(image)
                 
-                self.root.after(10, self.update_camera)
+                self.root.after(30, self.update_camera)
                 
             except Exception as e:
                 self.logger.error(f"Kamera güncellenirken hata: {str(e)}")
@@ -121,6 +147,59 @@ class MainWindow:
                     self.cap.release()
                 self.status_var.set(f"Hata: {str(e)}")
                 
+    def start_recognition(self):
+        """Tanıma iş parçacığını başlatır."""
+        if self._recognition_thread is None or not self._recognition_thread.is_alive():
+            self._recognition_thread = threading.Thread(
+                target=self.recognition_loop, name='tk-recognition', daemon=True
+            )
+            self._recognition_thread.start()
+    
+    def stop_recognition(self):
+        """Tanıma iş parçacığının (varsa süren tanımayı bitirip) durmasını bekler."""
+        if self._recognition_thread is not None:
+            self._recognition_thread.join(timeout=5.0)
+            self._recognition_thread = None
+        with self._results_lock:
+            self._pending_results, self._pending_error = None, None
+    
+    def recognition_loop(self):
+        """Son kamera karesinde yüz tanıma yapar; Tk döngüsünü bloklamadan FRAME_INTERVAL aralıkla çalışır."""
+        while self.camera_active:
+            started = time.monotonic()
+            frame = self.frame
+            if frame is not None:
+                try:
+                    results = self.recognition_service.recognize_face(frame)
+                    with self._results_lock:
+                        self._pending_results = results
+                except Exception as e:
+                    self.logger.error(f"Yüz tanıma sırasında hata: {str(e)}")
+                    with self._results_lock:
+                        self._pending_error = str(e)
+            time.sleep(max(Config.FRAME_INTERVAL - (time.monotonic() - started), 0.005))
+    
+    def apply_recognition_results(self):
+        """İş parçacığının bıraktığı son sonucu (varsa) sonuç paneline ve katmanlara aktarır."""
+        with self._results_lock:
+            results, error = self._pending_results, self._pending_error
+            self._pending_results, self._pending_error = None, None
+        if error is not None:
+            self.status_var.set(f"Hata: {error}")
+        if results is None:
+            return
+        
+        # Sonuçları görüntüle
+        self.display_results(results)
+        
+        # Kutular gösterim tamponuna RGB renkle (tanınan yeşil, tanınmayan kırmızı) çizilir
+        self.overlays = [
+            (result['location'],
+             f"{result['name']} ({result['confidence']:.2f})",
+             (0, 255, 0) if result['person_id'] else (255, 0, 0))
+            for result in results
+        ]
+                
     def display_results(self, results: list):
         """Tanıma sonuçlarını gösterir."""
         self.results_text.delete(1.0, tk.END)
@@ -304,6 +383,17 @@ class MainWindow:
         
         text.configure(state="disabled")
         
+    def close(self):
+        """Kamerayı ve tanıma iş parçacığını durdurur, bekleyen logları yazıp pencereyi kapatır."""
+        self.camera_active = False
+        self.stop_recognition()
+        if self.cap:
+            self.cap.release()
+        if self._owned_log_writer is not None:
+            self._owned_log_writer.close()
+            self.recognition_service.log_writer = None
+        self.root.destroy()
+        
     def run(self):
         """Uygulamayı başlatır."""
         self.root.mainloop() 
\ No newline at end of file
@@ -1,7 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-from database.models import FaceRecognitionLog
+from database.models import PresenceSession
 import logging
 
 
@@ -15,11 +15,12 @@ class ReportGenerator:
             if not date:
                 date = datetime.now()
 
-            # Günlük tanıma istatistikleri
+            # Günlük tanıma istatistikleri; tanımalar artık kare başına log yerine
+            # varlık oturumları olarak yazılır
             daily_stats = self.session.query(
-                FaceRecognitionLog
+                PresenceSession
             ).filter(
-                FaceRecognitionLog.timestamp >= date.date()
+                PresenceSession.first_seen >= date.date()
             ).all()
 
             return self.create_report(daily_stats)
@@ -27,19 +28,50 @@ class ReportGenerator:
             self.logger.error(f"Rapor oluşturulurken hata: {str(e)}")
             raise
 
+    def generate_presence_report(self, date=None):
+        """Günün varlık oturumlarından kişi başına görünüş sayısı ve toplam süre."""
+        try:
+            if not date:
+                date = datetime.now()
+
+            # Kare başına log yerine görünüş başına tek satır okunur
+            sessions = self.session.query(
+                PresenceSession
+            ).filter(
+                PresenceSession.first_seen >= date.date()
+            ).all()
+
+            df = pd.DataFrame([{
+                'person_id': session.person_id,
+                'camera': session.camera,
+                'duration_s': (session.last_seen - session.first_seen).total_seconds(),
+                'best_distance': session.best_distance
+            } for session in sessions], columns=['person_id', 'camera', 'duration_s', 'best_distance'])
+
+            return {
+                'total_sessions': len(df),
+                'unique_persons': df['person_id'].nunique(),
+                'total_presence_s': df['duration_s'].sum(),
+                'per_person': df.groupby('person_id')['duration_s'].agg(['count', 'sum']).to_dict('index')
+            }
+        except Exception as e:
+            self.logger.error(f"Varlık raporu oluşturulurken hata: {str(e)}")
+            raise
+
     def create_report(self, data):
         try:
-            # DataFrame oluştur
+            # DataFrame oluştur; her oturum tanındığı kare sayısı kadar ağırlık taşır
             df = pd.DataFrame([{
-                'timestamp': log.timestamp,
-                'person_id': log.person_id,
-                'confidence_score': log.confidence_score,
-                'location': log.location
-            } for log in data])
+                'timestamp': session.first_seen,
+                'person_id': session.person_id,
+                'confidence_score': session.best_distance,
+                'frame_count': session.frame_count,
+                'camera': session.camera
+            } for session in data], columns=['timestamp', 'person_id', 'confidence_score', 'frame_count', 'camera'])
 
             # İstatistikleri hesapla
             stats = {
-                'total_recognitions': len(df),
+                'total_recognitions': int(df['frame_count'].sum()),
                 'unique_persons': df['person_id'].nunique(),
                 'avg_confidence': df['confidence_score'].mean()
             }
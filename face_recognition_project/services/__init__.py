@@ -1,3 +1,7 @@
 from .face_recognition_service import FaceRecognitionService
+from .frame_pipeline import FramePipeline
+from .face_tracker import FaceTracker
+from .camera_manager import CameraManager
+from .presence_tracker import PresenceTracker
 
-__all__ = ['FaceRecognitionService']
+__all__ = ['FaceRecognitionService', 'FramePipeline', 'FaceTracker', 'CameraManager', 'PresenceTracker']
@@ -0,0 +1,111 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class AdaptiveScheduler:
+    """Akışın ölçülen işleme süresi ve gecikmesiyle işleme aralığını ve tespit ölçeğini ayarlar.
+
+    Her akış için bir örnek kullanılır. Tespit/kodlama süreleri ve uçtan uca
+    gecikme üstel hareketli ortalamayla izlenir; kullanım, bu akışın
+    karelerinin işlenmesine harcanan sürenin duvar saatine oranıdır (süreç
+    geneli CPU zamanı diğer akışların yükünü de içerdiği için kullanılmaz).
+    Hedef kullanım ya da en yüksek gecikme aşıldığında aralık çarpımsal
+    olarak büyütülür ve tespit ölçeği küçültülür; kapasite boşta kaldığında
+    ters yönde yavaşça geri alınır (AIMD benzeri). Ölçek hiçbir zaman
+    yapılandırılan başlangıç ölçeğini aşmaz.
+    """
+
+    def __init__(
+        self,
+        initial_interval: float = 0.5,
+        initial_scale: float = 0.25,
+        target_utilization: float = 0.6,
+        max_latency: float = 0.5,
+        min_interval: float = 0.0,
+        max_interval: float = 2.0,
+        min_scale: float = 0.125,
+        max_scale: Optional[float] = None,
+        smoothing: float = 0.2,
+        update_every: float = 1.0
+    ):
+        self.interval = initial_interval
+        self.scale = initial_scale
+        self.target_utilization = target_utilization
+        self.max_latency = max_latency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # Yapılandırılan ölçek üst sınırdır; zamanlayıcı çözünürlüğü yalnızca düşürüp geri alır
+        self.max_scale = initial_scale if max_scale is None else min(max_scale, initial_scale)
+        self.min_scale = min(min_scale, self.max_scale)
+        self.smoothing = smoothing
+        self.update_every = update_every
+        self.detect_time = 0.0
+        self.encode_time = 0.0
+        self.latency = 0.0
+        self.utilization = 0.0
+        self.decisions = {'yavasla': 0, 'hizlan': 0, 'sabit': 0}
+        self.last_decision = 'sabit'
+        self._last_processed = 0.0
+        self._last_update = time.monotonic()
+        self._busy = 0.0
+        self._lock = threading.Lock()
+
+    def should_process(self, now: Optional[float] = None) -> bool:
+        """Son işlenen kareden bu yana güncel aralık geçtiyse True döner ve zamanı işaretler."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now - self._last_processed < self.interval:
+                return False
+            self._last_processed = now
+            return True
+
+    def record(self, detect_time: float, encode_time: float, latency: float):
+        """Bir karenin aşama sürelerini kaydeder; gerekiyorsa yeni karar verir."""
+        with self._lock:
+            a = self.smoothing
+            self.detect_time += a * (detect_time - self.detect_time)
+            self.encode_time += a * (encode_time - self.encode_time)
+            self.latency += a * (latency - self.latency)
+            self._busy += detect_time + encode_time
+            now = time.monotonic()
+            if now - self._last_update >= self.update_every:
+                self._update(now)
+
+    def _update(self, now: float):
+        wall = now - self._last_update
+        self.utilization = self._busy / wall if wall > 0 else 0.0
+        self._busy, self._last_update = 0.0, now
+
+        if self.utilization > self.target_utilization or self.latency > self.max_latency:
+            # Aşırı yük: daha seyrek işle; tespit baskınsa çözünürlüğü de düşür
+            self.interval = min(max(self.interval * 1.5, 0.05), self.max_interval)
+            if self.detect_time >= self.encode_time:
+                self.scale = max(self.scale * 0.8, self.min_scale)
+            decision = 'yavasla'
+        elif (self.utilization < 0.7 * self.target_utilization and
+              self.latency < 0.5 * self.max_latency):
+            # Boş kapasite: önce aralığı kısalt, aralık alt sınırdaysa çözünürlüğü artır
+            if self.interval > self.min_interval:
+                self.interval = max(self.interval * 0.8 - 0.01, self.min_interval)
+            else:
+                self.scale = min(self.scale * 1.1, self.max_scale)
+            decision = 'hizlan'
+        else:
+            decision = 'sabit'
+        self.decisions[decision] += 1
+        self.last_decision = decision
+
+    def metrics(self) -> Dict[str, Any]:
+        """Zamanlayıcının güncel kararları ve ölçümleri."""
+        with self._lock:
+            return {
+                'interval_s': self.interval,
+                'detection_scale': self.scale,
+                'utilization': self.utilization,
+                'detect_ms': self.detect_time * 1000,
+                'encode_ms': self.encode_time * 1000,
+                'latency_ms': self.latency * 1000,
+                'last_decision': self.last_decision,
+                'decisions': dict(self.decisions)
+            }
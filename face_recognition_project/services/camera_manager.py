@@ -0,0 +1,432 @@
+import cv2
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from services.frame_pipeline import FramePacket, StageStats
+
+logger = logging.getLogger(__name__)
+
+Source = Union[int, str]
+
+
+def parse_source(source: Source) -> Source:
+    """'0' gibi sayısal kaynakları cihaz indeksine çevirir; dosya yolları ve URL'ler aynen kalır."""
+    if isinstance(source, str) and source.strip().isdigit():
+        return int(source)
+    return source
+
+
+def open_capture(source: Source):
+    return cv2.VideoCapture(parse_source(source))
+
+
+class ReplayCapture:
+    """Yerel bir video dosyasını kendi FPS'inde, sonsuz döngüde oynatan sahte kamera.
+
+    Donanım olmadan yük testi için `CameraManager(opener=replay_opener())`
+    ile kullanılır; her akış dosyayı gerçek bir kamera hızında okur.
+    """
+
+    def __init__(self, path: str, fps: Optional[float] = None, loop: bool = True):
+        self._capture = cv2.VideoCapture(path)
+        self.fps = fps or self._capture.get(cv2.CAP_PROP_FPS) or 25.0
+        self.loop = loop
+        self._next = time.monotonic()
+
+    def isOpened(self) -> bool:
+        return self._capture.isOpened()
+
+    def read(self):
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+        self._next = max(self._next, now) + 1.0 / self.fps
+        ret, frame = self._capture.read()
+        if not ret and self.loop:
+            # Dosya bitti: başa sar
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._capture.read()
+        return ret, frame
+
+    def release(self):
+        self._capture.release()
+
+
+def replay_opener(fps: Optional[float] = None, loop: bool = True) -> Callable[[Source], ReplayCapture]:
+    return lambda source: ReplayCapture(source, fps, loop)
+
+
+class CameraStream:
+    """Tek bir kaynağın durumu: son kare, son sonuç, takipçi, zamanlayıcı ve bağlantı sayaçları."""
+
+    def __init__(self, stream_id: str, source: Source, tracker=None,
+                 gate: Optional[Callable[[Any], List[tuple]]] = None, roi=None, scheduler=None):
+        self.stream_id = stream_id
+        self.source = source
+        self.tracker = tracker
+        self.gate = gate
+        self.roi = roi
+        self.scheduler = scheduler
+        self.connected = False
+        self.frames = 0
+        self.dropped = 0
+        self.idle_frames = 0
+        self.skipped = 0
+        self.reconnects = 0
+        self.latest_frame: Optional[FramePacket] = None
+        self.latest_result: Optional[FramePacket] = None
+        self._pending: Optional[FramePacket] = None
+        self._busy = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        report = {
+            'source': str(self.source),
+            'connected': self.connected,
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'idle': self.idle_frames,
+            'skipped': self.skipped,
+            'reconnects': self.reconnects
+        }
+        if self.scheduler is not None:
+            report['scheduler'] = self.scheduler.metrics()
+        return report
+
+
+class CameraManager:
+    """Çok sayıda kaynağı (cihaz indeksi, video dosyası, URL) tek süreçte işler.
+
+    Her kaynağın kendi yakalama iş parçacığı vardır; tespit ve kodlama
+    işçileri tüm akışlar arasında paylaşılır. Her akışın bekleyen tek bir
+    karesi tutulur (yeni kare eskisinin yerine geçer) ve aynı anda yalnızca
+    bir karesi işlenir. Tespit işçileri hazır akışları sırayla (round-robin)
+    aldığı için yoğun bir kamera diğerlerini aç bırakmaz. Okuma
+    `max_failures` kez üst üste başarısız olursa kaynak kapatılıp artan
+    bekleme süreleriyle yeniden açılır.
+
+    `tracker_factory` ve `gate_factory` akış başına takipçi ve kapı (ör.
+    hareket dedektörü) üretir; anlamları `FramePipeline` ile aynıdır.
+    `scheduler_factory` akış başına bir AdaptiveScheduler üretir: akışın
+    kareleri zamanlayıcının aralığına göre seyreltilir, tespit o akışın
+    ölçeğiyle (`detect(..., scale=...)`) yapılır ve akışın kendi işleme
+    süreleri zamanlayıcıya geri bildirilir. Akışa
+    bir ilgi alanı (RegionOfInterest) verilirse tespit yalnızca ilgi alanı
+    kutularında yapılır ve alan dışında kalan yüzler atılır.
+    """
+
+    STAGES = ('capture', 'detect', 'encode', 'match')
+
+    def __init__(
+        self,
+        detect: Callable[..., List[tuple]],
+        encode: Callable[[Any, List[tuple]], List[Any]],
+        match: Callable[[List[Any]], List[Any]],
+        on_result: Optional[Callable[[str, FramePacket], None]] = None,
+        tracker_factory: Optional[Callable[[], Any]] = None,
+        gate_factory: Optional[Callable[[], Callable[[Any], List[tuple]]]] = None,
+        scheduler_factory: Optional[Callable[[], Any]] = None,
+        opener: Callable[[Source], Any] = open_capture,
+        detect_workers: int = 2,
+        encode_workers: int = 2,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        max_failures: int = 30
+    ):
+        self.detect = detect
+        self.encode = encode
+        self.match = match
+        self.on_result = on_result
+        self.tracker_factory = tracker_factory
+        self.gate_factory = gate_factory
+        self.scheduler_factory = scheduler_factory
+        self.opener = opener
+        self.detect_workers = max(detect_workers, 1)
+        self.encode_workers = max(encode_workers, 1)
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_failures = max_failures
+        self._streams: Dict[str, CameraStream] = {}
+        self._order = deque()
+        self._ready = threading.Condition()
+        self._encode_queue = queue.Queue()
+        self._stats = {stage: StageStats() for stage in self.STAGES}
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._workers)
+
+    def streams(self) -> List[str]:
+        return list(self._streams)
+
+    def add_stream(self, source: Source, stream_id: Optional[str] = None, roi=None) -> str:
+        """Kaynağı ekler; yönetici çalışıyorsa yakalama hemen başlar."""
+        stream_id = stream_id or str(source)
+        with self._ready:
+            if stream_id in self._streams:
+                raise ValueError(f"Akış zaten ekli: {stream_id}")
+            stream = CameraStream(
+                stream_id, source,
+                tracker=self.tracker_factory() if self.tracker_factory else None,
+                gate=self.gate_factory() if self.gate_factory else None,
+                roi=roi,
+                scheduler=self.scheduler_factory() if self.scheduler_factory else None
+            )
+            self._streams[stream_id] = stream
+            self._order.append(stream_id)
+        if self.running:
+            self._start_capture(stream)
+        return stream_id
+
+    def remove_stream(self, stream_id: str):
+        with self._ready:
+            stream = self._streams.pop(stream_id, None)
+            if stream is None:
+                return
+            self._order.remove(stream_id)
+            stream._pending = None
+        stream._stop.set()
+        if stream._thread is not None:
+            stream._thread.join(2.0)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        workers = [('detect', self._detect_loop, self.detect_workers),
+                   ('encode', self._encode_loop, self.encode_workers)]
+        for name, target, count in workers:
+            for i in range(count):
+                thread = threading.Thread(target=target, name=f"cameras-{name}-{i}", daemon=True)
+                thread.start()
+                self._workers.append(thread)
+        for stream in list(self._streams.values()):
+            self._start_capture(stream)
+        logger.info(f"Kamera yöneticisi başlatıldı: {len(self._streams)} akış")
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        for stream in list(self._streams.values()):
+            stream._stop.set()
+        for stream in list(self._streams.values()):
+            if stream._thread is not None:
+                stream._thread.join(timeout)
+                stream._thread = None
+        for thread in self._workers:
+            thread.join(timeout)
+        self._workers = []
+        logger.info("Kamera yöneticisi durduruldu")
+
+    def latest_frame(self, stream_id: str) -> Optional[FramePacket]:
+        return self._streams[stream_id].latest_frame
+
+    def latest_result(self, stream_id: str) -> Optional[FramePacket]:
+        return self._streams[stream_id].latest_result
+
+    def tracker(self, stream_id: str):
+        return self._streams[stream_id].tracker
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Paylaşılan aşama sayaçları ve akış başına bağlantı/atılan kare sayıları."""
+        report = {stage: stats.as_dict() for stage, stats in self._stats.items()}
+        report['streams'] = {stream_id: stream.as_dict() for stream_id, stream in list(self._streams.items())}
+        return report
+
+    def _start_capture(self, stream: CameraStream):
+        stream._stop.clear()
+        stream._thread = threading.Thread(target=self._capture_loop, args=(stream,),
+                                          name=f"cameras-capture-{stream.stream_id}", daemon=True)
+        stream._thread.start()
+
+    def _open(self, stream: CameraStream):
+        try:
+            capture = self.opener(stream.source)
+            if capture is not None and capture.isOpened():
+                return capture
+            if capture is not None:
+                capture.release()
+        except Exception as e:
+            logger.error(f"{stream.stream_id} açılırken hata: {str(e)}")
+        return None
+
+    def _capture_loop(self, stream: CameraStream):
+        capture = None
+        failures = 0
+        delay = self.reconnect_delay
+        while not stream._stop.is_set():
+            if capture is None:
+                capture = self._open(stream)
+                if capture is None:
+                    stream.connected = False
+                    logger.warning(f"{stream.stream_id} açılamadı, {delay:.1f} sn sonra yeniden denenecek")
+                    stream._stop.wait(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+                stream.connected = True
+                failures = 0
+
+            start = time.perf_counter()
+            try:
+                ret, frame = capture.read()
+            except Exception as e:
+                logger.error(f"{stream.stream_id} okunurken hata: {str(e)}")
+                ret, frame = False, None
+            if not ret or frame is None:
+                failures += 1
+                if failures >= self.max_failures:
+                    # Akış ölü: kapatıp yeniden bağlan
+                    logger.warning(f"{stream.stream_id} yanıt vermiyor, yeniden bağlanılıyor")
+                    capture.release()
+                    capture = None
+                    stream.connected = False
+                    stream.reconnects += 1
+                else:
+                    time.sleep(0.01)
+                continue
+            failures = 0
+            delay = self.reconnect_delay
+
+            stream.frames += 1
+            packet = FramePacket(stream.frames, frame, time.time())
+            stream.latest_frame = packet
+            if stream.gate is not None or stream.roi is not None:
+                packet.regions = stream.gate(frame) if stream.gate is not None else None
+                if stream.roi is not None:
+                    packet.regions = stream.roi.restrict(packet.regions, frame.shape)
+                if not packet.regions:
+                    # Değişiklik yok: kare yalnızca gösterilir, görülmeyen takipler yaşlanır
+                    stream.idle_frames += 1
+                    self._expire_tracks(stream)
+                    self._stats['capture'].record(time.perf_counter() - start)
+                    continue
+            self._stats['capture'].record(time.perf_counter() - start)
+            if stream.scheduler is not None and not stream.scheduler.should_process():
+                # Akışın zamanlayıcısı bu kareyi işlemeye izin vermedi
+                stream.skipped += 1
+                self._expire_tracks(stream)
+                continue
+            self._submit(stream, packet)
+
+        if capture is not None:
+            capture.release()
+        stream.connected = False
+
+    @staticmethod
+    def _expire_tracks(stream: CameraStream):
+        """Tespit yapılmayan karede akışın takipçisindeki eski takipleri düşürür."""
+        if stream.tracker is not None and hasattr(stream.tracker, 'expire'):
+            stream.tracker.expire()
+
+    def _submit(self, stream: CameraStream, packet: FramePacket):
+        with self._ready:
+            if stream._pending is not None:
+                stream.dropped += 1
+            stream._pending = packet
+            self._ready.notify()
+
+    def _next_ready(self, timeout: float):
+        """Bekleyen karesi olan ve işlenmekte olmayan sıradaki akışı (round-robin) alır."""
+        taken = []
+
+        def take() -> bool:
+            for _ in range(len(self._order)):
+                stream = self._streams[self._order[0]]
+                self._order.rotate(-1)
+                if stream._pending is not None and not stream._busy:
+                    taken.append((stream, stream._pending))
+                    stream._pending = None
+                    stream._busy = True
+                    return True
+            return False
+
+        with self._ready:
+            if not self._ready.wait_for(take, timeout):
+                return None
+        return taken[0]
+
+    def _release(self, stream: CameraStream):
+        with self._ready:
+            stream._busy = False
+            self._ready.notify()
+
+    def _detect_loop(self):
+        while not self._stop.is_set():
+            item = self._next_ready(timeout=0.1)
+            if item is None:
+                continue
+            stream, packet = item
+            start = time.perf_counter()
+            try:
+                detect = self.detect
+                if stream.scheduler is not None:
+                    # Tespit ölçeği akışa özeldir; paylaşılan dedektör değiştirilmez
+                    scale = stream.scheduler.scale
+                    detect = lambda frame, *args: self.detect(frame, *args, scale=scale)
+                if packet.regions is not None:
+                    detect_all = detect
+                    detect = lambda frame: detect_all(frame, packet.regions)
+                if stream.roi is not None:
+                    # Bölge kutusu içinde ama çokgen dışında kalan yüzleri at
+                    detect_in_box = detect
+                    detect = lambda frame: stream.roi.filter(detect_in_box(frame), frame.shape)
+                if stream.tracker is None:
+                    packet.locations = list(detect(packet.frame))
+                else:
+                    pending = stream.tracker.step(packet.frame, detect)
+                    packet.track_ids = [track.track_id for track in pending]
+                    packet.locations = [track.location for track in pending]
+            except Exception as e:
+                logger.error(f"{stream.stream_id} detect aşamasında hata: {str(e)}")
+                self._release(stream)
+                continue
+            packet.detect_time = time.perf_counter() - start
+            self._stats['detect'].record(packet.detect_time)
+            if not packet.locations:
+                self._finish(stream, packet)
+                continue
+            self._encode_queue.put((stream, packet))
+
+    def _encode_loop(self):
+        while not self._stop.is_set():
+            try:
+                stream, packet = self._encode_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                start = time.perf_counter()
+                packet.encodings = list(self.encode(packet.frame, packet.locations))
+                encode_time = time.perf_counter() - start
+                self._stats['encode'].record(encode_time)
+                start = time.perf_counter()
+                packet.matches = list(self.match(packet.encodings)) if packet.encodings else []
+                if stream.tracker is not None:
+                    stream.tracker.assign(packet.track_ids, packet.matches)
+                match_time = time.perf_counter() - start
+                self._stats['match'].record(match_time)
+                packet.encode_time = encode_time + match_time
+            except Exception as e:
+                logger.error(f"{stream.stream_id} encode aşamasında hata: {str(e)}")
+                self._release(stream)
+                continue
+            self._finish(stream, packet)
+
+    def _finish(self, stream: CameraStream, packet: FramePacket):
+        stream.latest_result = packet
+        if stream.scheduler is not None:
+            # Yalnızca bu akışın işleme süreleri ve gecikmesi geri bildirilir
+            stream.scheduler.record(packet.detect_time, packet.encode_time, time.time() - packet.captured_at)
+        # Sonuç işlenmeden akış serbest bırakılmaz; takipçi sırası korunur
+        try:
+            if self.on_result is not None:
+                self.on_result(stream.stream_id, packet)
+        except Exception as e:
+            logger.error(f"{stream.stream_id} sonucu işlenirken hata: {str(e)}")
+        finally:
+            self._release(stream)
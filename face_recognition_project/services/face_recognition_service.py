@@ -1,28 +1,74 @@
 import face_recognition
 import cv2
 import numpy as np
-from database.models import Person, FaceRecognitionLog
-from sqlalchemy.orm import Session
+from database.models import Person, FaceTemplate
+from sqlalchemy.orm import Session, sessionmaker
+import copy
 import os
 import logging
 from datetime import datetime
 import dlib
+import threading
 import time
-from typing import Dict, List, Tuple
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+from infrastructure.recognition.gallery import FaceGallery
+from infrastructure.recognition.matcher import BatchMatcher
+from infrastructure.recognition.detection import ScaledFaceDetector
+from infrastructure.recognition.roi import RegionOfInterest
+from infrastructure.persistence.gallery_snapshot import GallerySnapshotStore, SharedGallery
+from infrastructure.persistence.repositories import log_batch_writer, person_table_fingerprint
+from infrastructure.persistence.log_writer import BatchWriter
+from config.settings import Config
+from services.frame_pipeline import FramePipeline
+from services.face_tracker import FaceTracker
+from services.motion_detector import MotionDetector
+from services.adaptive_scheduler import AdaptiveScheduler
+from services.camera_manager import CameraManager, open_capture
+from services.presence_tracker import PresenceTracker
 
 
 class FaceRecognitionService:
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, snapshot_dir: str = Config.GALLERY_SNAPSHOT_DIR,
+                 shared_gallery: bool = False):
         try:
             self.logger = logging.getLogger(__name__)
             self.model_path = self.check_models()
             self.db = db_session
-            self.known_face_encodings = []
-            self.known_face_names = []
-            self._last_process_time = 0
-            self._frame_interval = 0.5  # Her 500ms'de bir işle
-            self._face_locations_cache = {}  # Son tespit edilen yüz konumları
-            self._face_encodings_cache = {}  # Son tespit edilen yüz kodlamaları
+            # Arka plan işleri (log yazımı, galeri parmak izi) istek/başlatma oturumuna
+            # bağlanmaz; her biri bu fabrikadan kendi kısa ömürlü oturumunu açar
+            self.session_factory = sessionmaker(bind=db_session.get_bind())
+            self._gallery_lock = threading.Lock()  # Kopyalarla paylaşılır; kontrol+değiştir adımlarını sıralar
+            self.snapshot_store = GallerySnapshotStore(snapshot_dir) if snapshot_dir else None
+            if shared_gallery and self.snapshot_store is None:
+                raise ValueError("Paylaşılan galeri için snapshot dizini gerekli")
+            self.shared_gallery = shared_gallery
+            self.gallery = FaceGallery()
+            self.matcher = BatchMatcher(tolerance=Config.FACE_RECOGNITION_TOLERANCE)
+            self.detector = ScaledFaceDetector(Config.DETECTION_SCALE, Config.FACE_DETECTION_MODEL)
+            self.motion_detector = MotionDetector()  # Boş sahnede tespit çalışmaz
+            # Kamera başına ilgi alanı: tavan, duvar vb. alanlar hiç taranmaz
+            self.rois = Config.get_camera_rois()
+            self.roi = RegionOfInterest.from_config(self.rois, Config.CAMERA_SOURCES[0])
+            # İşleme aralığı ve tespit ölçeği ölçülen yüke göre uyarlanır (çoklu kamerada akış başına ayrı)
+            self.scheduler = self._make_scheduler()
+            self.tracker = FaceTracker()  # Yüzleri kareler arasında izler, kişi başına bir kez kodlar
+            self.pipeline = None
+            self.camera_manager = None
+            # Varlık oturumları arka planda, kendi oturumuyla toplu yazılır
+            self.presence_writer = BatchWriter(
+                log_batch_writer(self.session_factory, 'add_presence_sessions'),
+                batch_size=Config.LOG_BATCH_SIZE,
+                flush_interval=Config.LOG_FLUSH_INTERVAL,
+                max_queue=Config.LOG_QUEUE_SIZE
+            ).start()
+            # Kişi kamerada kaldıkça tek oturum uzar; kapanınca tek satır yazılır
+            self.presence = PresenceTracker(
+                on_close=lambda session: self.presence_writer.put(session.as_row()),
+                gap=Config.PRESENCE_GAP,
+                max_duration=Config.PRESENCE_MAX_DURATION
+            )
+            self.camera_id = str(Config.CAMERA_SOURCES[0])
             
             # Kamera ve model kontrolü
             if not cv2.getBuildInformation():
@@ -38,6 +84,29 @@ class FaceRecognitionService:
             self.logger.error(f"Servis başlatılırken hata: {str(e)}")
             raise
 
+    @contextmanager
+    def session_scope(self, db_session: Session) -> Iterator['FaceRecognitionService']:
+        """Uzun ömürlü servisi bir isteğin kısa ömürlü oturumuyla kullanır.
+
+        Galeri ve modeller servisle birlikte bir kez yüklenir; istek yalnızca
+        havuzdan bir oturum getirir. İsteğe, paylaşılan galeri, eşleştirici ve
+        log yazıcısını kullanan fakat kendi oturumu olan yüzeysel bir kopya
+        verilir; böylece eşzamanlı istekler birbirini beklemez.
+        """
+        scoped = copy.copy(self)
+        scoped.db = db_session
+        yield scoped
+
+    @staticmethod
+    def _make_scheduler() -> AdaptiveScheduler:
+        # Ölçek yapılandırılan DETECTION_SCALE'i aşmaz; yük altında yalnızca düşürülür
+        return AdaptiveScheduler(
+            initial_interval=Config.FRAME_INTERVAL,
+            initial_scale=Config.DETECTION_SCALE,
+            target_utilization=Config.TARGET_CPU_UTILIZATION,
+            max_latency=Config.MAX_PIPELINE_LATENCY
+        )
+
     def check_models(self) -> str:
         try:
             # Dlib model kontrolü
@@ -66,25 +135,62 @@ class FaceRecognitionService:
             self.logger.error(f"Model kontrol hatası: {str(e)}")
             raise
 
+    def _build_gallery(self) -> FaceGallery:
+        persons = self.db.query(Person).filter(Person.is_active == True).all()
+        templates = self.db.query(
+            FaceTemplate.person_id, Person.name, FaceTemplate.face_encoding
+        ).join(Person, FaceTemplate.person_id == Person.id).filter(Person.is_active == True).all()
+        # Ek şablonlar birincil kodlamayla aynı kişi ID'sini paylaşır
+        return FaceGallery.from_records(
+            [(person.id, person.name, person.face_encoding) for person in persons] +
+            [tuple(template) for template in templates]
+        )
+
+    def _table_fingerprint(self) -> Dict[str, Any]:
+        """Kişi tablosunun parmak izini kendi kısa ömürlü oturumunda hesaplar.
+
+        Paylaşılan galeri bunu servis ömrü boyunca çağırır; başlatma oturumu
+        o sırada kapanmış olabileceğinden `self.db` kullanılmaz.
+        """
+        db = self.session_factory()
+        try:
+            return person_table_fingerprint(db)
+        finally:
+            db.close()
+
     def load_known_faces(self):
         try:
-            persons = self.db.query(Person).filter(Person.is_active == True).all()
-            self.known_face_encodings = []
-            self.known_face_names = []
-            
-            for person in persons:
-                face_encoding = np.frombuffer(person.face_encoding)
-                self.known_face_encodings.append(face_encoding)
-                self.known_face_names.append(person.name)
+            if self.shared_gallery:
+                # Tüm işçiler aynı eşlenmiş snapshot'ı kullanır; yalnızca biri veritabanından kurar
+                self.gallery = SharedGallery(
+                    self.snapshot_store,
+                    fingerprint=self._table_fingerprint
+                ).attach(self._build_gallery)
+                self.logger.info(f"Paylaşılan galeri eşlendi: v{self.gallery.version}, {len(self.gallery)} kayıt")
+                return
+
+            # Tablo değişmediyse snapshot'ı diskten eşle
+            fingerprint = None
+            if self.snapshot_store is not None:
+                fingerprint = person_table_fingerprint(self.db)
+                gallery = self.snapshot_store.load(fingerprint)
+                if gallery is not None:
+                    self.gallery = gallery
+                    self.logger.info(f"{len(gallery)} kişi snapshot'tan yüklendi")
+                    return
+
+            self.gallery = self._build_gallery()
+            if self.snapshot_store is not None:
+                self.snapshot_store.write(self.gallery, fingerprint)
                 
-            self.logger.info(f"{len(persons)} kişi yüklendi")
+            self.logger.info(f"{self.gallery.identity_count} kişi yüklendi")
         except Exception as e:
             self.logger.error(f"Kayıtlı yüzler yüklenirken hata: {str(e)}")
             raise
 
     def start_camera(self) -> bool:
         try:
-            self.video_capture = cv2.VideoCapture(0)
+            self.video_capture = open_capture(Config.CAMERA_SOURCES[0])
             if not self.video_capture.isOpened():
                 self.logger.error("Kamera başlatılamadı")
                 return False
@@ -93,8 +199,170 @@ class FaceRecognitionService:
             self.logger.error(f"Kamera başlatılırken hata: {str(e)}")
             return False
 
+    def start_pipeline(self, detect_workers: int = 1, encode_workers: int = 1) -> bool:
+        """Yakalama, tespit, kodlama ve eşleştirmeyi arka plan iş parçacıklarında başlatır."""
+        try:
+            if not getattr(self, 'video_capture', None):
+                self.logger.error("Kare işleme hattı için kamera açık olmalı")
+                return False
+            self.pipeline = FramePipeline(
+                read_frame=self._read_camera_frame,
+                detect=self._detect_regions,
+                encode=self.detector.encode,
+                gate=self._detection_regions,
+                on_result=self._on_pipeline_result,
+                match=lambda encodings: self.matcher.match(self.gallery.snapshot(), encodings),
+                tracker=self.tracker,
+                detect_workers=detect_workers,
+                encode_workers=encode_workers
+            )
+            self.pipeline.start()
+            return True
+        except Exception as e:
+            self.logger.error(f"Kare işleme hattı başlatılırken hata: {str(e)}")
+            return False
+
+    def start_cameras(self, sources=None, detect_workers: int = 2, encode_workers: int = 2,
+                      opener=open_capture) -> bool:
+        """Birden çok kaynağı paylaşılan tespit/kodlama işçileriyle işler (varsayılan: Config.CAMERA_SOURCES)."""
+        try:
+            if self.camera_manager is not None:
+                self.camera_manager.stop()
+            # Takipçi ve hareket dedektörü durum tutar; her akışa ayrı örnek verilir
+            self.camera_manager = CameraManager(
+                detect=self.detector.detect_regions,
+                encode=self.detector.encode,
+                match=lambda encodings: self.matcher.match(self.gallery.snapshot(), encodings),
+                on_result=self._on_stream_result,
+                tracker_factory=FaceTracker,
+                gate_factory=lambda: self._expiring_gate(MotionDetector().detect),
+                scheduler_factory=self._make_scheduler,
+                opener=opener,
+                detect_workers=detect_workers,
+                encode_workers=encode_workers
+            )
+            for source in sources or Config.CAMERA_SOURCES:
+                self.camera_manager.add_stream(source, roi=RegionOfInterest.from_config(self.rois, source))
+            self.camera_manager.start()
+            return True
+        except Exception as e:
+            self.logger.error(f"Kameralar başlatılırken hata: {str(e)}")
+            return False
+
+    def get_stream_frame(self, stream_id: str):
+        """Bir akışın en son karesini, o akışın takip edilen yüzleriyle işaretleyerek döndürür."""
+        try:
+            if self.camera_manager is None:
+                return None
+            packet = self.camera_manager.latest_frame(stream_id)
+            if packet is None:
+                return None
+            frame = packet.frame.copy()
+            self._draw_tracks(frame, self.camera_manager.tracker(stream_id))
+            return frame
+        except Exception as e:
+            self.logger.error(f"Kare işlenirken hata: {str(e)}")
+            return None
+
+    def _read_camera_frame(self):
+        capture = getattr(self, 'video_capture', None)
+        if capture is None:
+            return None
+        ret, frame = capture.read()
+        if not ret or frame is None or frame.size == 0:
+            return None
+        return frame
+
+    def get_display_frame(self):
+        """En son kareyi, tamamlanmış en yeni tanıma sonucuyla işaretleyerek döndürür."""
+        try:
+            if self.pipeline is None:
+                return self.get_frame()
+            packet = self.pipeline.latest_frame()
+            if packet is None:
+                return None
+            frame = packet.frame.copy()
+            self._draw_tracks(frame)
+            return frame
+        except Exception as e:
+            self.logger.error(f"Kare işlenirken hata: {str(e)}")
+            return None
+
+    def get_display_packet(self):
+        """En son kare (kopyalanmadan ve üzerine çizilmeden) ile takip katmanlarını döndürür.
+
+        Kare salt okunur paylaşılır; kutular arayüzün gösterim tamponuna
+        çizilir. Dönüş (kare numarası, kare, katmanlar) ya da None.
+        """
+        try:
+            if self.pipeline is None:
+                return None
+            packet = self.pipeline.latest_frame()
+            if packet is None:
+                return None
+            return packet.frame_id, packet.frame, self.track_overlays()
+        except Exception as e:
+            self.logger.error(f"Kare işlenirken hata: {str(e)}")
+            return None
+
+    def _on_pipeline_result(self, packet):
+        # Varlık, gösterimden bağımsız olarak eşleştirme sonucundan izlenir
+        self._observe_presence(self.tracker, self.camera_id, packet.frame_id)
+        pipeline = self.pipeline
+        if pipeline is None:
+            return
+        stats = pipeline.stats()
+        self.scheduler.record(
+            stats['detect']['last_ms'] / 1000,
+            stats['encode']['last_ms'] / 1000,
+            time.time() - packet.captured_at
+        )
+
+    def _on_stream_result(self, stream_id: str, packet):
+        """Kamera yöneticisinin eşleştirme sonucu; akışın takipçisinden varlık oturumlarını günceller."""
+        self._observe_presence(self.camera_manager.tracker(stream_id), stream_id, packet.frame_id)
+
+    def _observe_presence(self, tracker: FaceTracker, camera: str, frame_id: int = None):
+        """Tanınan takiplerin varlık oturumlarını uzatır; süresi dolan oturumları kapatır."""
+        now = datetime.now()
+        # Ara karelerde tanınıp kaybolan takipler de oturum açar; kişi başına kare başına tek gözlem
+        seen = {}
+        for track in tracker.pop_identified() + tracker.tracks():
+            if track.person_id is not None:
+                best = seen.get(track.person_id)
+                seen[track.person_id] = track.distance if best is None else min(best, track.distance)
+        for person_id, distance in seen.items():
+            self.presence.observe(person_id, camera, distance, now, frame_id)
+        self.presence.expire(now)
+
+    def _expiring_gate(self, gate):
+        """Kapıyı, boşta geçen karelerde de varlık oturumlarının kapanmasını sağlayacak şekilde sarar."""
+        def expiring(frame):
+            self.presence.expire()
+            return gate(frame)
+        return expiring
+
+    def get_pipeline_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = self.pipeline.stats() if self.pipeline is not None else {}
+        stats['scheduler'] = self.scheduler.metrics()
+        stats['presence_writer'] = self.presence_writer.stats()
+        stats['presence'] = {'active': len(self.presence.active())}
+        if self.camera_manager is not None:
+            stats['cameras'] = self.camera_manager.stats()
+        return stats
+
     def stop_camera(self):
         try:
+            if self.pipeline is not None:
+                self.pipeline.stop()
+                self.pipeline = None
+            if self.camera_manager is not None:
+                self.camera_manager.stop()
+                self.camera_manager = None
+            self.tracker.reset()
+            self.motion_detector.reset()
+            # Kamera kapanınca kimse görülmeyecek; açık oturumlar hemen yazılır
+            self.presence.close_all()
             if hasattr(self, 'video_capture') and self.video_capture:
                 self.video_capture.release()
                 self.video_capture = None
@@ -102,12 +370,34 @@ class FaceRecognitionService:
         except Exception as e:
             self.logger.error(f"Kamera kapatılırken hata: {str(e)}")
 
-    def should_process_frame(self) -> bool:
-        current_time = time.time()
-        if current_time - self._last_process_time > self._frame_interval:
-            self._last_process_time = current_time
-            return True
-        return False
+    def close(self):
+        """Kamerayı kapatır; açık varlık oturumlarını ve bekleyen kayıtları yazar."""
+        self.stop_camera()
+        self.presence_writer.close()
+        stats = self.presence_writer.stats()
+        if stats['dropped'] or stats['failed']:
+            self.logger.warning(f"Varlık oturumları: {stats['dropped']} atıldı, {stats['failed']} yazılamadı")
+
+    def _detection_regions(self, frame) -> List[Tuple[int, int, int, int]]:
+        """Hareket olan bölgeler; hareket varsa izlenen yüzlerin kutuları da taranır."""
+        # Hareketsiz sahnede sonuç gelmez; görülmeyen kişilerin oturumları burada kapanır
+        self.presence.expire()
+        regions = self.motion_detector.detect(frame)
+        if self.roi is not None:
+            # İlgi alanı dışındaki hareket tespiti tetiklemez
+            regions = self.roi.restrict(regions, frame.shape)
+        # Arka plan her karede güncellenir; işleme sıklığını zamanlayıcı belirler
+        if not regions or not self.scheduler.should_process():
+            # Takipçi bu karede ilerlemez; sahneden çıkan yüzlerin takibi zamanla düşer
+            self.tracker.expire()
+            return []
+        # Sabit duran yüzlerin takibi, tespit yalnızca hareket alanında yapıldı diye düşmesin
+        return regions + [track.location for track in self.tracker.tracks()]
+
+    def _detect_regions(self, frame, regions) -> List[Tuple[int, int, int, int]]:
+        """Bölgelerde zamanlayıcının ölçeğiyle tespit yapar; ilgi alanı çokgenleri dışında merkezlenen yüzleri atar."""
+        locations = self.detector.detect_regions(frame, regions, scale=self.scheduler.scale)
+        return self.roi.filter(locations, frame.shape) if self.roi is not None else locations
 
     def get_frame(self):
         try:
@@ -118,53 +408,25 @@ class FaceRecognitionService:
             if not ret or frame is None or frame.size == 0:
                 return None
 
-            # Her frame'i işleme
-            if self.should_process_frame():
-                # Yüz tanıma işlemi
-                face_locations = face_recognition.face_locations(frame)
-                face_encodings = face_recognition.face_encodings(frame, face_locations)
-                
-                # Önbelleğe al
-                self._face_locations_cache = face_locations
-                self._face_encodings_cache = face_encodings
-            else:
-                # Önbellekten al
-                face_locations = self._face_locations_cache
-                face_encodings = self._face_encodings_cache
-
-            # Tanınan yüzleri işaretle
-            for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-                matches = face_recognition.compare_faces(
-                    self.known_face_encodings,
-                    face_encoding,
-                    tolerance=0.6
-                )
-                name = "Bilinmeyen"
-
-                if True in matches:
-                    first_match_index = matches.index(True)
-                    name = self.known_face_names[first_match_index]
-
-                    # Log kaydı
-                    confidence_score = face_recognition.face_distance(
-                        [self.known_face_encodings[first_match_index]],
-                        face_encoding
-                    )[0]
-                    
-                    if confidence_score < 0.6:  # Sadece güven skoru yüksek olanları logla
-                        self.log_recognition(name, confidence_score)
-
-                # Yüzü çerçevele
-                cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-                cv2.putText(
-                    frame,
-                    name,
-                    (left, top - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.75,
-                    (0, 255, 0),
-                    2
-                )
+            # Hareket yoksa tespit ve kodlama tamamen atlanır
+            regions = self._detection_regions(frame)
+            if regions:
+                start = time.perf_counter()
+                # Tespit her K karede bir, yalnızca değişen bölgelerde çalışır
+                pending = self.tracker.step(frame, lambda image: self._detect_regions(image, regions))
+                detect_time = time.perf_counter() - start
+                if pending:
+                    # Küçültülmüş RGB kopyada tespit, tam çözünürlüklü kırpıntılarda kodlama
+                    face_encodings = self.detector.encode(frame, [track.location for track in pending])
+
+                    # Tüm yüzleri galerinin kilitsiz alınan tek bir sürümüyle eşleştir
+                    matches = self.matcher.match(self.gallery.snapshot(), face_encodings)
+                    self.tracker.assign([track.track_id for track in pending], matches)
+                self._observe_presence(self.tracker, self.camera_id)
+                elapsed = time.perf_counter() - start
+                self.scheduler.record(detect_time, elapsed - detect_time, elapsed)
+
+            self._draw_tracks(frame)
 
             return frame
 
@@ -172,26 +434,59 @@ class FaceRecognitionService:
             self.logger.error(f"Kare işlenirken hata: {str(e)}")
             return None
 
-    def log_recognition(self, person_name: str, confidence_score: float):
+    def track_overlays(self, tracker: FaceTracker = None) -> List[Tuple[Tuple[int, int, int, int], str, Tuple[int, int, int]]]:
+        """Takip edilen yüzlerin (konum, etiket, renk) katmanları."""
+        tracker = tracker or self.tracker
+        return [(track.location, track.label, (0, 255, 0)) for track in tracker.tracks()]
+
+    def _draw_tracks(self, frame, tracker: FaceTracker = None):
+        # Takip edilen yüzleri işaretle
+        for (top, right, bottom, left), name, color in self.track_overlays(tracker):
+            # Yüzü çerçevele
+            cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
+            cv2.putText(
+                frame,
+                name,
+                (left, top - 10),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.75,
+                color,
+                2
+            )
+
+    @staticmethod
+    def _load_image(image) -> np.ndarray:
+        """Dosya yolunu okuyup RGB diziye çevirir; zaten çözülmüş RGB dizi olduğu gibi döner."""
+        return face_recognition.load_image_file(image) if isinstance(image, str) else image
+
+    def process_image(self, image: np.ndarray, threshold: float = None) -> List[Dict]:
+        """RGB görüntüdeki tüm yüzleri bulup galeriyle tek seferde eşleştirir.
+
+        `threshold` verilirse mesafesi bu değerden büyük eşleşmeler tanınmamış sayılır.
+        """
         try:
-            person = self.db.query(Person).filter(Person.name == person_name).first()
-            if person:
-                log = FaceRecognitionLog(
-                    person_id=person.id,
-                    confidence_score=confidence_score,
-                    timestamp=datetime.now()
-                )
-                self.db.add(log)
-                self.db.commit()
-                self.logger.debug(f"Tanıma logu kaydedildi: {person_name} ({confidence_score:.2f})")
+            locations = face_recognition.face_locations(image, 1, self.detector.model)
+            encodings = face_recognition.face_encodings(image, locations)
+            matches = self.matcher.match(self.gallery.snapshot(), encodings)
+            results = []
+            for location, match in zip(locations, matches):
+                matched = match.is_match and (threshold is None or match.distance <= threshold)
+                results.append({
+                    'location': location,
+                    'person_id': match.person_id if matched else None,
+                    'name': match.name if matched else "Bilinmeyen",
+                    'distance': float(match.distance),
+                    'confidence': float(match.score)
+                })
+            return results
         except Exception as e:
-            self.logger.error(f"Tanıma logu kaydedilirken hata: {str(e)}")
-            self.db.rollback()
+            self.logger.error(f"Görüntü işlenirken hata: {str(e)}")
+            raise
 
-    def add_person(self, image_path: str, name: str):
+    def add_person(self, image, name: str):
         try:
             # Fotoğraftaki yüzü bul ve kodla
-            image = face_recognition.load_image_file(image_path)
+            image = self._load_image(image)
             face_encodings = face_recognition.face_encodings(image)
 
             if not face_encodings:
@@ -209,8 +504,8 @@ class FaceRecognitionService:
             self.db.add(person)
             self.db.commit()
 
-            # Yüklü yüzleri güncelle
-            self.load_known_faces()
+            # Galeriye yalnızca yeni satırı ekle
+            self.gallery.add(person.id, person.name, face_encoding)
             
             self.logger.info(f"{name} isimli kişi başarıyla eklendi")
             
@@ -219,7 +514,37 @@ class FaceRecognitionService:
             self.db.rollback()
             raise
 
-    def update_person(self, person_id: int, new_name: str = None, new_image_path: str = None):
+    def add_template(self, person_id: int, image):
+        try:
+            person = self.db.query(Person).filter(Person.id == person_id).first()
+            if not person or not person.is_active:
+                raise ValueError(f"ID {person_id} olan aktif kişi bulunamadı")
+
+            image = self._load_image(image)
+            face_encodings = face_recognition.face_encodings(image)
+            if not face_encodings:
+                raise ValueError("Fotoğrafta yüz bulunamadı")
+
+            face_encoding = face_encodings[0]
+            template = FaceTemplate(
+                person_id=person.id,
+                face_encoding=face_encoding.tobytes(),
+                created_at=datetime.now()
+            )
+            self.db.add(template)
+            self.db.commit()
+
+            # Şablon kişinin diğer satırlarının yanına eklenir
+            self.gallery.add_template(person.id, face_encoding, person.name)
+
+            self.logger.info(f"{person.name} için yeni şablon eklendi")
+
+        except Exception as e:
+            self.logger.error(f"Şablon eklenirken hata: {str(e)}")
+            self.db.rollback()
+            raise
+
+    def update_person(self, person_id: int, new_name: str = None, new_image=None):
         try:
             person = self.db.query(Person).filter(Person.id == person_id).first()
             if not person:
@@ -228,20 +553,28 @@ class FaceRecognitionService:
             if new_name:
                 person.name = new_name
 
-            if new_image_path:
-                image = face_recognition.load_image_file(new_image_path)
+            new_encoding = None
+            if new_image is not None:
+                image = self._load_image(new_image)
                 face_encodings = face_recognition.face_encodings(image)
                 
                 if not face_encodings:
                     raise ValueError("Yeni fotoğrafta yüz bulunamadı")
                 
-                person.face_encoding = face_encodings[0].tobytes()
+                new_encoding = face_encodings[0]
+                person.face_encoding = new_encoding.tobytes()
+                # Yeni fotoğraf kişiyi yeniden kaydeder; eski ek şablonlar silinir
+                self.db.query(FaceTemplate).filter(FaceTemplate.person_id == person.id).delete()
 
             person.updated_at = datetime.now()
             self.db.commit()
             
-            # Yüklü yüzleri güncelle
-            self.load_known_faces()
+            # Galerideki satırı yerinde güncelle; kontrol ve değişiklik eşzamanlı isteklerle karışmasın
+            with self._gallery_lock:
+                if person.id in self.gallery:
+                    self.gallery.replace(person.id, new_encoding, person.name)
+                elif person.is_active:
+                    self.gallery.add(person.id, person.name, person.face_encoding)
             
             self.logger.info(f"Kişi güncellendi: {person.name}")
             
@@ -260,8 +593,8 @@ class FaceRecognitionService:
             person.updated_at = datetime.now()
             self.db.commit()
             
-            # Yüklü yüzleri güncelle
-            self.load_known_faces()
+            # Satırı mezar taşıyla işaretle (sıkıştırma galeride periyodik yapılır)
+            self.gallery.remove(person.id)
             
             self.logger.info(f"Kişi silindi: {person.name}")
             
@@ -0,0 +1,250 @@
+import logging
+import threading
+import time
+import numpy as np
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import dlib
+except ImportError:  # Korelasyon takibi isteğe bağlıdır
+    dlib = None
+
+logger = logging.getLogger(__name__)
+
+Location = Tuple[int, int, int, int]
+
+
+def iou_matrix(boxes_a: Sequence[Location], boxes_b: Sequence[Location]) -> np.ndarray:
+    """(top, right, bottom, left) kutuları arasındaki (N, M) kesişim/birleşim oranı."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    area_a = (a[:, 1] - a[:, 3]) * (a[:, 2] - a[:, 0])
+    area_b = (b[:, 1] - b[:, 3]) * (b[:, 2] - b[:, 0])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def _centers(boxes: Sequence[Location]) -> np.ndarray:
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+
+
+@dataclass
+class Track:
+    track_id: int
+    location: Location
+    person_id: Optional[int] = None
+    name: Optional[str] = None
+    distance: Optional[float] = None
+    identified: bool = False
+    misses: int = 0
+    last_encoded: int = -1
+    last_seen: float = 0.0
+    correlation: Any = None
+
+    @property
+    def label(self) -> str:
+        return self.name if self.person_id is not None else "Bilinmeyen"
+
+
+class FaceTracker:
+    """Yüzlere kareler boyunca kalıcı takip kimliği veren IoU/merkez tabanlı çoklu nesne takipçisi.
+
+    Tam tespit yalnızca her `detect_every` karede bir ya da bir takip
+    kaybolduğunda çalışır; aradaki karelerde kutular son konumda tutulur veya
+    (dlib kuruluysa ve `use_correlation` açıksa) korelasyon takipçisiyle
+    güncellenir. Her takibin kimliği hatırlanır; bir kişi her görünüşünde bir
+    kez kodlanır. Tanınmayan yüzler `retry_unknown_every` karede bir yeniden
+    denenir. Tespit çalışmayan (ör. hareketsiz) karelerde takipler `expire`
+    ile yaşlandırılır; `max_idle` saniyedir görülmeyen takip düşer.
+    """
+
+    def __init__(
+        self,
+        detect_every: int = 5,
+        iou_threshold: float = 0.3,
+        max_center_shift: float = 0.5,
+        max_misses: int = 2,
+        retry_unknown_every: int = 15,
+        use_correlation: bool = False,
+        min_correlation_quality: float = 7.0,
+        max_idle: float = 2.0
+    ):
+        self.detect_every = max(detect_every, 1)
+        self.iou_threshold = iou_threshold
+        self.max_center_shift = max_center_shift
+        self.max_misses = max_misses
+        self.retry_unknown_every = retry_unknown_every
+        self.use_correlation = use_correlation and dlib is not None
+        self.min_correlation_quality = min_correlation_quality
+        self.max_idle = max_idle
+        self._tracks: Dict[int, Track] = {}
+        self._next_id = 1
+        self._frame_index = 0
+        self._lost = False
+        self._identified = deque()
+        self._lock = threading.Lock()
+        if use_correlation and dlib is None:
+            logger.warning("dlib bulunamadı, korelasyon takibi devre dışı")
+
+    @property
+    def frame_index(self) -> int:
+        return self._frame_index
+
+    def step(self, frame: np.ndarray, detect: Callable[[np.ndarray], List[Location]]) -> List[Track]:
+        """Bir kare ilerler; gerekiyorsa tespit çalıştırır ve kodlanması gereken takipleri döndürür."""
+        with self._lock:
+            self._frame_index += 1
+            if self._lost or (self._frame_index - 1) % self.detect_every == 0:
+                self._update(list(detect(frame)), frame)
+            elif self.use_correlation:
+                self._predict(frame)
+            return self._pending()
+
+    def assign(self, track_ids: Sequence[int], matches: Sequence[Any]):
+        """Kodlanan takiplere eşleştirme sonuçlarını (MatchResult) işler."""
+        with self._lock:
+            for track_id, match in zip(track_ids, matches):
+                track = self._tracks.get(track_id)
+                if track is None:
+                    continue
+                track.identified = True
+                if not match.is_match:
+                    continue
+                if match.person_id != track.person_id:
+                    track.person_id, track.name, track.distance = match.person_id, match.name, match.distance
+                    self._identified.append(replace(track, correlation=None))
+                elif track.distance is None or match.distance < track.distance:
+                    # Aynı kişinin daha yakın eşleşmesi varlık oturumunun en iyi mesafesine yansır
+                    track.distance = match.distance
+
+    def pop_identified(self) -> List[Track]:
+        """Son çağrıdan beri kimliği belirlenen takipler (her görünüş için bir kez loglamak için)."""
+        identified = []
+        while self._identified:
+            identified.append(self._identified.popleft())
+        return identified
+
+    def tracks(self) -> List[Track]:
+        with self._lock:
+            return [replace(track, correlation=None) for track in self._tracks.values()]
+
+    def expire(self, now: float = None) -> List[Track]:
+        """`max_idle` saniyedir tespitle doğrulanmayan takipleri düşürür ve döndürür.
+
+        Adım atılmayan karelerde (hareket yok, zamanlayıcı atladı) çağrılır;
+        aksi halde sahneden çıkan kişinin takibi ve varlık oturumu sürer.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            stale = [tid for tid, track in self._tracks.items() if now - track.last_seen > self.max_idle]
+            return [replace(self._tracks.pop(tid), correlation=None) for tid in stale]
+
+    def reset(self):
+        with self._lock:
+            self._tracks.clear()
+            self._identified.clear()
+            self._frame_index = 0
+            self._lost = False
+
+    def _pending(self) -> List[Track]:
+        pending = []
+        for track in self._tracks.values():
+            # Tanınmayan ya da sonucu kuyrukta atılan takipler aralıklarla yeniden denenir
+            retry = (track.person_id is None and
+                     self._frame_index - track.last_encoded >= self.retry_unknown_every)
+            if track.last_encoded < 0 or retry:
+                # Sonuç gelene kadar aynı takibi tekrar kodlama kuyruğuna alma
+                track.last_encoded = self._frame_index
+                pending.append(replace(track, correlation=None))
+        return pending
+
+    def _update(self, locations: List[Location], frame: np.ndarray):
+        """Tespitleri mevcut takiplerle açgözlü IoU, ardından merkez mesafesiyle eşleştirir."""
+        self._lost = False
+        track_ids = list(self._tracks)
+        boxes = [self._tracks[tid].location for tid in track_ids]
+        matched_tracks, matched_detections = set(), set()
+
+        if boxes and locations:
+            ious = iou_matrix(boxes, locations)
+            for flat in np.argsort(-ious, axis=None):
+                i, j = np.unravel_index(flat, ious.shape)
+                if ious[i, j] < self.iou_threshold:
+                    break
+                if i in matched_tracks or j in matched_detections:
+                    continue
+                matched_tracks.add(i)
+                matched_detections.add(j)
+                self._move(self._tracks[track_ids[i]], locations[j], frame)
+
+            # Hızlı hareket eden yüzlerde kutular örtüşmeyebilir; merkez mesafesine bak
+            centers_t, centers_d = _centers(boxes), _centers(locations)
+            widths = np.asarray([b[1] - b[3] for b in boxes], dtype=np.float64)
+            shifts = np.linalg.norm(centers_t[:, None] - centers_d[None], axis=2) / np.maximum(widths[:, None], 1)
+            for flat in np.argsort(shifts, axis=None):
+                i, j = np.unravel_index(flat, shifts.shape)
+                if shifts[i, j] > self.max_center_shift:
+                    break
+                if i in matched_tracks or j in matched_detections:
+                    continue
+                matched_tracks.add(i)
+                matched_detections.add(j)
+                self._move(self._tracks[track_ids[i]], locations[j], frame)
+
+        for i, track_id in enumerate(track_ids):
+            if i in matched_tracks:
+                continue
+            track = self._tracks[track_id]
+            track.misses += 1
+            if track.misses > self.max_misses:
+                del self._tracks[track_id]
+            else:
+                # Kaybolan takibi bir sonraki karede yeniden tespitle doğrula
+                self._lost = True
+
+        for j, location in enumerate(locations):
+            if j not in matched_detections:
+                track = Track(self._next_id, tuple(location), last_seen=time.monotonic())
+                self._next_id += 1
+                self._start_correlation(track, frame)
+                self._tracks[track.track_id] = track
+
+    def _move(self, track: Track, location: Location, frame: np.ndarray):
+        track.location = tuple(location)
+        track.misses = 0
+        track.last_seen = time.monotonic()
+        self._start_correlation(track, frame)
+
+    def _start_correlation(self, track: Track, frame: np.ndarray):
+        if not self.use_correlation:
+            return
+        top, right, bottom, left = track.location
+        track.correlation = dlib.correlation_tracker()
+        track.correlation.start_track(frame, dlib.rectangle(left, top, right, bottom))
+
+    def _predict(self, frame: np.ndarray):
+        """Tespit olmayan karelerde kutuları korelasyon takipçisiyle kaydırır."""
+        height, width = frame.shape[:2]
+        for track in self._tracks.values():
+            if track.correlation is None:
+                continue
+            quality = track.correlation.update(frame)
+            if quality < self.min_correlation_quality:
+                self._lost = True
+                continue
+            track.last_seen = time.monotonic()
+            position = track.correlation.get_position()
+            track.location = (
+                max(int(position.top()), 0),
+                min(int(position.right()), width),
+                min(int(position.bottom()), height),
+                max(int(position.left()), 0)
+            )
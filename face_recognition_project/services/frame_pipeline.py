@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DropOldestQueue:
+    """Dolduğunda en eski öğeyi atan sınırlı kuyruk (geri basınçta en yeni kare korunur)."""
+
+    def __init__(self, maxsize: int = 2):
+        self._items = deque(maxlen=max(maxsize, 1))
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Öğe gelene kadar bekler; süre dolarsa None döner."""
+        with self._condition:
+            if not self._items and not self._condition.wait_for(lambda: bool(self._items), timeout):
+                return None
+            return self._items.popleft()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class StageStats:
+    """Bir aşamanın işlenen kare sayısı ve gecikme sayaçları."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'count': self.count,
+                'mean_ms': self.total * 1000 / self.count if self.count else 0.0,
+                'last_ms': self.last * 1000,
+                'max_ms': self.max * 1000
+            }
+
+
+@dataclass
+class FramePacket:
+    frame_id: int
+    frame: Any
+    captured_at: float
+    locations: List[tuple] = field(default_factory=list)
+    track_ids: List[int] = field(default_factory=list)
+    regions: Optional[List[tuple]] = None
+    encodings: List[Any] = field(default_factory=list)
+    matches: List[Any] = field(default_factory=list)
+    detect_time: float = 0.0
+    encode_time: float = 0.0
+
+
+class FramePipeline:
+    """Yakalama -> tespit -> kodlama -> eşleştirme aşamalarını ayrı iş parçacıklarında çalıştırır.
+
+    Aşamalar arasında en eskiyi atan sınırlı kuyruklar vardır; yavaş bir aşama
+    yakalamayı ve arayüzü hiçbir zaman bekletmez. Görüntü için her zaman en
+    son yakalanan kare (`latest_frame`), tanıma için en son tamamlanan sonuç
+    (`latest_result`) kullanılır; tanıma CPU'nun izin verdiği hızda ilerler.
+
+    `tracker` (FaceTracker) verilirse tespit aşaması takipçiyi ilerletir ve
+    yalnızca kodlanması gereken takipleri sonraki aşamalara iletir; takip
+    sıralı olduğu için tespit tek işçiyle çalışır.
+
+    `gate` verilirse (ör. hareket dedektörü) yakalanan her kare için çağrılır;
+    boş liste dönen kareler yalnızca görüntülenir, işlenmez. Dönen bölgeler
+    `detect(frame, regions)` çağrısına iletilir.
+    """
+
+    STAGES = ('capture', 'detect', 'encode', 'match')
+
+    def __init__(
+        self,
+        read_frame: Callable[[], Any],
+        detect: Callable[[Any], List[tuple]],
+        encode: Callable[[Any, List[tuple]], List[Any]],
+        match: Callable[[List[Any]], List[Any]],
+        on_result: Optional[Callable[[FramePacket], None]] = None,
+        tracker=None,
+        gate: Optional[Callable[[Any], List[tuple]]] = None,
+        queue_size: int = 2,
+        detect_workers: int = 1,
+        encode_workers: int = 1
+    ):
+        self.read_frame = read_frame
+        self.detect = detect
+        self.encode = encode
+        self.match = match
+        self.on_result = on_result
+        self.tracker = tracker
+        self.gate = gate
+        self.idle_frames = 0
+        self.detect_workers = 1 if tracker is not None else detect_workers
+        self.encode_workers = encode_workers
+        self._queues = {stage: DropOldestQueue(queue_size) for stage in self.STAGES[1:]}
+        self._stats = {stage: StageStats() for stage in self.STAGES}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._frame_id = 0
+        self._latest_frame: Optional[FramePacket] = None
+        self._latest_result: Optional[FramePacket] = None
+        self._result_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        workers = [('capture', self._capture_loop, 1),
+                   ('detect', self._detect_loop, self.detect_workers),
+                   ('encode', self._encode_loop, self.encode_workers),
+                   ('match', self._match_loop, 1)]
+        for name, target, count in workers:
+            for i in range(count):
+                thread = threading.Thread(target=target, name=f"pipeline-{name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info("Kare işleme hattı başlatıldı")
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Kare işleme hattı durduruldu")
+
+    def latest_frame(self) -> Optional[FramePacket]:
+        """En son yakalanan kare (tanıma sonucunu beklemeden)."""
+        return self._latest_frame
+
+    def latest_result(self) -> Optional[FramePacket]:
+        """Tüm aşamaları tamamlamış en yeni kare."""
+        return self._latest_result
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Aşama başına gecikme sayaçları ve kuyrukta atılan kare sayıları."""
+        report = {stage: stats.as_dict() for stage, stats in self._stats.items()}
+        for stage, queue in self._queues.items():
+            report[stage]['dropped'] = queue.dropped
+        report['capture']['idle'] = self.idle_frames
+        return report
+
+    def _run_stage(self, stage: str, work: Callable[[FramePacket], None], next_stage: Optional[str]):
+        """Kuyruktan paket alıp işleyen ortak döngü."""
+        while not self._stop.is_set():
+            packet = self._queues[stage].get(timeout=0.1)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            try:
+                work(packet)
+            except Exception as e:
+                logger.error(f"{stage} aşamasında hata: {str(e)}")
+                continue
+            self._stats[stage].record(time.perf_counter() - start)
+            if next_stage is not None:
+                self._queues[next_stage].put(packet)
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                frame = self.read_frame()
+            except Exception as e:
+                logger.error(f"capture aşamasında hata: {str(e)}")
+                frame = None
+            if frame is None:
+                time.sleep(0.01)
+                continue
+            self._frame_id += 1
+            packet = FramePacket(self._frame_id, frame, time.time())
+            self._latest_frame = packet
+            if self.gate is not None:
+                packet.regions = self.gate(frame)
+                if not packet.regions:
+                    # Değişiklik yok: kare yalnızca gösterilir, görülmeyen takipler yaşlanır
+                    self.idle_frames += 1
+                    if self.tracker is not None:
+                        self.tracker.expire()
+                    self._stats['capture'].record(time.perf_counter() - start)
+                    continue
+            self._stats['capture'].record(time.perf_counter() - start)
+            self._queues['detect'].put(packet)
+
+    def _detect_loop(self):
+        def work(packet: FramePacket):
+            detect = self.detect
+            if packet.regions is not None:
+                detect = lambda frame: self.detect(frame, packet.regions)
+            if self.tracker is None:
+                packet.locations = list(detect(packet.frame))
+                return
+            pending = self.tracker.step(packet.frame, detect)
+            packet.track_ids = [track.track_id for track in pending]
+            packet.locations = [track.location for track in pending]
+        self._run_stage('detect', work, 'encode')
+
+    def _encode_loop(self):
+        def work(packet: FramePacket):
+            packet.encodings = list(self.encode(packet.frame, packet.locations)) if packet.locations else []
+        self._run_stage('encode', work, 'match')
+
+    def _match_loop(self):
+        def work(packet: FramePacket):
+            packet.matches = list(self.match(packet.encodings)) if packet.encodings else []
+            if self.tracker is not None:
+                self.tracker.assign(packet.track_ids, packet.matches)
+            with self._result_lock:
+                # Birden fazla işçide sıra bozulabilir; eski kareler yeni sonucu ezmesin
+                if self._latest_result is not None and self._latest_result.frame_id > packet.frame_id:
+                    return
+                self._latest_result = packet
+            if self.on_result is not None:
+                self.on_result(packet)
+        self._run_stage('match', work, None)
@@ -0,0 +1,86 @@
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ActivePresence:
+    person_id: int
+    camera: str
+    first_seen: datetime
+    last_seen: datetime
+    best_distance: Optional[float]
+    frame_count: int = 1
+    last_frame_id: Optional[int] = None
+
+    def as_row(self) -> Tuple[int, str, datetime, datetime, Optional[float], int]:
+        """presence_sessions tablosuna yazılacak (person_id, camera, first_seen, last_seen, best_distance, frame_count)."""
+        return (self.person_id, self.camera, self.first_seen, self.last_seen, self.best_distance, self.frame_count)
+
+
+class PresenceTracker:
+    """Kişi ve kamera başına varlık oturumları; her görünüş için tek kayıt üretir.
+
+    İlk görüşte oturum açılır; kişi `gap` saniye içinde yeniden görüldükçe
+    oturum uzar. Boşluk aşılınca ya da oturum `max_duration` saniyeyi
+    geçince oturum kapanır ve `on_close` bir kez çağrılır. Aynı kare
+    numarasıyla gelen tekrar gözlemler `frame_count`'u artırmaz.
+    """
+
+    def __init__(self, on_close: Callable[[ActivePresence], None], gap: float = 10.0,
+                 max_duration: float = 900.0):
+        self.on_close = on_close
+        self.gap = timedelta(seconds=gap)
+        self.max_duration = timedelta(seconds=max_duration)
+        self._sessions: Dict[Tuple[int, str], ActivePresence] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, person_id: int, camera: str, distance: Optional[float] = None,
+                seen_at: Optional[datetime] = None, frame_id: Optional[int] = None):
+        """Kişinin bir karede görüldüğünü kaydeder; gerekirse önceki oturumu kapatıp yenisini açar."""
+        seen_at = seen_at or datetime.now()
+        closed = []
+        with self._lock:
+            key = (person_id, camera)
+            session = self._sessions.get(key)
+            if session is not None and (seen_at - session.last_seen > self.gap or
+                                        seen_at - session.first_seen > self.max_duration):
+                closed.append(self._sessions.pop(key))
+                session = None
+            if session is None:
+                self._sessions[key] = ActivePresence(person_id, camera, seen_at, seen_at, distance,
+                                                     last_frame_id=frame_id)
+            else:
+                if frame_id is None or frame_id != session.last_frame_id:
+                    session.frame_count += 1
+                    session.last_frame_id = frame_id
+                session.last_seen = max(session.last_seen, seen_at)
+                if distance is not None and (session.best_distance is None or distance < session.best_distance):
+                    session.best_distance = distance
+        self._emit(closed)
+
+    def expire(self, now: Optional[datetime] = None) -> List[ActivePresence]:
+        """`gap` süresince görülmeyen kişilerin oturumlarını kapatır."""
+        now = now or datetime.now()
+        with self._lock:
+            keys = [key for key, session in self._sessions.items() if now - session.last_seen > self.gap]
+            closed = [self._sessions.pop(key) for key in keys]
+        self._emit(closed)
+        return closed
+
+    def close_all(self) -> List[ActivePresence]:
+        """Açık tüm oturumları kapatır (kamera durdurulurken ya da kapanışta)."""
+        with self._lock:
+            closed = list(self._sessions.values())
+            self._sessions.clear()
+        self._emit(closed)
+        return closed
+
+    def active(self) -> List[ActivePresence]:
+        with self._lock:
+            return [replace(session) for session in self._sessions.values()]
+
+    def _emit(self, closed: List[ActivePresence]):
+        for session in closed:
+            self.on_close(session)
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+from application.services.bulk_enrollment import BulkEnrollment, discover_images, read_manifest
+from database.models import create_session_factory
+from infrastructure.persistence.repositories import PersonRepository
+
+KNOWN_FACES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'known_faces')
+
+
+class TestBulkEnrollmentSources(unittest.TestCase):
+    def test_directory_layout_and_manifest(self):
+        with tempfile.TemporaryDirectory() as root:
+            for name, files in {'ayse': ['1.jpg', '2.PNG', 'notlar.txt'], 'mehmet': ['a.jpeg']}.items():
+                os.makedirs(os.path.join(root, name))
+                for file_name in files:
+                    open(os.path.join(root, name, file_name), 'w').close()
+            open(os.path.join(root, 'kapak.jpg'), 'w').close()
+
+            items = discover_images(root)
+            self.assertEqual([(item.name, os.path.basename(item.path)) for item in items],
+                             [('ayse', '1.jpg'), ('ayse', '2.PNG'), ('mehmet', 'a.jpeg')])
+
+            manifest = os.path.join(root, 'manifest.csv')
+            with open(manifest, 'w', encoding='utf-8') as f:
+                f.write("path,name,department,access_level\nayse/1.jpg,Ayşe,IT,3\nmehmet/a.jpeg,Mehmet,,\n")
+            items = read_manifest(manifest)
+            self.assertEqual(items[0].path, os.path.join(root, 'ayse', '1.jpg'))
+            self.assertEqual(items[0].details, {'department': 'IT', 'access_level': 3})
+            self.assertEqual((items[1].name, items[1].details), ('Mehmet', {}))
+
+
+class TestBulkEnrollmentRun(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.factory = create_session_factory(os.path.join(self.tmp.name, 'test.db'))
+        self.session = self.factory()
+        self.repository = PersonRepository(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.factory.kw['bind'].dispose()
+        self.tmp.cleanup()
+
+    def test_run_enrolls_into_sqlite(self):
+        photo = os.path.join(self.tmp.name, 'ziyech.jpg')
+        shutil.copy(os.path.join(KNOWN_FACES_DIR, 'hakim ziyech', 'known_names.jpg'), photo)
+        with open(os.path.join(self.tmp.name, 'bozuk.jpg'), 'wb') as f:
+            f.write(b'jpeg degil')
+        manifest = os.path.join(self.tmp.name, 'manifest.csv')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            f.write("path,name,department,access_level,email,phone\n"
+                    "ziyech.jpg,Hakim,Spor,3,hakim@example.com,555\n"
+                    "bozuk.jpg,Hakim,,,,\n"
+                    "ziyech.jpg,Eski,,,,\n")
+        # Pasif kişinin ismi de tekil sütunda durduğu için atlanmalı
+        old_id = self.repository.add_batch([('Eski', [b'\x00'], {})])[0]
+        self.repository.deactivate(old_id)
+
+        report = BulkEnrollment(self.repository, workers=1, chunk_size=1).run(read_manifest(manifest))
+
+        self.assertEqual(report['existing_persons'], 1)
+        self.assertEqual((report['persons'], report['templates']), (1, 0))
+        self.assertEqual(report['skipped_reasons'], {'okunamadı': 1})
+        self.assertEqual(sorted(self.repository.get_names()), ['Eski', 'Hakim'])
+        self.assertEqual(list(self.repository.get_access_attributes().values()), [('Spor', 3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import itertools
+import numpy as np
+import time
+import unittest
+from collections import Counter
+from infrastructure.recognition.roi import RegionOfInterest
+from services.adaptive_scheduler import AdaptiveScheduler
+from services.camera_manager import CameraManager, parse_source
+
+
+class FakeCapture:
+    """Sabit hızda sayaç kareleri üreten, istenirse belirli bir karede ölen sahte kamera."""
+
+    def __init__(self, fail_after=None):
+        self.frames = itertools.count(1)
+        self.fail_after = fail_after
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        time.sleep(0.002)
+        frame = next(self.frames)
+        if self.fail_after is not None and frame > self.fail_after:
+            return False, None
+        return True, frame
+
+    def release(self):
+        self.released = True
+
+
+class TestCameraManager(unittest.TestCase):
+    def run_manager(self, manager, seconds=0.4):
+        manager.start()
+        try:
+            time.sleep(seconds)
+        finally:
+            manager.stop()
+
+    def test_parse_source(self):
+        self.assertEqual(parse_source('3'), 3)
+        self.assertEqual(parse_source('rtsp://kamera/1'), 'rtsp://kamera/1')
+        self.assertEqual(parse_source('videos/giris.mp4'), 'videos/giris.mp4')
+
+    def test_streams_share_workers_fairly(self):
+        results = Counter()
+
+        def slow_detect(frame):
+            time.sleep(0.005)
+            return [(0, 1, 1, 0)]
+
+        manager = CameraManager(
+            detect=slow_detect,
+            encode=lambda frame, locations: [frame],
+            match=lambda encodings: ['eslesme'] * len(encodings),
+            on_result=lambda stream_id, packet: results.update([stream_id]),
+            opener=lambda source: FakeCapture(),
+            detect_workers=1,
+            encode_workers=1
+        )
+        for i in range(6):
+            manager.add_stream(i, f"kamera-{i}")
+        self.run_manager(manager)
+
+        # Tek tespit işçisi altı akışa sırayla hizmet eder; hiçbiri aç kalmaz
+        self.assertEqual(set(results), set(manager.streams()))
+        self.assertLessEqual(max(results.values()), 2 * min(results.values()) + 1)
+        stats = manager.stats()
+        self.assertTrue(all(stream['dropped'] > 0 for stream in stats['streams'].values()))
+        self.assertEqual(manager.latest_result('kamera-0').matches, ['eslesme'])
+
+    def test_dead_stream_reconnects(self):
+        captures = []
+
+        def opener(source):
+            if not captures:
+                captures.append(FakeCapture(fail_after=5))
+            elif len(captures) == 1:
+                captures.append(None)
+                return None  # İlk yeniden bağlanma denemesi başarısız
+            else:
+                captures.append(FakeCapture())
+            return captures[-1]
+
+        manager = CameraManager(
+            detect=lambda frame: [],
+            encode=lambda frame, locations: [],
+            match=lambda encodings: [],
+            opener=opener,
+            reconnect_delay=0.01,
+            max_failures=3
+        )
+        manager.add_stream('rtsp://kamera/1')
+        self.run_manager(manager, seconds=0.3)
+
+        stream = manager.stats()['streams']['rtsp://kamera/1']
+        self.assertEqual(stream['reconnects'], 1)
+        self.assertTrue(captures[0].released)
+        self.assertGreater(stream['frames'], 5)
+        self.assertGreater(manager.latest_frame('rtsp://kamera/1').frame, 5)
+
+    def test_roi_limits_detection_area(self):
+        seen_regions = []
+
+        def detect(frame, regions):
+            seen_regions.append(regions)
+            # Biri ilgi alanı içinde, biri kutunun dışında merkezli iki yüz
+            return [(10, 40, 40, 10), (10, 95, 40, 65)]
+
+        capture = FakeCapture()
+        capture.read = lambda: (time.sleep(0.002), (True, np.zeros((100, 100, 3), dtype=np.uint8)))[1]
+        manager = CameraManager(
+            detect=detect,
+            encode=lambda frame, locations: list(locations),
+            match=lambda encodings: encodings,
+            opener=lambda source: capture
+        )
+        manager.add_stream(0, roi=RegionOfInterest([[[0.0, 0.0], [0.6, 0.0], [0.6, 1.0], [0.0, 1.0]]]))
+        self.run_manager(manager, seconds=0.1)
+
+        self.assertEqual(seen_regions[0], [(0, 60, 100, 0)])
+        self.assertEqual(manager.latest_result('0').locations, [(10, 40, 40, 10)])
+
+    def test_each_stream_has_its_own_scheduler(self):
+        scales = Counter()
+
+        def detect(frame, scale=None):
+            scales.update([scale])
+            return [(0, 1, 1, 0)]
+
+        schedulers = iter([AdaptiveScheduler(initial_interval=0.0, initial_scale=0.5),
+                           AdaptiveScheduler(initial_interval=1.0, initial_scale=0.25)])
+        manager = CameraManager(
+            detect=detect,
+            encode=lambda frame, locations: [frame],
+            match=lambda encodings: [None] * len(encodings),
+            scheduler_factory=lambda: next(schedulers),
+            opener=lambda source: FakeCapture()
+        )
+        manager.add_stream(0, 'hizli')
+        manager.add_stream(1, 'seyrek')
+        self.run_manager(manager, seconds=0.2)
+
+        # Seyrek akış aralığı nedeniyle tek kare işler; ölçekler akışa özeldir
+        self.assertEqual(scales[0.25], 1)
+        self.assertGreater(scales[0.5], 1)
+        stats = manager.stats()['streams']
+        self.assertGreater(stats['seyrek']['skipped'], 0)
+        self.assertEqual(stats['hizli']['skipped'], 0)
+        self.assertIn('latency_ms', stats['hizli']['scheduler'])
+
+
+if __name__ == '__main__':
+    unittest.main()
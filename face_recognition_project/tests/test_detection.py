@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from infrastructure.recognition.ann_index import IVFIndex
+from infrastructure.recognition.detection import crop_box, scale_locations
+from infrastructure.recognition.face_recognition_service import IndexedFaceRecognitionService
+from infrastructure.recognition.roi import RegionOfInterest
+
+
+class TestScaledDetection(unittest.TestCase):
+    def test_boxes_rescaled_and_clamped(self):
+        locations = scale_locations([(10, 60, 50, 20), (0, 480, 270, 470)], 0.25, (1080, 1920, 3))
+        self.assertEqual(locations[0], (40, 240, 200, 80))
+        self.assertEqual(locations[1], (0, 1920, 1080, 1880))
+
+    def test_crop_box_keeps_margin_inside_frame(self):
+        self.assertEqual(crop_box((40, 240, 200, 80), (1080, 1920, 3)), (0, 240, 40, 280))
+
+
+class TestIndexedCompareFaces(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.known = list(rng.normal(scale=0.1, size=(200, 128)))
+        # İki satır sorguya tolerans içinde yakın
+        self.query = self.known[10] + 0.001
+        self.known[20] = self.known[10] + 0.002
+        self.version = 1
+        self.index = IVFIndex(nlist=4, nprobe=4, kmeans_iterations=3).build(np.array(self.known), version=1)
+        self.service = IndexedFaceRecognitionService(self.index, lambda: self.version, k=1)
+
+    def test_flags_every_candidate_within_tolerance(self):
+        # k=1 ile başlanır; ikinci aday için arama genişletilir
+        matches = self.service.compare_faces(self.query, self.known, tolerance=0.1)
+        self.assertEqual(np.flatnonzero(matches).tolist(), [10, 20])
+
+    def test_same_size_change_is_not_served_from_stale_index(self):
+        changed = list(self.known)
+        changed[20] = changed[20] + 5.0
+        self.version = 2
+        matches = self.service.compare_faces(self.query, changed, tolerance=0.1)
+        self.assertEqual(np.flatnonzero(matches).tolist(), [10])
+
+
+class TestRegionOfInterest(unittest.TestCase):
+    def setUp(self):
+        # Kapı kamerası: karenin ortasındaki dikey şerit, üstte dar bir üçgen
+        self.roi = RegionOfInterest([
+            [[0.3, 0.0], [0.6, 0.0], [0.6, 1.0], [0.3, 1.0]],
+            [[0.6, 0.0], [0.8, 0.0], [0.6, 0.5]]
+        ])
+        self.shape = (1000, 1000, 3)
+
+    def test_boxes_and_coverage(self):
+        self.assertEqual(self.roi.boxes(self.shape), [(0, 600, 1000, 300), (0, 800, 500, 600)])
+        self.assertAlmostEqual(self.roi.coverage(self.shape), 0.4)
+
+    def test_restrict_clips_regions_to_boxes(self):
+        self.assertEqual(self.roi.restrict(None, self.shape), self.roi.boxes(self.shape))
+        self.assertEqual(self.roi.restrict([(100, 400, 200, 0), (900, 1000, 1000, 900)], self.shape),
+                         [(100, 400, 200, 300)])
+
+    def test_filter_drops_faces_outside_polygons(self):
+        inside, corner, outside = (100, 500, 200, 400), (350, 790, 450, 690), (100, 200, 200, 100)
+        self.assertEqual(self.roi.filter([inside, corner, outside], self.shape), [inside])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+from presentation.display_buffer import DisplayBuffer
+
+
+class TestDisplayBuffer(unittest.TestCase):
+    def test_fits_target_and_reuses_buffer(self):
+        display = DisplayBuffer()
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        frame[..., 0] = 255  # BGR mavi
+
+        first = display.render(frame, 320, 320)
+        self.assertEqual(first.shape, (240, 320, 3))
+        self.assertTrue((first[..., 2] == 255).all())  # RGB'de mavi son kanal
+        generation = display.generation
+
+        second = display.render(frame, 320, 320)
+        self.assertIs(second, first)
+        self.assertEqual(display.generation, generation)
+
+        display.render(frame, 640, 480)
+        self.assertEqual(display.size, (640, 480))
+        self.assertEqual(display.generation, generation + 1)
+
+    def test_overlays_do_not_touch_source_frame(self):
+        display = DisplayBuffer()
+        frame = np.zeros((200, 200, 3), dtype=np.uint8)
+        rgb = display.render(frame, 100, 100, [((20, 120, 120, 20), 'Ali', (0, 255, 0))])
+        self.assertFalse(frame.any())
+        self.assertTrue(rgb[:, :, 1].any())
+        self.assertEqual(rgb[10, 30, 1], 255)  # kutu kenarı ölçekli konumda
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,15 @@
+import os
+import tempfile
 import unittest
+from types import SimpleNamespace
+import face_recognition
 from services.face_recognition_service import FaceRecognitionService
-from database.models import Person
+from database.models import Person, create_session_factory
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
+KNOWN_FACES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'known_faces')
+
 
 class TestFaceRecognition(unittest.TestCase):
     def setUp(self):
@@ -18,4 +24,70 @@ class TestFaceRecognition(unittest.TestCase):
         self.service.stop_camera()
 
     def tearDown(self):
-        self.session.close()
\ No newline at end of file
+        self.session.close()
+
+
+class TestPersonImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.factory = create_session_factory(os.path.join(self.tmp.name, 'test.db'))
+        self.session = self.factory()
+        self.service = FaceRecognitionService(self.session, snapshot_dir=None)
+        self.first = os.path.join(KNOWN_FACES_DIR, 'hakim ziyech', 'known_names.jpg')
+        self.second = os.path.join(KNOWN_FACES_DIR, 'fehim', 'known_names.jpg')
+
+    def tearDown(self):
+        self.service.close()
+        self.session.close()
+        self.factory.kw['bind'].dispose()
+        self.tmp.cleanup()
+
+    def test_add_and_update_accept_path_and_array(self):
+        self.service.add_person(self.first, "Hakim")
+        self.service.add_person(face_recognition.load_image_file(self.second), "Fehim")
+        hakim, fehim = self.session.query(Person).order_by(Person.id).all()
+        first_encoding, second_encoding = hakim.face_encoding, fehim.face_encoding
+        self.assertEqual(self.service.gallery.identity_count, 2)
+
+        # Fotoğraflar yer değiştirir: biri dizi, diğeri dosya yolu olarak verilir
+        self.service.update_person(hakim.id, new_image=face_recognition.load_image_file(self.second))
+        self.service.update_person(fehim.id, new_name="Fehim Bey", new_image=self.first)
+        self.session.refresh(hakim)
+        self.session.refresh(fehim)
+        self.assertEqual((hakim.face_encoding, fehim.face_encoding), (second_encoding, first_encoding))
+        self.assertEqual(self.service.gallery.name_of(fehim.id), "Fehim Bey")
+
+    def test_session_scopes_run_concurrently(self):
+        other = self.factory()
+        try:
+            with self.service.session_scope(self.session) as first, self.service.session_scope(other) as second:
+                # İkinci kapsam birincinin bitmesini beklemez; galeri paylaşılır, oturum paylaşılmaz
+                self.assertIsNot(first.db, second.db)
+                first.add_person(self.first, "Hakim")
+                self.assertIn(self.session.query(Person).one().id, second.gallery)
+            self.assertIs(self.service.db, self.session)
+        finally:
+            other.close()
+    def test_shared_gallery_outlives_startup_session(self):
+        startup = self.factory()
+        service = FaceRecognitionService(startup, snapshot_dir=os.path.join(self.tmp.name, 'snapshots'),
+                                         shared_gallery=True)
+        # API başlatma oturumu servis kurulunca kapanır
+        startup.close()
+        try:
+            with service.session_scope(self.session) as scoped:
+                scoped.add_person(self.first, "Hakim")
+            person = self.session.query(Person).one()
+            self.assertIn(person.id, service.gallery)
+            self.assertEqual(service.gallery.store.read_manifest()['fingerprint']['active_count'], 1)
+        finally:
+            service.close()
+
+    def test_stream_results_feed_presence_without_display(self):
+        track = SimpleNamespace(person_id=5, distance=0.3)
+        tracker = SimpleNamespace(pop_identified=lambda: [], tracks=lambda: [track])
+        self.service.camera_manager = SimpleNamespace(tracker=lambda stream_id: tracker, stop=lambda: None)
+        # Kare hiç gösterilmese de eşleştirme sonucu oturumu açar
+        self.service._on_stream_result('kapı', SimpleNamespace(frame_id=1))
+        self.assertEqual([(s.person_id, s.camera, s.best_distance) for s in self.service.presence.active()],
+                         [(5, 'kapı', 0.3)])
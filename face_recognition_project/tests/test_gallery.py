@@ -0,0 +1,385 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from infrastructure.recognition.gallery import FaceGallery
+from infrastructure.recognition.matcher import BatchMatcher
+from infrastructure.recognition.ann_index import IVFIndex, evaluate_recall
+from infrastructure.recognition.quantization import QuantizedGallery
+from infrastructure.recognition.sharded_matcher import ShardedGalleryIndex
+from infrastructure.recognition.partitions import GalleryPartitions, RecognitionFilter
+from infrastructure.persistence.gallery_snapshot import GallerySnapshotStore, SharedGallery
+
+
+class TestFaceGallery(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.encodings = self.rng.normal(size=(5, 128))
+        self.gallery = FaceGallery(capacity=2)
+        for i, encoding in enumerate(self.encodings):
+            self.gallery.add(i + 10, f"kisi_{i}", encoding.tobytes())
+
+    def test_matrix_is_contiguous_float32(self):
+        self.assertEqual(len(self.gallery), 5)
+        self.assertEqual(self.gallery.matrix.dtype, np.float32)
+        self.assertTrue(self.gallery.matrix.flags['C_CONTIGUOUS'])
+        self.assertEqual(list(self.gallery.ids), [10, 11, 12, 13, 14])
+
+    def test_distances_match_exact_norm(self):
+        queries = self.rng.normal(size=(3, 128))
+        expected = np.linalg.norm(queries[:, None, :] - self.encodings[None, :, :], axis=2)
+        np.testing.assert_allclose(self.gallery.distances(queries), expected, rtol=1e-4)
+
+    def test_remove_and_replace(self):
+        self.assertTrue(self.gallery.remove(11))
+        self.assertFalse(self.gallery.remove(11))
+        self.assertNotIn(11, self.gallery)
+        self.assertEqual(len(self.gallery), 4)
+        self.gallery.replace(12, self.encodings[0], name="yeni")
+        self.assertEqual(self.gallery.name_of(12), "yeni")
+        distances = self.gallery.distances(self.encodings[0])[0]
+        self.assertAlmostEqual(float(distances[self.gallery.position_of(12)]), 0.0, places=3)
+
+    def test_tombstones_keep_positions_until_compaction(self):
+        gallery = FaceGallery(compact_ratio=0.5, compact_min=2)
+        for i, encoding in enumerate(self.encodings):
+            gallery.add(i, str(i), encoding)
+        gallery.remove(1)
+        gallery.remove(3)
+        self.assertEqual((len(gallery), gallery.row_count, gallery.tombstones), (3, 5, 2))
+        self.assertEqual(gallery.position_of(4), 4)
+        self.assertTrue(np.isinf(gallery.distances(self.encodings[1])[0, 1]))
+        match = BatchMatcher(tolerance=0.6).match(gallery, [self.encodings[3]])[0]
+        self.assertFalse(match.is_match)
+
+        gallery.remove(0)
+        self.assertEqual((len(gallery), gallery.row_count, gallery.generation), (2, 2, 1))
+        self.assertEqual(list(gallery.ids), [2, 4])
+        self.assertEqual(gallery.names, ['2', '4'])
+
+    def test_published_views_are_immutable(self):
+        gallery = FaceGallery(capacity=5, compact_ratio=0.1, compact_min=0)
+        for i, encoding in enumerate(self.encodings):
+            gallery.add(i, str(i), encoding)
+        view = gallery.snapshot()
+        before = view.distances(self.encodings).copy()
+        gallery.replace(0, np.zeros(128), name="yeni")
+        gallery.add(99, "ek", np.ones(128))
+        gallery.remove(2)
+        np.testing.assert_array_equal(view.distances(self.encodings), before)
+        self.assertEqual(view.names, ['0', '1', '2', '3', '4'])
+        self.assertGreater(gallery.snapshot().version, view.version)
+        self.assertEqual(gallery.name_of(0), "yeni")
+        self.assertEqual(len(gallery.snapshot()), 5)
+
+
+class TestBatchMatcher(unittest.TestCase):
+    def setUp(self):
+        base = np.zeros(128)
+        near, nearer, far = base.copy(), base.copy(), base.copy()
+        near[0], nearer[0], far[0] = 0.5, 0.2, 3.0
+        self.gallery = FaceGallery.from_records([
+            (1, "ilk", near), (2, "yakin", nearer), (3, "uzak", far)
+        ])
+        self.matcher = BatchMatcher(tolerance=0.6)
+
+    def test_picks_closest_not_first_match(self):
+        query = np.zeros(128)
+        match = self.matcher.match(self.gallery, [query])[0]
+        self.assertEqual(match.person_id, 2)
+        self.assertAlmostEqual(match.distance, 0.2, places=4)
+        self.assertAlmostEqual(match.margin, 0.3, places=4)
+        self.assertGreater(match.score, 0.5)
+
+    def test_batch_with_unknown_face(self):
+        known, unknown = np.zeros(128), np.full(128, 5.0)
+        matches = self.matcher.match(self.gallery, np.stack([unknown, known]))
+        self.assertFalse(matches[0].is_match)
+        self.assertLess(matches[0].score, 0.5)
+        self.assertEqual(matches[1].person_id, 2)
+
+    def test_empty_inputs(self):
+        self.assertEqual(self.matcher.match(self.gallery, []), [])
+        match = self.matcher.match(FaceGallery(), [np.zeros(128)])[0]
+        self.assertFalse(match.is_match)
+
+
+class TestMultiTemplateMatching(unittest.TestCase):
+    def setUp(self):
+        base = np.zeros(128)
+        self.front, self.side, self.other = base.copy(), base.copy(), base.copy()
+        self.front[0], self.side[1], self.other[0] = 0.1, 0.5, 0.3
+        self.gallery = FaceGallery.from_records([
+            (1, "ayse", self.front), (2, "mehmet", self.other), (1, "ayse", self.side)
+        ])
+
+    def test_templates_grouped_per_identity(self):
+        self.assertEqual(len(self.gallery), 3)
+        self.assertEqual(self.gallery.identity_count, 2)
+        self.assertEqual(len(self.gallery.positions_of(1)), 2)
+        view = self.gallery.snapshot()
+        self.assertTrue(view.has_multiple_templates)
+        distances, _ = view.identity_distances([np.zeros(128)])
+        np.testing.assert_allclose(distances[0], [0.1, 0.3], atol=1e-5)
+
+    def test_margin_against_other_identity(self):
+        match = BatchMatcher(tolerance=0.6).match(self.gallery, [np.zeros(128)])[0]
+        self.assertEqual(match.person_id, 1)
+        # İkinci en yakın satır aynı kişiye ait olsa da margin diğer kişiye göre
+        self.assertAlmostEqual(match.margin, 0.2, places=4)
+
+    def test_centroid_aggregation(self):
+        query = (self.front + self.side) / 2
+        matcher = BatchMatcher(tolerance=0.6, aggregate='centroid')
+        match = matcher.match(self.gallery, [query])[0]
+        self.assertEqual(match.person_id, 1)
+        self.assertAlmostEqual(match.distance, 0.0, places=4)
+
+    def test_add_template_and_remove_identity(self):
+        extra = np.zeros(128)
+        extra[2] = 0.05
+        self.gallery.add_template(2, extra)
+        self.assertEqual(self.gallery.name_of(2), "mehmet")
+        match = BatchMatcher(tolerance=0.6).match(self.gallery, [extra])[0]
+        self.assertEqual(match.person_id, 2)
+        self.gallery.remove(1)
+        self.assertEqual(self.gallery.tombstones, 2)
+        view = self.gallery.snapshot()
+        self.assertEqual(view.identity_count, 1)
+        self.gallery.compact()
+        np.testing.assert_array_equal(self.gallery.ids, [2, 2])
+
+
+class TestIVFIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        centers = rng.normal(size=(20, 128))
+        self.matrix = (centers[rng.integers(0, 20, 2000)] + 0.1 * rng.normal(size=(2000, 128))).astype(np.float32)
+        self.queries = self.matrix[:50] + 0.01 * rng.normal(size=(50, 128)).astype(np.float32)
+        self.index = IVFIndex(nlist=16, nprobe=4, kmeans_iterations=5).build(self.matrix)
+
+    def test_full_probe_equals_exact_scan(self):
+        report = evaluate_recall(self.index, self.matrix, self.queries, nprobe_values=(4, 16))
+        self.assertEqual(report[-1]['nprobe'], 16)
+        self.assertEqual(report[-1]['recall_at_1'], 1.0)
+        self.assertGreaterEqual(report[0]['recall_at_1'], 0.9)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'index.npz')
+            self.index.save(path)
+            loaded = IVFIndex.load(path)
+        expected = self.index.search(self.queries, k=3)
+        actual = loaded.search(self.queries, k=3)
+        np.testing.assert_array_equal(expected[1], actual[1])
+
+    def test_matcher_uses_index(self):
+        gallery = FaceGallery.from_records((i, str(i), row) for i, row in enumerate(self.matrix))
+        matches = BatchMatcher(tolerance=0.6).match(gallery, self.queries[:5], index=self.index)
+        self.assertEqual([m.person_id for m in matches], [0, 1, 2, 3, 4])
+
+    def test_extend_adds_rows_to_nearest_lists(self):
+        gallery = FaceGallery.from_records((i, str(i), row) for i, row in enumerate(self.matrix))
+        gallery.add(5000, "yeni", self.matrix[10] + 0.02)
+        gallery.replace(3, self.matrix[20] + 0.02)
+        self.assertTrue(self.index.extend(gallery.snapshot()))
+        self.assertEqual((len(self.index), self.index.version), (2002, gallery.version))
+        self.assertEqual(self.index.offsets[-1], 2002)
+        matches = BatchMatcher(tolerance=0.6).match(gallery, [self.matrix[10] + 0.02, self.matrix[20] + 0.02],
+                                                    index=self.index)
+        self.assertEqual([m.person_id for m in matches], [5000, 3])
+
+
+class TestQuantizedGallery(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.matrix = rng.normal(scale=0.1, size=(3000, 128)).astype(np.float32)
+        self.gallery = FaceGallery.from_records((i, str(i), row) for i, row in enumerate(self.matrix))
+        self.queries = self.matrix[[5, 700, 2999]] + 0.005 * rng.normal(size=(3, 128)).astype(np.float32)
+
+    def test_modes_return_exact_neighbours(self):
+        for mode, ratio in (('float16', 2), ('int8', 4)):
+            quantized = QuantizedGallery.from_gallery(self.gallery, mode=mode, shortlist=8)
+            self.assertLessEqual(quantized.codes.nbytes * ratio, self.gallery.matrix.nbytes)
+            distances, positions = quantized.search(self.queries, k=2)
+            self.assertEqual(list(positions[:, 0]), [5, 700, 2999])
+            expected = np.linalg.norm(self.matrix[[5, 700, 2999]] - self.queries, axis=1)
+            np.testing.assert_allclose(distances[:, 0], expected, rtol=1e-4)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            QuantizedGallery.from_gallery(self.gallery, mode='pq')
+
+    def test_deleted_rows_never_returned(self):
+        gallery = FaceGallery.from_records((i, str(i), row) for i, row in enumerate(self.matrix[:6]))
+        for person_id in (0, 1, 2, 3):
+            gallery.remove(person_id)
+        quantized = QuantizedGallery.from_gallery(gallery, mode='int8', shortlist=16)
+        distances, positions = quantized.search(self.matrix[[0, 4]], k=4)
+        self.assertTrue(set(positions[positions >= 0].tolist()) <= {4, 5})
+        self.assertEqual(positions[1, 0], 4)
+        self.assertTrue(np.isinf(distances[:, 2:]).all())
+
+    def test_extend_appends_rows_with_exact_rerank(self):
+        quantized = QuantizedGallery.from_gallery(self.gallery, mode='int8', shortlist=8)
+        self.gallery.add(5000, "yeni", self.queries[0] + 0.05)
+        self.assertTrue(quantized.extend(self.gallery.snapshot()))
+        self.assertEqual(len(quantized), 3001)
+        distances, positions = quantized.search(self.queries[0] + 0.05, k=1)
+        self.assertEqual(positions[0, 0], 3000)
+        self.assertLess(distances[0, 0], 1e-5)
+
+
+class TestGallerySnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = GallerySnapshotStore(self.tmp.name)
+        rng = np.random.default_rng(3)
+        self.gallery = FaceGallery.from_records((i, f"kişi_{i}", row) for i, row in enumerate(rng.normal(size=(10, 128))))
+        self.fingerprint = {'active_count': 10, 'max_id': 9, 'last_update': None}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_is_memory_mapped(self):
+        self.assertEqual(self.store.write(self.gallery, self.fingerprint), 1)
+        loaded = self.store.load(self.fingerprint)
+        self.assertIsInstance(loaded.matrix.base, np.memmap)
+        self.assertEqual(loaded.names, self.gallery.names)
+        np.testing.assert_array_equal(loaded.matrix, self.gallery.matrix)
+        self.assertIsNone(self.store.load({'active_count': 11, 'max_id': 10, 'last_update': None}))
+
+    def test_loaded_gallery_copies_on_write(self):
+        self.store.write(self.gallery, self.fingerprint)
+        loaded = self.store.load(self.fingerprint)
+        loaded.add(100, "yeni", np.zeros(128))
+        loaded.remove(0)
+        self.assertEqual(len(loaded), 10)
+        self.assertEqual(len(self.store.load(self.fingerprint)), 10)
+
+    def test_shared_gallery_sees_other_process_writes(self):
+        self.store.write(self.gallery, self.fingerprint)
+        build = lambda: self.fail("Güncel snapshot varken galeri yeniden kurulmamalı")
+        writer = SharedGallery(self.store, lambda: self.fingerprint).attach(build)
+        reader = SharedGallery(self.store, lambda: self.fingerprint, poll_interval=0).attach(build)
+        self.assertIsInstance(reader.snapshot().matrix.base, np.memmap)
+        writer.add(100, "yeni", np.zeros(128))
+        writer.remove(0)
+        view = reader.snapshot()
+        self.assertEqual(reader.version, 3)
+        self.assertIn(100, reader)
+        self.assertNotIn(0, reader)
+        self.assertEqual(len(view), 10)
+
+    def test_deltas_do_not_copy_mapped_base(self):
+        self.store.write(self.gallery, self.fingerprint)
+        writer = SharedGallery(self.store, lambda: self.fingerprint).attach(self.fail)
+        reader = SharedGallery(self.store, lambda: self.fingerprint, poll_interval=0).attach(self.fail)
+        writer.add(100, "yeni", np.ones(128))
+        writer.replace(1, encoding=np.full(128, 2.0))
+        writer.remove(2)
+        self.assertIn(100, reader)
+        view = reader.snapshot()
+        # Taban eşlenmiş kalır; yeni satırlar yalnızca kuyrukta tutulur
+        self.assertIsInstance(view.base.base, np.memmap)
+        self.assertEqual((view.base.shape[0], view.tail.shape[0]), (10, 2))
+        distances = view.distances(np.ones((1, 128)))
+        expected = np.linalg.norm(view.matrix - 1, axis=1)
+        expected[~view.alive] = np.inf
+        np.testing.assert_allclose(distances[0], expected, rtol=1e-4)
+        self.assertEqual(view.distances(np.ones((1, 128)))[0].argmin(), 10)
+
+    def test_mutations_publish_deltas_until_compaction(self):
+        self.store = GallerySnapshotStore(self.tmp.name, min_deltas=4, delta_ratio=0)
+        self.store.write(self.gallery, self.fingerprint)
+        base_path = os.path.join(self.tmp.name, 'gallery.v1.encodings.npy')
+        base_mtime = os.path.getmtime(base_path)
+        writer = SharedGallery(self.store).attach(lambda: self.gallery)
+        reader = SharedGallery(self.store, poll_interval=0).attach(lambda: self.gallery)
+
+        writer.add(100, "yeni", np.ones(128))
+        writer.replace(1, name="yeniden")
+        writer.remove(2)
+        manifest = self.store.read_manifest()
+        self.assertEqual((manifest['base'], manifest['deltas']), (1, [2, 3, 4]))
+        self.assertEqual(os.path.getmtime(base_path), base_mtime)
+        self.assertIn(100, reader)
+        self.assertEqual(reader.name_of(1), "yeniden")
+        self.assertNotIn(2, reader)
+        self.assertEqual(reader.version, 4)
+
+        writer.remove(3)
+        writer.remove(4)
+        manifest = self.store.read_manifest()
+        self.assertEqual((manifest['base'], manifest['deltas']), (6, []))
+        self.assertEqual(manifest['count'], 8)
+        reader.refresh(force=True)
+        self.assertEqual(len(reader), 8)
+        np.testing.assert_array_equal(reader.snapshot().live_arrays()[0], writer.snapshot().live_arrays()[0])
+
+
+class TestShardedGalleryIndex(unittest.TestCase):
+    def test_matches_exact_search(self):
+        rng = np.random.default_rng(5)
+        gallery = FaceGallery.from_records(
+            (i, f"kisi_{i}", encoding) for i, encoding in enumerate(rng.normal(size=(300, 128)))
+        )
+        gallery.remove(7)
+        view = gallery.snapshot()
+        queries = view.matrix[[3, 7, 150, 299]] + 0.01
+        with ShardedGalleryIndex(workers=2, shards=3).build(view.matrix, view.sq_norms) as index:
+            distances, positions = index.search(queries, k=2)
+            matches = BatchMatcher(tolerance=0.6).match(view, queries, index=index)
+        exact = view.distances(queries)
+        np.testing.assert_array_equal(positions[:, 0], np.argmin(exact, axis=1))
+        np.testing.assert_allclose(distances[:, 0], exact.min(axis=1), rtol=1e-4)
+        self.assertNotIn(7, positions)
+        self.assertEqual([m.person_id for m in matches], [3, None, 150, 299])
+
+    def test_extend_writes_into_reserved_capacity(self):
+        rng = np.random.default_rng(6)
+        gallery = FaceGallery.from_records(
+            (i, f"kisi_{i}", encoding) for i, encoding in enumerate(rng.normal(size=(8, 128)))
+        )
+        view = gallery.snapshot()
+        with ShardedGalleryIndex(workers=1, shards=2, reserve=0.25).build(view.matrix, view.sq_norms) as index:
+            gallery.add(100, "yeni", np.full(128, 3.0))
+            gallery.add(101, "yeni2", np.full(128, -3.0))
+            self.assertTrue(index.extend(gallery.snapshot()))
+            _, positions = index.search(np.full((1, 128), 3.0), k=1)
+            self.assertEqual(positions[0, 0], 8)
+            gallery.add(102, "fazla", np.zeros(128))
+            # Ayrılan kapasite (8 + 2) doldu; indeks yeniden kurulmalı
+            self.assertFalse(index.extend(gallery.snapshot()))
+
+
+class TestGalleryPartitions(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(9)
+        self.encodings = rng.normal(size=(6, 128))
+        self.gallery = FaceGallery.from_records((i, f"kisi_{i}", e) for i, e in enumerate(self.encodings))
+        self.attributes = {
+            0: ('guvenlik', 3), 1: ('guvenlik', 1), 2: ('ar-ge', 5),
+            3: ('ar-ge', 2), 4: (None, 4), 5: ('muhasebe', 1)
+        }
+
+    def test_rows_for_filters(self):
+        partitions = GalleryPartitions(self.gallery.snapshot(), self.attributes)
+        rows = lambda **kw: partitions.rows(RecognitionFilter.create(**kw)).tolist()
+        self.assertEqual(rows(min_access_level=3), [0, 2, 4])
+        self.assertEqual(rows(departments=['ar-ge', 'muhasebe']), [2, 3, 5])
+        self.assertEqual(rows(departments=['guvenlik'], min_access_level=2), [0])
+        self.assertEqual(rows(min_access_level=6), [])
+        self.assertEqual(rows(), list(range(6)))
+
+    def test_restricted_match_ignores_ineligible(self):
+        view = self.gallery.snapshot()
+        rows = GalleryPartitions(view, self.attributes).rows(RecognitionFilter.create(min_access_level=3))
+        matcher = BatchMatcher(tolerance=0.6)
+        matches = matcher.match(view, self.encodings[[1, 2]], rows=rows)
+        self.assertFalse(matches[0].is_match)
+        self.assertEqual((matches[1].person_id, matches[1].position), (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
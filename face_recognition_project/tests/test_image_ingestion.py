@@ -0,0 +1,47 @@
+import base64
+import io
+import unittest
+from PIL import Image
+from api.image_ingestion import ImageRejected, decode_base64_image, decode_image
+
+
+def encode(image: Image.Image, image_format: str = 'JPEG') -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class TestImageIngestion(unittest.TestCase):
+    def test_downscales_on_decode_and_maps_boxes_back(self):
+        data = encode(Image.new('RGB', (2000, 1000), (255, 0, 0)))
+        decoded = decode_image(data, max_side=500)
+        self.assertEqual(decoded.pixels.shape, (250, 500, 3))
+        self.assertEqual(decoded.original_size, (2000, 1000))
+        self.assertGreater(decoded.pixels[..., 0].min(), 200)  # RGB sırası
+        self.assertEqual(decoded.to_original([(10, 60, 50, 20)]), [(40, 240, 200, 80)])
+
+        png = decode_image(encode(Image.new('L', (64, 32)), 'PNG'), max_side=0)
+        self.assertEqual((png.pixels.shape, png.scale), ((32, 64, 3), 1.0))
+
+    def test_limits_and_invalid_payloads(self):
+        data = encode(Image.new('RGB', (400, 400)))
+        with self.assertRaises(ImageRejected) as context:
+            decode_image(data, max_bytes=100)
+        self.assertEqual(context.exception.status_code, 413)
+        with self.assertRaises(ImageRejected) as context:
+            decode_image(data, max_pixels=1000)
+        self.assertEqual(context.exception.status_code, 413)
+        with self.assertRaises(ImageRejected) as context:
+            decode_image(b'not an image')
+        self.assertEqual(context.exception.status_code, 400)
+        with self.assertRaises(ImageRejected):
+            decode_image(encode(Image.new('RGB', (8, 8)), 'GIF'))
+        with self.assertRaises(ImageRejected):
+            decode_base64_image('%%%')
+
+        decoded = decode_base64_image(base64.b64encode(data).decode('ascii'))
+        self.assertEqual(decoded.pixels.shape, (400, 400, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
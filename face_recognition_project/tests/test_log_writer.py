@@ -0,0 +1,72 @@
+import gc
+import threading
+import time
+import unittest
+import weakref
+from infrastructure.persistence.log_writer import BatchWriter, RecognitionLogWriter
+
+
+class TestRecognitionLogWriter(unittest.TestCase):
+    def test_batches_by_size_and_flushes_on_close(self):
+        batches = []
+        writer = RecognitionLogWriter(batches.append, batch_size=3, flush_interval=60).start()
+        for person_id in range(7):
+            self.assertTrue(writer.submit(person_id, 0.4))
+        writer.close()
+
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual([row[0] for batch in batches for row in batch], list(range(7)))
+        self.assertEqual(writer.stats()['written'], 7)
+        self.assertFalse(writer.submit(8, 0.4))
+
+    def test_closed_writer_is_released(self):
+        writer = RecognitionLogWriter(lambda batch: None).start()
+        ref = weakref.ref(writer)
+        writer.close()
+        del writer
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_flushes_partial_batch_after_interval(self):
+        written = threading.Event()
+        writer = RecognitionLogWriter(lambda batch: written.set(), batch_size=100, flush_interval=0.05).start()
+        writer.submit(1, 0.3)
+        self.assertTrue(written.wait(2.0))
+        writer.close()
+
+    def test_full_queue_drops_without_blocking(self):
+        release = threading.Event()
+        writer = RecognitionLogWriter(lambda batch: release.wait(2.0), batch_size=1, max_queue=2).start()
+        start = time.perf_counter()
+        accepted = [writer.submit(person_id, 0.5) for person_id in range(10)]
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIn(False, accepted)
+        self.assertEqual(writer.stats()['dropped'], accepted.count(False))
+        release.set()
+        writer.close()
+
+    def test_write_errors_are_counted(self):
+        def fail(batch):
+            raise RuntimeError("veritabanı kilitli")
+
+        writer = RecognitionLogWriter(fail, batch_size=2).start()
+        writer.submit(1, 0.5)
+        writer.submit(2, 0.5)
+        writer.close()
+        self.assertEqual(writer.stats()['failed'], 2)
+
+
+class TestBatchWriter(unittest.TestCase):
+    def test_writes_arbitrary_rows(self):
+        batches = []
+        writer = BatchWriter(batches.append, batch_size=2, flush_interval=60).start()
+        rows = [(7, '0', 'ilk', 'son', 0.3, 12), (8, '1', 'ilk', 'son', None, 1), (9, '0', 'ilk', 'son', 0.5, 3)]
+        for row in rows:
+            self.assertTrue(writer.put(row))
+        writer.close()
+        self.assertEqual(batches, [rows[:2], rows[2:]])
+        self.assertFalse(hasattr(writer, 'submit'))
+
+
+if __name__ == '__main__':
+    unittest.main()
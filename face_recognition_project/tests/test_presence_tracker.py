@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime, timedelta
+from services.presence_tracker import PresenceTracker
+
+
+class TestPresenceTracker(unittest.TestCase):
+    def setUp(self):
+        self.closed = []
+        self.presence = PresenceTracker(self.closed.append, gap=10, max_duration=300)
+        self.start = datetime(2024, 1, 1, 9, 0, 0)
+
+    def at(self, seconds: float) -> datetime:
+        return self.start + timedelta(seconds=seconds)
+
+    def test_one_row_per_continuous_sighting(self):
+        # Bir dakika boyunca yarım saniyede bir görülen kişi tek oturum üretir
+        for step in range(120):
+            self.presence.observe(7, '0', 0.45 - step * 0.001, self.at(step * 0.5))
+        self.assertEqual(self.closed, [])
+
+        self.presence.expire(self.at(75))
+        self.assertEqual(len(self.closed), 1)
+        row = self.closed[0].as_row()
+        self.assertEqual(row[:4], (7, '0', self.at(0), self.at(59.5)))
+        self.assertAlmostEqual(row[4], 0.331)
+        self.assertEqual(row[5], 120)
+
+    def test_gap_and_camera_split_sessions(self):
+        self.presence.observe(1, '0', 0.4, self.at(0))
+        self.presence.observe(1, '1', 0.4, self.at(1))
+        self.presence.observe(1, '0', 0.4, self.at(30))
+        self.assertEqual([(s.camera, s.first_seen) for s in self.closed], [('0', self.at(0))])
+        self.assertEqual(len(self.presence.active()), 2)
+
+        self.presence.close_all()
+        self.assertEqual(len(self.closed), 3)
+        self.assertEqual(self.presence.active(), [])
+
+    def test_repeated_frame_id_and_max_duration(self):
+        self.presence.observe(2, '0', 0.5, self.at(0), frame_id=1)
+        self.presence.observe(2, '0', 0.5, self.at(0.1), frame_id=1)
+        self.presence.observe(2, '0', 0.5, self.at(0.2), frame_id=2)
+        self.assertEqual(self.presence.active()[0].frame_count, 2)
+
+        for step in range(1, 80):
+            self.presence.observe(2, '0', 0.5, self.at(step * 5))
+        self.assertEqual(len(self.closed), 1)
+        self.assertLessEqual(self.closed[0].last_seen - self.closed[0].first_seen, timedelta(seconds=300))
+
+
+if __name__ == '__main__':
+    unittest.main()
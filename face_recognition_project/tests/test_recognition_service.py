@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+import cv2
+import numpy as np
+from application.services.recognition_service import RecognitionService
+from database.models import Person as PersonModel, create_session_factory
+from infrastructure.persistence.repositories import PersonRepository, RecognitionLogRepository
+
+
+class FakeFaceRecognition:
+    """Görüntüde tek yüz bulan ve sabit bir kodlama döndüren sahte tanıma servisi."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+
+    def preprocess_image(self, image):
+        return image
+
+    def detect_faces(self, image):
+        return [(0, image.shape[1], image.shape[0], 0)]
+
+    def encode_face(self, image, face_location):
+        return self.encoding
+
+
+class TestRecognitionService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.factory = create_session_factory(os.path.join(self.tmp.name, 'test.db'))
+        self.session = self.factory()
+        rng = np.random.default_rng(4)
+        self.encodings = rng.normal(scale=0.1, size=(5, 128))
+        for i, encoding in enumerate(self.encodings):
+            self.session.add(PersonModel(name=f"kişi_{i}", face_encoding=encoding.tobytes(),
+                                         is_active=True, created_at=datetime.now()))
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        self.factory.kw['bind'].dispose()
+        self.tmp.cleanup()
+
+    def make_service(self, face_recognition=None) -> RecognitionService:
+        return RecognitionService(face_recognition, PersonRepository(self.session),
+                                  RecognitionLogRepository(self.session))
+
+    def test_quantized_gallery_reranks_from_mapped_file(self):
+        service = self.make_service()
+        index = service.quantize_gallery('int8', shortlist=4, path=os.path.join(self.tmp.name, 'full'))
+        # Bellekteki float32 galeri eşlenmiş dosyayla değiştirilir
+        self.assertIsInstance(service.gallery.snapshot().matrix, np.memmap)
+        self.assertIsInstance(index.full_precision, np.memmap)
+        distances, positions = index.search(self.encodings[[3]], k=1)
+        self.assertEqual(positions[0, 0], 3)
+        self.assertLess(distances[0, 0], 1e-5)
+
+    def test_add_person_end_to_end(self):
+        encoding = self.encodings[0] + 0.3
+        service = self.make_service(FakeFaceRecognition(encoding))
+        index = service.build_index(nlist=2, nprobe=2)
+        image_path = os.path.join(self.tmp.name, 'yeni.png')
+        cv2.imwrite(image_path, np.zeros((20, 20, 3), dtype=np.uint8))
+        details = {'department': 'ar-ge', 'access_level': 3, 'email': 'yeni@example.com'}
+
+        person_id = service.add_person(image_path, "yeni", details)
+        person = PersonRepository(self.session).get_by_id(person_id)
+        self.assertEqual((person['name'], person['department'], person['access_level']), ("yeni", 'ar-ge', 3))
+        self.assertEqual(person['face_encoding'], encoding.tobytes())
+        self.assertNotIn('photo_path', details)
+        # Yeni satır mevcut indekse eklenir; indeks bırakılmaz
+        self.assertIs(service.index, index)
+        match, = service.matcher.match(service.gallery.snapshot(), [encoding], index=service.index)
+        self.assertEqual((match.person_id, match.name), (person_id, "yeni"))
+
+    def test_index_survives_deactivation(self):
+        service = self.make_service()
+        index = service.build_index(nlist=2, nprobe=2)
+        person_id = int(service.gallery.ids[3])
+        service.deactivate_person(person_id)
+        # Mezar taşı satır konumlarını korur; indeks yalnızca yeni sürüme taşınır
+        self.assertIs(service.index, index)
+        self.assertEqual(index.version, service.gallery.version)
+        match, = service.matcher.match(service.gallery.snapshot(), [self.encodings[3]], index=service.index)
+        self.assertIsNone(match.person_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
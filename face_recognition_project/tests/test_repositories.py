@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from database.models import Person as PersonModel, create_session_factory
+from infrastructure.persistence.repositories import PersonRepository
+
+
+class TestPersonRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.factory = create_session_factory(os.path.join(self.tmp.name, 'test.db'))
+        self.session = self.factory()
+        self.repository = PersonRepository(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.factory.kw['bind'].dispose()
+        self.tmp.cleanup()
+
+    def _add_model(self, name: str, is_active: bool = True) -> int:
+        person = PersonModel(name=name, face_encoding=name.encode(), is_active=is_active, created_at=datetime.now())
+        self.session.add(person)
+        self.session.commit()
+        return person.id
+
+    def test_active_encodings_reads_only_existing_columns(self):
+        active_id = self._add_model("ayşe")
+        self._add_model("eski", is_active=False)
+        self.assertEqual(self.repository.get_active_encodings(), [
+            {'id': active_id, 'name': "ayşe", 'face_encoding': "ayşe".encode()}
+        ])
+
+    def test_add_writes_only_existing_columns(self):
+        person_id = self.repository.add("ali", b"\x01", {'email': 'ali@example.com', 'phone': '555',
+                                                          'photo_path': 'ali.jpg', 'department': 'ar-ge'})
+        person = self.repository.get_by_id(person_id)
+        self.assertEqual((person['name'], person['department'], person['access_level']), ("ali", 'ar-ge', 1))
+        self.assertEqual([p['id'] for p in self.repository.get_all_active()], [person_id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from database.models import create_session_factory
+from infrastructure.persistence.repositories import PersonRepository
+
+
+class TestSchemaMigration(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'legacy.db')
+        # department/access_level sütunlarından önceki şema
+        connection = sqlite3.connect(self.db_path)
+        connection.execute(
+            "CREATE TABLE persons (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE, "
+            "face_encoding BLOB NOT NULL, is_active BOOLEAN, created_at DATETIME NOT NULL, "
+            "updated_at DATETIME)"
+        )
+        connection.execute(
+            "INSERT INTO persons (name, face_encoding, is_active, created_at) VALUES (?, ?, 1, ?)",
+            ("eski", b"\x00", datetime(2024, 1, 1).isoformat(sep=' '))
+        )
+        connection.commit()
+        connection.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_adds_columns_idempotently(self):
+        create_session_factory(self.db_path).kw['bind'].dispose()
+        factory = create_session_factory(self.db_path)
+        session = factory()
+        try:
+            attributes = PersonRepository(session).get_access_attributes()
+            self.assertEqual(attributes, {1: (None, 1)})
+        finally:
+            session.close()
+            factory.kw['bind'].dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+import numpy as np
+from presentation.gui.main_window import MainWindow
+
+
+class SlowRecognitionService:
+    """İlk çağrıda yavaş, sonra pencereyi durduran sahte tanıma servisi."""
+
+    def __init__(self, window):
+        self.window = window
+        self.calls = 0
+        self.threads = set()
+
+    def recognize_face(self, frame):
+        self.calls += 1
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        self.window.camera_active = False
+        return [{'person_id': 1, 'name': 'ayşe', 'confidence': 0.7, 'location': (10, 40, 40, 10)}]
+
+
+class TestTkRecognitionWorker(unittest.TestCase):
+    def make_window(self):
+        window = SimpleNamespace(
+            camera_active=True,
+            frame=np.zeros((60, 80, 3), dtype=np.uint8),
+            logger=logging.getLogger(__name__),
+            _recognition_thread=None,
+            _results_lock=threading.Lock(),
+            _pending_results=None,
+            _pending_error=None,
+            overlays=[],
+            status_var=SimpleNamespace(set=lambda value: None),
+            shown=[]
+        )
+        window.recognition_service = SlowRecognitionService(window)
+        window.recognition_loop = lambda: MainWindow.recognition_loop(window)
+        window.display_results = window.shown.append
+        return window
+
+    def test_recognition_runs_off_the_calling_thread(self):
+        window = self.make_window()
+        start = time.perf_counter()
+        MainWindow.start_recognition(window)
+        # Başlatma tanımayı beklemez; Tk döngüsü serbest kalır
+        self.assertLess(time.perf_counter() - start, 0.04)
+        MainWindow.stop_recognition(window)
+        self.assertEqual(window.recognition_service.threads, {'tk-recognition'})
+
+    def test_results_are_applied_on_the_polling_thread(self):
+        window = self.make_window()
+        MainWindow.recognition_loop(window)
+        MainWindow.apply_recognition_results(window)
+        self.assertEqual(len(window.shown), 1)
+        self.assertEqual(window.overlays, [((10, 40, 40, 10), "ayşe (0.70)", (0, 255, 0))])
+        # Aynı sonuç ikinci kez uygulanmaz
+        MainWindow.apply_recognition_results(window)
+        self.assertEqual(len(window.shown), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
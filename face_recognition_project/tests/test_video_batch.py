@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from application.services.video_batch import VideoCheckpoint, gallery_fingerprint, plan_segments
+from infrastructure.recognition.gallery import FaceGallery
+
+
+class TestVideoBatch(unittest.TestCase):
+    def test_segments_cover_video_without_overlap(self):
+        segments = plan_segments(frame_count=9000, fps=25.0, segment_seconds=60)
+        self.assertEqual(len(segments), 6)
+        self.assertEqual((segments[0].start_frame, segments[0].end_frame), (0, 1500))
+        self.assertEqual(segments[-1].end_frame, 9000)
+        self.assertTrue(all(a.end_frame == b.start_frame for a, b in zip(segments, segments[1:])))
+        self.assertEqual(plan_segments(0, 25.0, 60), [])
+
+    def test_checkpoint_round_trip_and_settings_guard(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.jsonl.checkpoint.json')
+            settings = {'video': '/kayit/giris.mp4', 'sample_every': 5}
+            checkpoint = VideoCheckpoint(path, settings)
+            self.assertFalse(checkpoint.load())
+            checkpoint.save(2, 120)
+            checkpoint.save(0, 300)
+
+            resumed = VideoCheckpoint(path, settings)
+            self.assertTrue(resumed.load())
+            self.assertEqual((resumed.completed, resumed.offset), ([2, 0], 300))
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['settings'], settings)
+
+            with self.assertRaises(ValueError):
+                VideoCheckpoint(path, dict(settings, sample_every=1)).load()
+
+    def test_gallery_fingerprint_tracks_content(self):
+        gallery = FaceGallery.from_records([(1, "ayşe", np.zeros(128)), (2, "mehmet", np.ones(128))])
+        before = gallery_fingerprint(gallery.live_arrays())
+        self.assertEqual(before, gallery_fingerprint(gallery.snapshot().live_arrays()))
+        gallery.replace(2, name="mehmet ali")
+        renamed = gallery_fingerprint(gallery.live_arrays())
+        self.assertNotEqual(before, renamed)
+        gallery.replace(2, encoding=np.full(128, 0.5))
+        self.assertNotEqual(renamed, gallery_fingerprint(gallery.live_arrays()))
+
+
+if __name__ == '__main__':
+    unittest.main()